@@ -0,0 +1,197 @@
+# columnar.py
+"""
+Columnar record batches for fetched WITS cells.
+
+A ColumnarBatch keeps one growable NumPy array per field and the fetchers
+append tariff/trade legs into it directly, instead of building a dict (and a
+DataFrame row) per cell. Conversion hands the arrays to pandas without
+copying numeric columns; `to_arrow` does the same for pyarrow when it is
+installed.
+
+    batch = ColumnarBatch()
+    batch.append(cell, tariff_data, trade_data)
+    df = batch.to_pandas()
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Combined record schema: (column, dtype, leg that fills it)
+# Leg None = cell key; "tariff"/"trade" columns are null where that leg is missing
+COMBINED_SCHEMA: List[Tuple[str, str, Optional[str]]] = [
+    ("reporter", "int32", None),
+    ("partner", "int32", None),
+    ("product", "object", None),
+    ("year", "int16", None),
+    ("simple_average", "float64", "tariff"),
+    ("min_rate", "float64", "tariff"),
+    ("max_rate", "float64", "tariff"),
+    ("tariff_type", "object", "tariff"),
+    ("total_lines", "int32", "tariff"),
+    ("mfn_lines", "int32", "tariff"),
+    ("pref_lines", "int32", "tariff"),
+    ("na_lines", "int32", "tariff"),
+    ("trade_value_usd", "float64", "trade"),
+    ("quantity", "float64", "trade"),
+    ("unit", "object", "trade"),
+]
+
+TARIFF_FIELDS = [name for name, _, leg in COMBINED_SCHEMA if leg == "tariff"]
+TRADE_FIELDS = [name for name, _, leg in COMBINED_SCHEMA if leg == "trade"]
+
+INITIAL_CAPACITY = 1024
+
+class ColumnarBatch:
+    """Append-only column store for combined tariff/trade cells"""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._size = 0
+        self._capacity = max(int(capacity), 1)
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(self._capacity, dtype=dtype) for name, dtype, _ in COMBINED_SCHEMA
+        }
+        # Per-leg presence masks (the columns of a missing leg hold placeholders)
+        self._has_tariff = np.zeros(self._capacity, dtype=bool)
+        self._has_trade = np.zeros(self._capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self, needed: int):
+        """Double the capacity until `needed` rows fit (amortized O(1) appends)"""
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, array in self._columns.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[name] = grown
+        for attr in ("_has_tariff", "_has_trade"):
+            grown = np.zeros(capacity, dtype=bool)
+            grown[:self._size] = getattr(self, attr)[:self._size]
+            setattr(self, attr, grown)
+        self._capacity = capacity
+
+    def append(self, cell: Sequence, tariff_data=None, trade_data=None) -> bool:
+        """
+        Append one cell from its TariffData/TradeData legs
+
+        Returns False (nothing appended) when both legs are missing, matching
+        combine_records returning None.
+        """
+        if tariff_data is None and trade_data is None:
+            return False
+
+        self._grow(self._size + 1)
+        i = self._size
+        columns = self._columns
+        reporter, partner, product, year = cell
+        columns["reporter"][i] = reporter
+        columns["partner"][i] = partner
+        columns["product"][i] = product
+        columns["year"][i] = year
+
+        for fields, data, mask in ((TARIFF_FIELDS, tariff_data, self._has_tariff),
+                                   (TRADE_FIELDS, trade_data, self._has_trade)):
+            mask[i] = data is not None
+            for name in fields:
+                columns[name][i] = getattr(data, name) if data is not None else _placeholder(columns[name])
+
+        self._size += 1
+        return True
+
+    def append_record(self, record: Optional[Dict]) -> bool:
+        """Append a flat combined dict (as built by combine_records or read from a journal)"""
+        if not record:
+            return False
+        return self.append(
+            (record["reporter"], record["partner"], record["product"], record["year"]),
+            _Leg(record) if "simple_average" in record else None,
+            _Leg(record) if "trade_value_usd" in record else None,
+        )
+
+    def extend(self, records: Iterable[Optional[Dict]]) -> int:
+        """Append many flat records; returns how many were appended"""
+        return sum(self.append_record(record) for record in records)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Views of the filled part of each column (no copy)"""
+        return {name: array[:self._size] for name, array in self._columns.items()}
+
+    def masks(self) -> Dict[str, np.ndarray]:
+        """Views of the per-leg presence masks"""
+        return {"tariff": self._has_tariff[:self._size], "trade": self._has_trade[:self._size]}
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        DataFrame over the batch's arrays
+
+        Float and key columns share memory with the batch; leg integer columns
+        become nullable Int32 arrays over the same data with the leg mask, and
+        float columns of a missing leg hold NaN. Text columns are converted by pandas.
+        """
+        masks = self.masks()
+        data = {}
+        for name, _, leg in COMBINED_SCHEMA:
+            values = self._columns[name][:self._size]
+            if leg is not None and values.dtype.kind == "i":
+                values = pd.arrays.IntegerArray(values, ~masks[leg])
+            elif leg is not None and values.dtype == object:
+                values = np.where(masks[leg], values, None)
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """pyarrow Table over the batch's arrays (numeric buffers are not copied)"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("to_arrow requires pyarrow (pip install pyarrow)")
+
+        masks = self.masks()
+        arrays = {}
+        for name, _, leg in COMBINED_SCHEMA:
+            values = self._columns[name][:self._size]
+            missing = ~masks[leg] if leg is not None else None
+            if values.dtype == object:
+                arrays[name] = pa.array(values, type=pa.string(), mask=missing)
+            else:
+                arrays[name] = pa.array(values, mask=missing)
+        return pa.table(arrays)
+
+    def to_records(self) -> List[Dict]:
+        """Flat dicts in the combine_records layout (for callers that still want rows)"""
+        columns = self.columns()
+        masks = self.masks()
+        records = []
+        for i in range(self._size):
+            record = {name: _python(columns[name][i]) for name, _, leg in COMBINED_SCHEMA if leg is None}
+            for leg, fields in (("tariff", TARIFF_FIELDS), ("trade", TRADE_FIELDS)):
+                if masks[leg][i]:
+                    record.update({name: _python(columns[name][i]) for name in fields})
+            records.append(record)
+        return records
+
+class _Leg:
+    """Attribute view over a flat record, so dict rows append like TariffData/TradeData"""
+    __slots__ = ("_record",)
+
+    def __init__(self, record: Dict):
+        self._record = record
+
+    def __getattr__(self, name):
+        return self._record.get(name)
+
+def _placeholder(column: np.ndarray):
+    if column.dtype.kind == "f":
+        return np.nan
+    if column.dtype.kind == "i":
+        return 0
+    return None
+
+def _python(value):
+    """NumPy scalar -> plain Python value"""
+    return value.item() if isinstance(value, np.generic) else value
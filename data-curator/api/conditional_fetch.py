@@ -0,0 +1,114 @@
+# conditional_fetch.py
+"""
+Conditional GET for reference datasets that rarely change.
+
+The validators of the last successful download (ETag / Last-Modified) are kept
+in a small JSON state file. A refresh sends them as If-None-Match /
+If-Modified-Since; a 304 means there is nothing to do, so daily refreshes cost
+one tiny request. Changed bodies come back as a streaming response to parse
+on the fly, and `write_if_changed` only touches an output whose bytes differ:
+
+    state = load_state()
+    response = conditional_get(url, state, outputs=[output_path])
+    if response is not None:
+        with response:
+            data = parse(response.iter_content(CHUNK_SIZE))
+        write_if_changed(output_path, data)
+        remember(state, url, response)
+        save_state(state)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Optional
+
+import requests
+
+from api.telemetry import metrics
+
+STATE_FILE = "data/raw/reference_fetch_state.json"
+REQUEST_TIMEOUT = 60
+
+def load_state(path: str = STATE_FILE) -> Dict[str, Dict]:
+    """url -> {"etag", "last_modified"} from the state file (empty if missing)"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_state(state: Dict[str, Dict], path: str = STATE_FILE):
+    """Atomically rewrite the state file"""
+    write_if_changed(path, json.dumps(state, indent=2, sort_keys=True).encode('utf-8'))
+
+def conditional_get(url: str, state: Dict[str, Dict], outputs: Iterable[str] = (),
+                    timeout: float = REQUEST_TIMEOUT,
+                    session: Optional[requests.Session] = None) -> Optional[requests.Response]:
+    """
+    GET a URL unless it is unchanged since the last remembered download
+
+    Args:
+        url: Resource to fetch
+        state: State loaded with load_state
+        outputs: Files derived from the resource; if any is missing the
+            validators are not sent, so the outputs get rebuilt
+        timeout: Connect/read timeout in seconds
+        session: Optional requests session to reuse
+
+    Returns:
+        None on 304 Not Modified, otherwise the streaming response (caller closes it)
+    """
+    headers = {}
+    validators = state.get(url, {})
+    if all(os.path.exists(path) for path in outputs):
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    start = time.perf_counter()
+    try:
+        response = (session or requests).get(url, headers=headers, timeout=timeout, stream=True)
+    except requests.exceptions.RequestException as e:
+        metrics.record_error(url, e)
+        raise
+    metrics.record_request(url, response.status_code, time.perf_counter() - start)
+    metrics.record_cache('conditional', hit=response.status_code == 304)
+    if response.status_code == 304:
+        response.close()
+        return None
+    response.raise_for_status()
+    return response
+
+def remember(state: Dict[str, Dict], url: str, response: requests.Response):
+    """Record a response's validators (call only after its outputs were written)"""
+    state[url] = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """
+    Atomically write `data` to `path` unless the file already holds exactly those bytes
+    Returns True if the file was written
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; outputs may be served by another user
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
@@ -0,0 +1,193 @@
+# endpoint_health.py
+"""
+Endpoint health tracking for the WITS client.
+
+Each endpoint (host + dataset, e.g. wits.worldbank.org / wits.TRN) gets:
+
+- a CircuitBreaker: after `failure_threshold` consecutive failures (timeouts,
+  connection errors, 5xx, 403s that survive the retry) the circuit opens and
+  requests fail immediately with CircuitOpenError instead of tying up a worker
+  for a full timeout. After `reset_timeout` seconds a limited number of
+  half-open probes are let through; a success closes the circuit, a failure
+  re-opens it.
+- an AdaptiveLimiter: an AIMD concurrency ceiling that halves on every 403
+  (WITS rate limiting) and grows back by about one slot per window of
+  successful requests, up to the configured maximum.
+
+    health = registry.get(url)
+    with health.slot():
+        response = session.get(url)
+    health.record_status(response.status_code)
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from api.telemetry import endpoint_name, metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+HALF_OPEN_PROBES = 1
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Request refused locally because the endpoint's circuit is open"""
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open probes -> closed"""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 half_open_probes: int = HALF_OPEN_PROBES, name: str = ""):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.name = name
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (reserves a probe slot when half-open)"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                metrics.increment('circuit', endpoint=self.name, transition='closed')
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                metrics.increment('circuit', endpoint=self.name, transition='opened')
+
+class AdaptiveLimiter:
+    """AIMD concurrency ceiling: halve on rate limiting, +1 per window of successes"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, name: str = ""):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.name = name
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= max(int(self.limit), self.min_limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            if self.limit < self.max_limit:
+                self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+                self._cond.notify_all()
+
+    def on_rate_limited(self):
+        with self._cond:
+            self.limit = max(self.limit / 2, float(self.min_limit))
+        metrics.increment('concurrency_decreases', endpoint=self.name)
+
+class EndpointHealth:
+    """Circuit breaker and concurrency limiter of one endpoint"""
+
+    def __init__(self, name: str, max_concurrency: int, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT):
+        self.name = name
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, name=name)
+        self.limiter = AdaptiveLimiter(max_concurrency, name=name)
+
+    @contextmanager
+    def slot(self):
+        """Hold a concurrency slot for one request; raises CircuitOpenError when open"""
+        if not self.breaker.allow():
+            metrics.increment('circuit_rejected', endpoint=self.name)
+            raise CircuitOpenError(f"Circuit open for {self.name}, not sending request")
+        self.limiter.acquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    def record_status(self, status: int):
+        """Classify a final response status"""
+        if status == 403:
+            self.limiter.on_rate_limited()
+            self.breaker.record_failure()
+        elif status >= 500:
+            self.breaker.record_failure()
+        else:
+            # 2xx-4xx (other than 403) mean the endpoint is up
+            self.limiter.on_success()
+            self.breaker.record_success()
+
+    def record_rate_limited(self):
+        """A 403 that will be retried: shrink concurrency without counting a failure"""
+        self.limiter.on_rate_limited()
+
+    def record_exception(self):
+        self.breaker.record_failure()
+
+    def status(self) -> Dict:
+        return {
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'concurrency_limit': round(self.limiter.limit, 2),
+            'in_flight': self.limiter.in_flight,
+        }
+
+class HealthRegistry:
+    """EndpointHealth per (host, endpoint), created on first use"""
+
+    def __init__(self, max_concurrency: int, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], EndpointHealth] = {}
+
+    def get(self, url: str) -> EndpointHealth:
+        key = (urlsplit(url).netloc, endpoint_name(url))
+        with self._lock:
+            health = self._endpoints.get(key)
+            if health is None:
+                health = self._endpoints[key] = EndpointHealth(
+                    f"{key[0]}/{key[1]}", self.max_concurrency, self.failure_threshold, self.reset_timeout)
+            return health
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {health.name: health.status() for health in self._endpoints.values()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
@@ -0,0 +1,263 @@
+# fetch_jobs.py
+"""
+Resumable, checkpointed fetch jobs for large WITS grids.
+
+A FetchJob keeps a durable SQLite journal of every (reporter, partner, product, year)
+cell and its state: pending, succeeded, empty (WITS has no data) or failed.
+Results are flushed to the journal in batches, so a job that dies (crash,
+network outage, Ctrl-C) resumes where it stopped and never repeats completed
+work. Failed cells are retried according to a RetryPolicy with exponential
+backoff; cells that exhaust their attempts stay failed until retry_failed().
+
+    job = FetchJob("data/raw/fetch_journal.db")
+    job.add_cells(grid_cells([840], [156, 76], ["85", "1001"], [2021, 2022]))
+    job.run()
+    df = job.results()
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import product as cartesian
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# Allow running as `python api/fetch_jobs.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.telemetry import METRICS_FILE, metrics, start_reporter
+from api.wits_api import Cell, MAX_WORKERS, ensure_endpoints, fetch_cell_record
+
+JOURNAL_FILE = "data/raw/fetch_journal.db"
+
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+EMPTY = "empty"
+FAILED = "failed"
+
+@dataclass
+class RetryPolicy:
+    """How failed cells are retried"""
+    max_attempts: int = 3
+    backoff_base: float = 2.0  # Seconds before the 2nd attempt, doubled for each later one
+    max_backoff: float = 300.0
+
+    def delay(self, attempts: int) -> float:
+        """Seconds to wait after the given number of failed attempts"""
+        return min(self.backoff_base * (2 ** max(attempts - 1, 0)), self.max_backoff)
+
+def grid_cells(reporters: Iterable[int], partners: Iterable[int],
+               products: Iterable[str], years: Iterable[int]) -> List[Cell]:
+    """Full cartesian grid of cells (reporter == partner combinations are skipped)"""
+    return [
+        (int(r), int(p), str(hs), int(y))
+        for r, p, hs, y in cartesian(reporters, partners, products, years)
+        if r != p
+    ]
+
+class FetchJob:
+    """A durable, resumable fetch over a grid of cells"""
+
+    def __init__(self, journal_path: str = JOURNAL_FILE,
+                 fetch_fn: Callable[[Cell], Optional[Dict]] = fetch_cell_record,
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.journal_path = journal_path
+        self.fetch_fn = fetch_fn
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._stop = threading.Event()
+
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(journal_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cells (
+                reporter INTEGER NOT NULL,
+                partner INTEGER NOT NULL,
+                product TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                record TEXT,
+                updated_at REAL,
+                PRIMARY KEY (reporter, partner, product, year)
+            );
+            CREATE INDEX IF NOT EXISTS idx_cells_status ON cells (status, next_attempt_at);
+        """)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def add_cells(self, cells: Iterable[Cell]) -> int:
+        """Register cells as pending; cells already in the journal keep their state"""
+        before = self._conn.total_changes
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cells (reporter, partner, product, year) VALUES (?, ?, ?, ?)",
+                ((int(r), int(p), str(hs), int(y)) for r, p, hs, y in cells)
+            )
+        return self._conn.total_changes - before
+
+    def progress(self) -> Dict[str, int]:
+        """Cell counts by status"""
+        counts = {PENDING: 0, SUCCEEDED: 0, EMPTY: 0, FAILED: 0}
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM cells GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def completed_cells(self) -> List[Cell]:
+        """Cells that need no further fetching (succeeded or empty), e.g. as the fetch planner's cache"""
+        rows = self._conn.execute(
+            "SELECT reporter, partner, product, year FROM cells WHERE status IN (?, ?)", (SUCCEEDED, EMPTY)
+        )
+        return [tuple(row) for row in rows]
+
+    def retry_failed(self) -> int:
+        """Make cells that exhausted their attempts eligible again"""
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE cells SET status = ?, attempts = 0, next_attempt_at = 0 WHERE status = ?",
+                (PENDING, FAILED)
+            )
+        return cursor.rowcount
+
+    def stop(self):
+        """Ask a running job to stop after flushing the current batch"""
+        self._stop.set()
+
+    def _runnable(self, limit: int, now: float) -> Dict[Cell, int]:
+        """Pending cells and failed cells whose backoff has elapsed (cell -> attempts so far)"""
+        rows = self._conn.execute(
+            """SELECT reporter, partner, product, year, attempts FROM cells
+               WHERE (status = ? OR (status = ? AND attempts < ?)) AND next_attempt_at <= ?
+               ORDER BY next_attempt_at, reporter, partner, product, year LIMIT ?""",
+            (PENDING, FAILED, self.retry_policy.max_attempts, now, limit)
+        ).fetchall()
+        return {tuple(row[:4]): row[4] for row in rows}
+
+    def _next_retry_at(self) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT MIN(next_attempt_at) FROM cells WHERE status = ? AND attempts < ?",
+            (FAILED, self.retry_policy.max_attempts)
+        ).fetchone()
+        return row[0]
+
+    def _flush(self, outcomes: List[Tuple[Cell, str, Optional[Dict], Optional[str]]], attempts_before: Dict[Cell, int]):
+        """Write a batch of cell outcomes in one transaction"""
+        now = time.time()
+        rows = []
+        for cell, status, record, error in outcomes:
+            attempts = attempts_before[cell] + 1
+            next_attempt_at = now + self.retry_policy.delay(attempts) if status == FAILED else 0
+            rows.append((status, attempts, next_attempt_at, error,
+                         json.dumps(record) if record is not None else None, now) + tuple(cell))
+
+        with self._conn:
+            self._conn.executemany(
+                """UPDATE cells SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?,
+                   record = ?, updated_at = ?
+                   WHERE reporter = ? AND partner = ? AND product = ? AND year = ?""",
+                rows
+            )
+
+    def _fetch_one(self, cell: Cell) -> Tuple[Cell, str, Optional[Dict], Optional[str]]:
+        try:
+            record = self.fetch_fn(cell)
+        except Exception as e:
+            return cell, FAILED, None, f"{type(e).__name__}: {e}"
+        return cell, (SUCCEEDED if record is not None else EMPTY), record, None
+
+    def run(self, max_workers: int = MAX_WORKERS, batch_size: int = 100) -> Dict[str, int]:
+        """
+        Fetch every runnable cell until the grid is done
+
+        Args:
+            max_workers: Concurrent cell fetches
+            batch_size: Outcomes buffered before each journal flush (and cells claimed per round)
+
+        Returns:
+            Final cell counts by status
+        """
+        self._stop.clear()
+        print(f"🚀 Running fetch job ({self.journal_path}): {self.progress()}")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while not self._stop.is_set():
+                cells = self._runnable(batch_size, time.time())
+
+                if not cells:
+                    next_retry = self._next_retry_at()
+                    if next_retry is None:
+                        break
+                    # Only backed-off failures are left: sleep until the earliest one is due
+                    self._stop.wait(max(next_retry - time.time(), 0.0))
+                    continue
+
+                futures = [executor.submit(self._fetch_one, cell) for cell in cells]
+                outcomes = [future.result() for future in as_completed(futures)]
+                self._flush(outcomes, cells)
+
+                counts = self.progress()
+                print(f"  ✓ Flushed {len(outcomes)} cells: {counts} | {metrics.summary_line()}")
+
+        counts = self.progress()
+        print(f"✅ Fetch job finished: {counts}")
+        return counts
+
+    def results(self) -> pd.DataFrame:
+        """Succeeded records as a DataFrame"""
+        records = [json.loads(row[0]) for row in
+                   self._conn.execute("SELECT record FROM cells WHERE status = ? ORDER BY rowid", (SUCCEEDED,))]
+        return pd.DataFrame(records)
+
+    def failures(self) -> pd.DataFrame:
+        """Failed cells with their attempt count and last error"""
+        return pd.read_sql_query(
+            "SELECT reporter, partner, product, year, attempts, last_error FROM cells WHERE status = ?",
+            self._conn, params=(FAILED,)
+        )
+
+def main(journal_path: str = JOURNAL_FILE, output_file: str = "data/raw/fetch_results.csv"):
+    """Fetch the config.py grid (USA as reporter) through a resumable job"""
+    from config import COUNTRIES, PRODUCTS, YEARS
+
+    job = FetchJob(journal_path)
+    added = job.add_cells(grid_cells(
+        [COUNTRIES["USA"]],
+        COUNTRIES.values(),
+        [p["hs"] for p in PRODUCTS.values()],
+        YEARS
+    ))
+    print(f"📋 Added {added} new cells to the journal")
+
+    # Pick the working URL structures before the first fetch (cached in data/raw)
+    ensure_endpoints()
+
+    # Live metrics for the run, rewritten every 30s (final report on exit)
+    reporter = start_reporter(METRICS_FILE, interval=30)
+    try:
+        job.run()
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted - rerun to resume from the journal")
+        return None
+    finally:
+        reporter.stop()
+        print(f"📈 Fetch metrics saved to: {METRICS_FILE}")
+
+    results = job.results()
+    results.to_csv(output_file, index=False)
+    print(f"💾 Saved {len(results)} records to: {output_file}")
+    job.close()
+
+    return results
+
+if __name__ == "__main__":
+    main()
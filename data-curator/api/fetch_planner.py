@@ -0,0 +1,264 @@
+# fetch_planner.py
+"""
+Fetch planner that minimizes WITS API calls by batching dimensions.
+
+WITS SDMX paths accept several values per dimension (`partner/156;76;484`,
+`year/2021;2022`) and `ALL` for products, so a grid of single-cell requests
+can be covered by a few rectangular requests. The planner:
+
+1. drops cells that are already cached,
+2. groups the remaining cells of each reporter into partner x year rectangles,
+3. merges products that share a rectangle into one request (or `ALL` when many do),
+4. splits years, partners and products so no expected response exceeds `max_cells` records,
+
+and `fan_out` maps each batched response back to per-cell records.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from api import wits_api
+from api.columnar import ColumnarBatch
+from api.sdmx_formats import JSON
+from api.wits_api import (Cell, MAX_WORKERS, TARIFF_DATASET, TRADE_DATASET, TARIFF_RECORD_FIELDS,
+                          TRADE_RECORD_FIELDS, _fetch_records, combine_records, tariff_from_record,
+                          trade_from_record)
+
+TARIFF = TARIFF_DATASET
+TRADE = TRADE_DATASET
+
+# Upper bound on cells a single request may cover (caps response size)
+MAX_CELLS_PER_REQUEST = 5000
+# Products sharing one rectangle at which `product/ALL` replaces the explicit list
+# (longer lists make URLs unwieldy and approach the size of an ALL response anyway)
+ALL_PRODUCTS_THRESHOLD = 400
+# Approximate number of product lines an ALL-product response carries per partner-year
+ALL_PRODUCTS_SIZE = 1250
+
+# Response fields that identify the cell of a record (first present alias wins). Partners
+# must be the numeric WITS codes the cells use, so ISO3 fields are not accepted here
+FIELD_ALIASES = {
+    'partner': ('Partner', 'PartnerCode', 'PARTNER'),
+    'product': ('Product', 'ProductCode', 'PRODUCTCODE', 'PRODUCT'),
+    'year': ('Year', 'TIME_PERIOD', 'YEAR'),
+}
+_KEY_FIELDS = tuple(alias for aliases in FIELD_ALIASES.values() for alias in aliases)
+
+# Fields kept from each streamed record
+RECORD_FIELDS = {
+    TARIFF: _KEY_FIELDS + TARIFF_RECORD_FIELDS,
+    TRADE: _KEY_FIELDS + TRADE_RECORD_FIELDS,
+}
+
+@dataclass(frozen=True)
+class BatchRequest:
+    """One WITS request covering reporter x partners x products x years"""
+    dataset: str
+    reporter: int
+    partners: Tuple[int, ...]
+    products: Tuple[str, ...]  # ("ALL",) for every product
+    years: Tuple[int, ...]
+    cells: Tuple[Cell, ...]  # The requested cells it covers
+
+    @property
+    def all_products(self) -> bool:
+        return self.products == ("ALL",)
+
+    def expected_size(self) -> int:
+        """Estimated records in the response"""
+        products = ALL_PRODUCTS_SIZE if self.all_products else len(self.products)
+        return len(self.partners) * len(self.years) * products
+
+    def url(self, fmt: str = JSON) -> str:
+        """SDMX URL with ';'-joined dimension values"""
+        build = wits_api.tariff_url if self.dataset == TARIFF else wits_api.trade_url
+        return build(self.reporter,
+                     ";".join(str(p) for p in self.partners),
+                     ";".join(self.products),
+                     ";".join(str(y) for y in self.years),
+                     fmt)
+
+def _rectangles(pairs: Iterable[Tuple[int, int]]) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """Cover a set of (partner, year) pairs with partner x year rectangles (exactly, no extra cells)"""
+    partners_by_year: Dict[int, set] = defaultdict(set)
+    for partner, year in pairs:
+        partners_by_year[year].add(partner)
+
+    years_by_partners: Dict[FrozenSet[int], List[int]] = defaultdict(list)
+    for year, partners in partners_by_year.items():
+        years_by_partners[frozenset(partners)].append(year)
+
+    return [(tuple(sorted(partners)), tuple(sorted(years))) for partners, years in years_by_partners.items()]
+
+def _chunks(values: Sequence, size: int) -> List[Tuple]:
+    size = max(size, 1)
+    return [tuple(values[i:i + size]) for i in range(0, len(values), size)]
+
+def plan_requests(cells: Iterable[Cell], cached: Iterable[Cell] = (), dataset: str = TARIFF,
+                  max_cells: int = MAX_CELLS_PER_REQUEST,
+                  all_products_threshold: int = ALL_PRODUCTS_THRESHOLD) -> List[BatchRequest]:
+    """
+    Plan the minimal set of batched requests for the cells not yet cached
+
+    Args:
+        cells: Requested (reporter, partner, product, year) cells
+        cached: Cells that already have data (or are known to be empty)
+        dataset: TARIFF (TRN) or TRADE (TMF)
+        max_cells: Maximum expected records per request
+        all_products_threshold: Products per rectangle at which `ALL` is used
+
+    Returns:
+        List of BatchRequest covering every missing cell
+    """
+    cached = set(cached)
+    missing = sorted(set(tuple(c) for c in cells) - cached)
+
+    # reporter -> product -> {(partner, year)}
+    grid: Dict[int, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+    for reporter, partner, product, year in missing:
+        grid[reporter][product].add((partner, year))
+
+    requests_planned = []
+    for reporter, products in grid.items():
+        # (partners, years) rectangle -> products sharing it
+        blocks: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], List[str]] = defaultdict(list)
+        for product, pairs in products.items():
+            for rectangle in _rectangles(pairs):
+                blocks[rectangle].append(product)
+
+        for (partners, years), block_products in blocks.items():
+            block_products = sorted(block_products)
+            # ALL only pays off for many products, and only if one partner-year fits the cap
+            use_all = len(block_products) >= all_products_threshold and ALL_PRODUCTS_SIZE <= max_cells
+
+            if use_all:
+                product_groups = [("ALL",)]
+                per_partner_year = ALL_PRODUCTS_SIZE
+            else:
+                product_groups = _chunks(block_products, max_cells)
+                per_partner_year = len(product_groups[0])
+
+            # Fill each request up to max_cells: years first, then partners
+            year_chunk = max(min(max_cells // per_partner_year, len(years)), 1)
+            for year_group in _chunks(years, year_chunk):
+                partner_chunk = max(max_cells // (per_partner_year * len(year_group)), 1)
+                for partner_group in _chunks(partners, partner_chunk):
+                    for product_group in product_groups:
+                        covered = block_products if use_all else product_group
+                        requests_planned.append(BatchRequest(
+                            dataset=dataset,
+                            reporter=reporter,
+                            partners=partner_group,
+                            products=product_group,
+                            years=year_group,
+                            cells=tuple((reporter, p, hs, y)
+                                        for p in partner_group for hs in covered for y in year_group),
+                        ))
+
+    return requests_planned
+
+def _field(record: Dict, dimension: str) -> Optional[str]:
+    for alias in FIELD_ALIASES[dimension]:
+        if alias in record and record[alias] not in (None, ""):
+            return str(record[alias]).strip()
+    return None
+
+def fan_out(request: BatchRequest, payload: Dict) -> Dict[Cell, Optional[Dict]]:
+    """
+    Map a batched response back to its cells
+
+    Dimensions with a single requested value are taken from the request; others are
+    read from the record fields. Covered cells without a record map to None (empty).
+    Raises ValueError when records cannot be matched to a cell (missing or non-numeric
+    keys), since their cells would otherwise be reported as empty.
+    """
+    return fan_out_records(request, payload.get('data') or [])
+
+def fan_out_records(request: BatchRequest, records: Iterable[Dict]) -> Dict[Cell, Optional[Dict]]:
+    """fan_out over an iterable of records (e.g. streamed from the response); same errors"""
+    wanted = {cell: None for cell in request.cells}
+    single_partner = request.partners[0] if len(request.partners) == 1 else None
+    single_product = request.products[0] if len(request.products) == 1 and not request.all_products else None
+    single_year = request.years[0] if len(request.years) == 1 else None
+
+    unmatched = []
+    for record in records:
+        partner = single_partner if single_partner is not None else _field(record, 'partner')
+        product = single_product if single_product is not None else _field(record, 'product')
+        year = single_year if single_year is not None else _field(record, 'year')
+        try:
+            if partner is None or product is None or year is None:
+                raise ValueError
+            cell = (request.reporter, int(partner), str(product), int(year))
+        except ValueError:
+            unmatched.append(record)
+            continue
+        # First record per cell wins, like the single-cell fetchers
+        if cell in wanted and wanted[cell] is None:
+            wanted[cell] = record
+
+    if unmatched:
+        raise ValueError(f"{len(unmatched)} {request.dataset} records could not be matched to a cell "
+                         f"(e.g. {unmatched[0]})")
+    return wanted
+
+def execute_plan(requests_planned: Sequence[BatchRequest],
+                 max_workers: int = MAX_WORKERS) -> Dict[str, Dict[Cell, object]]:
+    """
+    Run planned requests concurrently and build per-cell TariffData/TradeData (None = empty)
+    Responses are streamed record by record, so a large batch is never held as parsed JSON.
+    Returns {dataset: {cell: data}}; cells of failed requests are left out so they can be retried
+    """
+    def run(request: BatchRequest):
+        build = tariff_from_record if request.dataset == TARIFF else trade_from_record
+        try:
+            records = _fetch_records(request.dataset, request.url, RECORD_FIELDS[request.dataset])
+            mapped = fan_out_records(request, records)
+            return request, {cell: build(record, cell) if record is not None else None
+                             for cell, record in mapped.items()}
+        except Exception as e:
+            print(f"  Error fetching batch {request.dataset} {request.reporter} ({len(request.cells)} cells): {e}")
+            return request, None
+
+    results: Dict[str, Dict[Cell, object]] = {TARIFF: {}, TRADE: {}}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for request, built in executor.map(run, requests_planned):
+            if built is not None:
+                results[request.dataset].update(built)
+
+    return results
+
+def fetch_planned(cells: Sequence[Cell], cached: Iterable[Cell] = (),
+                  max_cells: int = MAX_CELLS_PER_REQUEST) -> Dict[Cell, Optional[Dict]]:
+    """
+    Fetch tariff and trade data for a grid through batched requests
+
+    Returns combined records (None for cells with no data) for every fetched cell
+    """
+    cached = set(cached)
+    tariff_plan = plan_requests(cells, cached, TARIFF, max_cells)
+    trade_plan = plan_requests(cells, cached, TRADE, max_cells)
+    missing = len(set(tuple(c) for c in cells) - cached)
+    print(f"📋 Planned {len(tariff_plan) + len(trade_plan)} requests for {missing} cells "
+          f"(vs {2 * missing} single-cell requests)")
+
+    fetched = execute_plan(tariff_plan + trade_plan)
+    tariffs, trades = fetched[TARIFF], fetched[TRADE]
+
+    # Only cells whose requests succeeded; the rest stay uncached for a later run
+    covered = set(tariffs) | set(trades)
+    return {cell: combine_records(cell, tariffs.get(cell), trades.get(cell)) for cell in covered}
+
+def fetch_planned_columnar(cells: Sequence[Cell], cached: Iterable[Cell] = (),
+                           max_cells: int = MAX_CELLS_PER_REQUEST) -> ColumnarBatch:
+    """fetch_planned appending straight into a ColumnarBatch (cells with no data are skipped)"""
+    cached = set(cached)
+    fetched = execute_plan(plan_requests(cells, cached, TARIFF, max_cells) +
+                           plan_requests(cells, cached, TRADE, max_cells))
+    tariffs, trades = fetched[TARIFF], fetched[TRADE]
+
+    batch = ColumnarBatch(capacity=max(len(tariffs) + len(trades), 1))
+    for cell in sorted(set(tariffs) | set(trades)):
+        batch.append(cell, tariffs.get(cell), trades.get(cell))
+    return batch
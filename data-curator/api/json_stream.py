@@ -0,0 +1,148 @@
+# json_stream.py
+"""
+Incremental parser for large WITS/Comtrade JSON responses.
+
+Both APIs wrap their records in a top-level array (`{"data": [ {...}, ... ]}`).
+`iter_array_records` walks that envelope over a stream of byte chunks and
+yields one record at a time, so only the record being decoded and the current
+chunk are held in memory. Parsing happens as chunks arrive, overlapping with
+the download:
+
+    response = session.get(url, stream=True)
+    for record in iter_array_records(response.iter_content(CHUNK_SIZE)):
+        ...
+
+Each record is decoded with the stdlib JSON decoder; the envelope itself
+(keys, skipped sibling values, array separators) is scanned incrementally.
+"""
+import codecs
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+class _Reader:
+    """Text buffer over a chunk iterator with a read position (compacted as it advances)"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk; False at end of stream"""
+        if self.eof:
+            return False
+        # Drop consumed text so the buffer stays about one chunk + one record long
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.buffer += self._decoder.decode(chunk)
+                return True
+        self.buffer += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of stream)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+                # A value touching the end of the buffer may be cut short (e.g. a number)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+def iter_array_records(chunks: Iterable[bytes], key: str = "data") -> Iterator:
+    """
+    Yield the elements of the top-level `key` array of a JSON object stream
+
+    Args:
+        chunks: Response body as byte chunks (e.g. response.iter_content(CHUNK_SIZE))
+        key: Envelope key holding the records
+
+    Yields nothing when the key is absent or null. Raises ValueError on malformed JSON.
+    """
+    reader = _Reader(chunks)
+    decoder = json.JSONDecoder()
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        name = reader.value(decoder)
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value(decoder)
+                    separator = reader.peek()
+                    reader.pos += 1
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError(f"Expected ',' or ']' in {key!r} array, found {separator!r}")
+            # Records are all the caller wants; ignore the rest of the envelope
+            return
+        reader.value(decoder)  # Skip a sibling value
+
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' in envelope, found {separator!r}")
+
+def project(records: Iterable[Dict], fields: Optional[Sequence[str]]) -> Iterator[Dict]:
+    """Keep only `fields` of each record (all fields when None)"""
+    if fields is None:
+        yield from records
+        return
+    for record in records:
+        yield {field: record[field] for field in fields if field in record}
+
+def records_to_columns(records: Iterable[Dict]) -> Dict[str, List]:
+    """Accumulate streamed records column by column (missing fields -> None)"""
+    columns: Dict[str, List] = {}
+    count = 0
+    for record in records:
+        for field, value in record.items():
+            if field not in columns:
+                columns[field] = [None] * count
+            columns[field].append(value)
+        count += 1
+        for values in columns.values():
+            if len(values) < count:
+                values.append(None)
+    return columns
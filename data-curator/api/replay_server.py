@@ -0,0 +1,290 @@
+# replay_server.py
+"""
+Offline stand-in for the WITS and UN Comtrade APIs.
+
+Serves recorded responses (or synthetic WITS/Comtrade-shaped ones when no
+recording matches) on a local port, with configurable latency, 403 rate
+limiting and error injection, so the fetch layer can be exercised and
+benchmarked without the network:
+
+    with ReplayServer(latency=0.05, rate_limit=20, error_rate=0.01) as server:
+        with server.patch_fetchers():
+            fetch_combined_batch(cells)
+        print(server.stats())
+
+Recordings are JSON files mapping request paths (including the query string)
+to {"status": ..., "body": ...}; `record_responses` captures them from the
+live APIs.
+"""
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+import requests
+
+from api import trades_api, wits_api
+from api.sdmx_formats import CSV, JSON, OBS_VALUE_FIELDS, SDMX_FIELDS, XML
+
+def _synthetic_value(path: str, salt: str, low: float, high: float) -> float:
+    """Deterministic pseudo-random value for a path"""
+    digest = hashlib.sha1(f"{salt}:{path}".encode()).digest()
+    return low + (high - low) * int.from_bytes(digest[:4], 'big') / 2 ** 32
+
+# Products listed by synthetic `product/ALL` responses
+SYNTHETIC_ALL_PRODUCTS = ["85", "1001", "1201", "8507", "2709", "8703"]
+
+_WITS_PATH = re.compile(r'/partner/([^/]+)/product/([^/]+)/year/([^/?]+)')
+
+def _synthetic_cells(path: str) -> List[Tuple[str, str, str]]:
+    """(partner, product, year) combinations a WITS path asks for (';'-lists expanded)"""
+    match = _WITS_PATH.search(path)
+    if not match:
+        return []
+    partners, products, years = (group.split(';') for group in match.groups())
+    if products == ['ALL']:
+        products = SYNTHETIC_ALL_PRODUCTS
+    return [(p, hs, y) for p in partners for hs in products for y in years]
+
+def _requested_format(path: str) -> str:
+    """Response format a WITS path asks for (no format parameter = SDMX-ML)"""
+    requested = parse_qs(urlsplit(path).query).get('format', [''])[0].lower()
+    return requested if requested in (JSON, CSV) else XML
+
+def render_sdmx(records: List[Dict], dataset: str, fmt: str) -> str:
+    """Render JSON-style records as structure-specific SDMX-ML or SDMX-CSV"""
+    names = {field: sdmx for sdmx, field in SDMX_FIELDS.items()}
+    names[OBS_VALUE_FIELDS[dataset]] = 'OBS_VALUE'
+    rows = [{names.get(field, field): value for field, value in record.items()} for record in records]
+
+    if fmt == CSV:
+        header = list(dict.fromkeys(key for row in rows for key in row)) or ['OBS_VALUE']
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=header, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+        return out.getvalue()
+
+    series_keys = ('REPORTER', 'PARTNER', 'PRODUCTCODE')
+    parts = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<message:StructureSpecificData xmlns:message="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/message">',
+             '<message:DataSet>']
+    for row in rows:
+        series = ' '.join(f'{k}="{escape(str(v))}"' for k, v in row.items() if k in series_keys)
+        obs = ' '.join(f'{k}="{escape(str(v))}"' for k, v in row.items() if k not in series_keys)
+        parts.append(f'<Series {series}><Obs {obs}/></Series>')
+    parts += ['</message:DataSet>', '</message:StructureSpecificData>']
+    return '\n'.join(parts)
+
+def synthetic_response(path: str):
+    """
+    WITS TRN/TMF or Comtrade shaped body for a path (None if the path is not recognised)
+    WITS bodies follow the requested format: a JSON dict, or SDMX-ML / SDMX-CSV text
+    """
+    if '/TRN/' in path or '/TMF/' in path:
+        records = []
+        for partner, product, year in _synthetic_cells(path):
+            cell_key = f"{partner}/{product}/{year}"
+            record = {'Partner': partner, 'ProductCode': product, 'Year': year}
+            if '/TRN/' in path:
+                record.update({
+                    'SimpleAverage': round(_synthetic_value(cell_key, 'avg', 0, 25), 2),
+                    'MinRate': 0.0,
+                    'MaxRate': round(_synthetic_value(cell_key, 'max', 25, 60), 2),
+                    'TariffType': 'MFN',
+                    'TotalNoOfLines': int(_synthetic_value(cell_key, 'lines', 1, 200)),
+                    'Nbr_MFN_Lines': 0, 'Nbr_Pref_Lines': 0, 'Nbr_NA_Lines': 0,
+                })
+            else:
+                record.update({
+                    'TradeValue': round(_synthetic_value(cell_key, 'value', 1e3, 1e7), 1),
+                    'Quantity': round(_synthetic_value(cell_key, 'qty', 1, 1e6), 1),
+                    'Unit': 'KG',
+                })
+            records.append(record)
+        fmt = _requested_format(path)
+        if fmt == JSON:
+            return {'data': records}
+        return render_sdmx(records, 'TRN' if '/TRN/' in path else 'TMF', fmt)
+    if '/bilateral' in path:
+        return {'data': [{'cmdCode': 'TOTAL', 'flowCode': flow,
+                          'primaryValue': round(_synthetic_value(path, flow, 1e6, 1e9), 1)}
+                         for flow in ('X', 'M')]}
+    return None
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler; behaviour comes from the owning ReplayServer"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, body = self.server.replay.respond(self.path)
+        if isinstance(body, str):
+            payload = body.encode('utf-8')
+            content_type = 'application/xml' if body.startswith('<') else 'text/csv'
+        else:
+            payload = json.dumps(body).encode('utf-8') if body is not None else b''
+            content_type = 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class ReplayServer:
+    """Local HTTP server replaying WITS/Comtrade responses with injected faults"""
+
+    def __init__(self, recordings: Optional[Dict[str, Dict]] = None,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit: Optional[int] = None, rate_window: float = 1.0,
+                 error_rate: float = 0.0, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            recordings: Path (with query string) -> {"status": int, "body": JSON or SDMX text}
+            latency, jitter: Seconds added to every response (uniform +/- jitter)
+            rate_limit: Requests allowed per `rate_window` seconds before answering 403
+            error_rate: Fraction of requests answered with a 500
+            seed: Seed for jitter and error injection
+            port: 0 picks a free port
+        """
+        self.recordings = dict(recordings or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._counts = {'requests': 0, 'ok': 0, 'rate_limited': 0, 'errors': 0, 'not_found': 0, 'replayed': 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'ReplayServer':
+        """Server replaying a recordings file written by record_responses"""
+        with open(path, 'r') as f:
+            return cls(recordings=json.load(f), **kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def respond(self, path: str):
+        """(status, body) for a request path, applying latency and injected faults"""
+        with self._lock:
+            self._counts['requests'] += 1
+            delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0.0)
+            inject_error = self.error_rate and self._random.random() < self.error_rate
+
+            limited = False
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] > self.rate_window:
+                    self._recent.popleft()
+                limited = len(self._recent) >= self.rate_limit
+                if not limited:
+                    self._recent.append(now)
+
+        if delay:
+            time.sleep(delay)
+
+        if limited:
+            return self._count('rate_limited', 403, {'error': 'rate limited'})
+        if inject_error:
+            return self._count('errors', 500, {'error': 'injected failure'})
+
+        # Strip the /WITS or /COMTRADE prefix patch_fetchers() adds
+        key = path.split('/', 2)[-1] if path.count('/') > 1 else path
+        for candidate in (path, '/' + key):
+            if candidate in self.recordings:
+                recorded = self.recordings[candidate]
+                self._count('replayed', None, None)
+                return self._count('ok', recorded.get('status', 200), recorded.get('body'))
+
+        body = synthetic_response(path)
+        if body is None:
+            return self._count('not_found', 404, {'error': f'no recording for {path}'})
+        return self._count('ok', 200, body)
+
+    def _count(self, counter: str, status, body):
+        with self._lock:
+            self._counts[counter] += 1
+        return status, body
+
+    @contextmanager
+    def patch_fetchers(self, rate_limit_wait: float = 0.05):
+        """Point wits_api and trades_api at this server (and shorten the 403 pause) while active"""
+        saved = (wits_api.TARIFF_BASE, wits_api.TRADE_BASE, wits_api.RATE_LIMIT_WAIT, trades_api.COMTRADE_BASE)
+        wits_api.TARIFF_BASE = f"{self.url}/WITS{urlsplit(saved[0]).path}"
+        wits_api.TRADE_BASE = f"{self.url}/WITS{urlsplit(saved[1]).path}"
+        wits_api.RATE_LIMIT_WAIT = rate_limit_wait
+        trades_api.COMTRADE_BASE = f"{self.url}/COMTRADE{urlsplit(saved[3]).path}"
+        try:
+            yield self
+        finally:
+            wits_api.TARIFF_BASE, wits_api.TRADE_BASE, wits_api.RATE_LIMIT_WAIT, trades_api.COMTRADE_BASE = saved
+
+def record_responses(urls: Iterable[str], output_file: str, pause: float = 1.0) -> int:
+    """
+    Capture live API responses into a recordings file for ReplayServer
+
+    Keys are the URL path plus query string, so a server started from the
+    file replays them for the same requests. Returns the number recorded.
+    """
+    recordings = {}
+    for url in urls:
+        parts = urlsplit(url)
+        key = parts.path + (f"?{parts.query}" if parts.query else "")
+        print(f"Recording: {url}")
+        try:
+            response = requests.get(url, timeout=30)
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text  # SDMX-ML / SDMX-CSV bodies are replayed as text
+            recordings[key] = {'status': response.status_code, 'body': body}
+        except requests.exceptions.RequestException as e:
+            print(f"  Error recording {url}: {e}")
+        time.sleep(pause)
+
+    with open(output_file, 'w') as f:
+        json.dump(recordings, f, indent=2)
+    print(f"💾 Saved {len(recordings)} recordings to: {output_file}")
+    return len(recordings)
@@ -0,0 +1,227 @@
+# sdmx_formats.py
+"""
+Response formats for the WITS SDMX endpoints.
+
+WITS can answer the same query as JSON (`?format=JSON`, the most verbose),
+SDMX-ML structure-specific ("compact") XML (the default without a format
+parameter) or SDMX-CSV (`?format=csv`). This module holds streaming parsers
+that turn each format into the same flat records the JSON path yields (JSON
+field names such as `SimpleAverage`, `TradeValue`, `Partner`, `Year`), so
+everything downstream is format-agnostic, and a FormatSelector that measures
+bytes per record for each format and settles on the smallest per dataset.
+"""
+import codecs
+import csv
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from api.json_stream import iter_array_records
+
+JSON = "json"
+XML = "xml"
+CSV = "csv"
+
+# Query string appended to the SDMX path for each format
+FORMAT_QUERY = {
+    JSON: "?format=JSON",
+    XML: "",
+    CSV: "?format=csv",
+}
+
+# Order formats are tried in; JSON first so the first request always works
+CANDIDATE_FORMATS = (JSON, XML, CSV)
+
+# SDMX dimension/attribute -> field name used by the JSON responses
+SDMX_FIELDS = {
+    'REPORTER': 'Reporter',
+    'PARTNER': 'Partner',
+    'PRODUCTCODE': 'ProductCode',
+    'TIME_PERIOD': 'Year',
+    'TARIFFTYPE': 'TariffType',
+    'MIN_RATE': 'MinRate',
+    'MAX_RATE': 'MaxRate',
+    'TOTALNOOFLINES': 'TotalNoOfLines',
+    'NBR_MFN_LINES': 'Nbr_MFN_Lines',
+    'NBR_PREF_LINES': 'Nbr_Pref_Lines',
+    'NBR_NA_LINES': 'Nbr_NA_Lines',
+    'QUANTITY': 'Quantity',
+    'QTYUNIT': 'Unit',
+    'UNIT': 'Unit',
+}
+
+# What OBS_VALUE holds in each dataset
+OBS_VALUE_FIELDS = {
+    "TRN": 'SimpleAverage',
+    "TMF": 'TradeValue',
+}
+
+class FormatError(ValueError):
+    """Response body is not in the requested format"""
+
+def _field_names(dataset: Optional[str]) -> Dict[str, str]:
+    names = dict(SDMX_FIELDS)
+    names['OBS_VALUE'] = OBS_VALUE_FIELDS.get(dataset, 'Value')
+    return names
+
+def _record(attributes: Iterable[Tuple[str, str]], names: Dict[str, str]) -> Dict:
+    """Flat record from SDMX attributes (unknown keys kept as-is, empty values dropped)"""
+    return {names.get(key, key): value for key, value in attributes if value not in (None, "")}
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+def iter_xml_records(chunks: Iterable[bytes], dataset: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Records from an SDMX-ML structure-specific (compact) message
+
+    Each <Obs> yields one record combining its attributes with those of the
+    enclosing <Series>; parsed elements are cleared so memory stays flat.
+    """
+    names = _field_names(dataset)
+    parser = XMLPullParser(events=('start', 'end'))
+    series: Dict = {}
+    started = False
+
+    for chunk in chunks:
+        if not started and chunk.lstrip():
+            if not chunk.lstrip().startswith(b'<'):
+                raise FormatError("Response is not XML")
+            started = True
+        try:
+            parser.feed(chunk)
+            events = list(parser.read_events())
+        except ParseError as e:
+            raise FormatError(f"Malformed SDMX-ML: {e}")
+
+        for event, element in events:
+            name = _local(element.tag)
+            if event == 'start' and name == 'Series':
+                series = _record(element.attrib.items(), names)
+            elif event == 'end' and name == 'Obs':
+                record = dict(series)
+                record.update(_record(element.attrib.items(), names))
+                element.clear()
+                yield record
+            elif event == 'end' and name == 'Series':
+                series = {}
+                element.clear()
+
+    try:
+        parser.close()
+    except ParseError as e:
+        raise FormatError(f"Malformed SDMX-ML: {e}")
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Text lines (with line endings) from byte chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be an unfinished line
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ""
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def iter_csv_records(chunks: Iterable[bytes], dataset: Optional[str] = None) -> Iterator[Dict]:
+    """Records from an SDMX-CSV body (one observation per row)"""
+    names = _field_names(dataset)
+    rows = csv.reader(iter_lines(chunks))
+    header = next(rows, None)
+    if header is None:
+        return
+    header = [column.strip() for column in header]
+    if 'OBS_VALUE' not in header:
+        raise FormatError("Response is not SDMX-CSV (no OBS_VALUE column)")
+
+    columns = [names.get(column, column) for column in header]
+    for row in rows:
+        if row:
+            yield {column: value for column, value in zip(columns, row) if value != ""}
+
+def iter_records(chunks: Iterable[bytes], fmt: str, dataset: Optional[str] = None) -> Iterator[Dict]:
+    """Stream records from a response body in any supported format"""
+    if fmt == XML:
+        return iter_xml_records(chunks, dataset)
+    if fmt == CSV:
+        return iter_csv_records(chunks, dataset)
+    return iter_array_records(chunks)
+
+class FormatSelector:
+    """
+    Picks the response format per dataset by observed bytes per record
+
+    Every candidate is tried until it has returned records; after that the
+    format with the fewest bytes per record wins. Formats the server rejects
+    are dropped for that dataset, and so is a format that has never returned
+    records after `max_empty` responses that JSON confirmed as empty (it is
+    unproven, not cheap).
+    """
+
+    def __init__(self, candidates: Iterable[str] = CANDIDATE_FORMATS, max_empty: int = 3):
+        self.candidates = tuple(candidates)
+        self.max_empty = max_empty
+        self._lock = threading.Lock()
+        self._observed: Dict[Tuple[str, str], List[int]] = {}  # (dataset, format) -> [bytes, records]
+        self._empty: Dict[Tuple[str, str], int] = {}  # (dataset, format) -> confirmed-empty responses
+        self._unsupported = set()
+
+    def choose(self, dataset: str) -> str:
+        with self._lock:
+            usable = [fmt for fmt in self.candidates if (dataset, fmt) not in self._unsupported]
+            if not usable:
+                return JSON
+            untried = [fmt for fmt in usable if self._observed.get((dataset, fmt), [0, 0])[1] == 0]
+            if untried:
+                return untried[0]
+            return min(usable, key=lambda fmt: self._bytes_per_record(dataset, fmt))
+
+    def observe(self, dataset: str, fmt: str, nbytes: int, records: int):
+        with self._lock:
+            totals = self._observed.setdefault((dataset, fmt), [0, 0])
+            totals[0] += nbytes
+            totals[1] += records
+
+    def is_proven(self, dataset: str, fmt: str) -> bool:
+        """Whether `fmt` has returned records for the dataset"""
+        with self._lock:
+            return self._observed.get((dataset, fmt), [0, 0])[1] > 0
+
+    def observe_empty(self, dataset: str, fmt: str):
+        """A 0-record response in `fmt` that JSON confirmed as empty"""
+        with self._lock:
+            key = (dataset, fmt)
+            self._empty[key] = self._empty.get(key, 0) + 1
+            if self._observed.get(key, [0, 0])[1] == 0 and self._empty[key] >= self.max_empty:
+                self._unsupported.add(key)
+
+    def mark_unsupported(self, dataset: str, fmt: str):
+        with self._lock:
+            self._unsupported.add((dataset, fmt))
+
+    def _bytes_per_record(self, dataset: str, fmt: str) -> float:
+        nbytes, records = self._observed[(dataset, fmt)]
+        return nbytes / records
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Bytes per record by dataset and format (None = unsupported or no records yet)"""
+        with self._lock:
+            datasets = {dataset for dataset, _ in list(self._observed) + list(self._unsupported)}
+            return {
+                dataset: {
+                    fmt: (None if (dataset, fmt) in self._unsupported or
+                          self._observed.get((dataset, fmt), [0, 0])[1] == 0
+                          else self._bytes_per_record(dataset, fmt))
+                    for fmt in self.candidates
+                }
+                for dataset in datasets
+            }
+
+    def reset(self):
+        with self._lock:
+            self._observed.clear()
+            self._empty.clear()
+            self._unsupported.clear()
@@ -0,0 +1,229 @@
+# telemetry.py
+"""
+Metrics for the fetch layer.
+
+The fetchers record into the module-level `metrics` registry:
+
+- requests by endpoint and HTTP status (`requests`), with latency to response
+  headers (`latency_ms`) and full body read/parse time (`stream_ms`) histograms
+- bytes received per endpoint (`bytes`)
+- 403 retries and the time spent backing off (`retries`, `backoff_s`)
+- cache lookups by cache and outcome (`cache`), from which hit ratios are derived
+
+`metrics.snapshot()` can be called at any time from any thread (e.g. by a
+long-running FetchJob), `metrics.dump(path)` writes the JSON report for a run,
+and `start_reporter` refreshes that report periodically during long jobs:
+
+    reporter = start_reporter("data/raw/fetch_metrics.json", interval=30)
+    ...
+    reporter.stop()
+"""
+import bisect
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Histogram bucket upper bounds in milliseconds (roughly x2 steps up to 2 minutes)
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000, 120000]
+
+METRICS_FILE = "data/raw/fetch_metrics.json"
+
+def endpoint_name(url: str) -> str:
+    """Short endpoint label for a request URL (e.g. wits.TRN, wits.metadata, comtrade)"""
+    parts = urlsplit(url)
+    path = parts.path
+    for dataset in ('TRN', 'TMF'):
+        if f'/datasource/{dataset}' in path or f'/rest/data/{dataset}' in path:
+            return f'wits.{dataset}'
+    if '/wits/datasource' in path:
+        return 'wits.metadata'
+    if 'comtrade' in parts.netloc or '/bilateral' in path:
+        return 'comtrade'
+    return parts.netloc or 'unknown'
+
+class Histogram:
+    """Fixed-bucket histogram with count/sum/min/max"""
+
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket = above the top bound
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile (max for the overflow bucket)"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': {(f"le_{bound:g}" if i < len(self.bounds) else "inf"): count
+                        for i, (bound, count) in enumerate(zip(self.bounds + [math.inf], self.counts))
+                        if count},
+        }
+
+def _key(name: str, labels: Dict[str, object]) -> str:
+    """Prometheus-style series key: name{a=1,b=2}"""
+    if not labels:
+        return name
+    return name + '{' + ','.join(f"{k}={labels[k]}" for k in sorted(labels)) + '}'
+
+class Metrics:
+    """Thread-safe registry of counters, totals and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._started = time.time()
+            self._counters: Dict[str, float] = {}
+            self._histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    # Fetch-layer helpers
+
+    def record_request(self, url: str, status: int, seconds: float):
+        endpoint = endpoint_name(url)
+        self.increment('requests', endpoint=endpoint, status=status)
+        self.observe('latency_ms', seconds * 1000, endpoint=endpoint)
+
+    def record_error(self, url: str, error: Exception):
+        self.increment('requests', endpoint=endpoint_name(url), status=type(error).__name__)
+
+    def record_stream(self, url: str, nbytes: int, seconds: float, records: Optional[int] = None):
+        endpoint = endpoint_name(url)
+        self.increment('bytes', nbytes, endpoint=endpoint)
+        self.observe('stream_ms', seconds * 1000, endpoint=endpoint)
+        if records is not None:
+            self.increment('records', records, endpoint=endpoint)
+
+    def record_backoff(self, url: str, seconds: float):
+        endpoint = endpoint_name(url)
+        self.increment('retries', endpoint=endpoint)
+        self.increment('backoff_s', seconds, endpoint=endpoint)
+
+    def record_cache(self, cache: str, hit: bool):
+        self.increment('cache', cache=cache, result='hit' if hit else 'miss')
+
+    def snapshot(self) -> Dict:
+        """Point-in-time copy of every metric plus derived rates"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: h.to_dict() for key, h in self._histograms.items()}
+            started = self._started
+
+        elapsed = time.time() - started
+        requests = sum(v for k, v in counters.items() if k.startswith('requests{'))
+        return {
+            'started_at': started,
+            'elapsed_s': elapsed,
+            'requests_per_s': requests / elapsed if elapsed else 0.0,
+            'counters': counters,
+            'histograms': histograms,
+            'cache_hit_ratio': self._hit_ratios(counters),
+        }
+
+    @staticmethod
+    def _hit_ratios(counters: Dict[str, float]) -> Dict[str, float]:
+        totals: Dict[str, Tuple[float, float]] = {}
+        for key, value in counters.items():
+            if not key.startswith('cache{'):
+                continue
+            labels = dict(part.split('=', 1) for part in key[len('cache{'):-1].split(','))
+            hits, total = totals.get(labels['cache'], (0, 0))
+            totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+        return {cache: hits / total for cache, (hits, total) in totals.items() if total}
+
+    def summary_line(self) -> str:
+        """One-line digest for progress output"""
+        snap = self.snapshot()
+        counters = snap['counters']
+        requests = sum(v for k, v in counters.items() if k.startswith('requests{'))
+        retries = sum(v for k, v in counters.items() if k.startswith('retries{'))
+        backoff = sum(v for k, v in counters.items() if k.startswith('backoff_s{'))
+        mb = sum(v for k, v in counters.items() if k.startswith('bytes{')) / 1024 / 1024
+        return (f"{requests:.0f} requests ({snap['requests_per_s']:.1f}/s), {mb:.1f} MB, "
+                f"{retries:.0f} retries, {backoff:.1f}s backoff")
+
+    def dump(self, path: str = METRICS_FILE) -> Dict:
+        """Write the snapshot as a JSON report"""
+        snap = self.snapshot()
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snap, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return snap
+
+class Reporter:
+    """Background thread dumping metrics to a file every `interval` seconds"""
+
+    def __init__(self, registry: Metrics, path: str, interval: float):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.registry.dump(self.path)
+
+    def start(self) -> 'Reporter':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop and write the final report"""
+        self._stop.set()
+        self._thread.join()
+        self.registry.dump(self.path)
+
+metrics = Metrics()
+
+def start_reporter(path: str = METRICS_FILE, interval: float = 30.0, registry: Optional[Metrics] = None) -> Reporter:
+    """Periodically dump `registry` (default: the fetch-layer metrics) to `path`"""
+    return Reporter(registry or metrics, path, interval).start()
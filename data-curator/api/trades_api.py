@@ -4,6 +4,9 @@ import pandas as pd
 import time
 from typing import Dict, List, Optional
 
+from api.json_stream import CHUNK_SIZE, iter_array_records, records_to_columns
+from api.telemetry import metrics
+
 # UN Comtrade API endpoint
 COMTRADE_BASE = "https://comtradeapi.un.org/data/v1/get"
 
@@ -24,17 +27,28 @@ def fetch_bilateral_trade(reporter: int, partner: int, year: int) -> pd.DataFram
     print(f"Fetching trade data: {reporter} <-> {partner}, {year}")
     
     try:
-        r = requests.get(url, params=params, timeout=30)
-        r.raise_for_status()
-        data = r.json()
+        # Stream the body: records are parsed column by column as they arrive
+        start = time.perf_counter()
+        with requests.get(url, params=params, timeout=30, stream=True) as r:
+            metrics.record_request(url, r.status_code, time.perf_counter() - start)
+            r.raise_for_status()
+            nbytes = 0
+            def counted(chunks):
+                nonlocal nbytes
+                for chunk in chunks:
+                    nbytes += len(chunk)
+                    yield chunk
+            columns = records_to_columns(iter_array_records(counted(r.iter_content(CHUNK_SIZE))))
+        metrics.record_stream(url, nbytes, time.perf_counter() - start, len(next(iter(columns.values()), [])))
         
-        if 'data' in data:
-            return pd.DataFrame(data['data'])
+        if columns:
+            return pd.DataFrame(columns)
         else:
             print(f"No trade data found for {reporter} <-> {partner}, {year}")
             return pd.DataFrame()
             
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
+        metrics.record_error(url, e)
         print(f"Error fetching trade data: {e}")
         return pd.DataFrame()
     
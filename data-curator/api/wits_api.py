@@ -1,17 +1,343 @@
 # wits_api.py
 import requests
+import os
+import threading
 import time
 import json
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+
+import pandas as pd
+
+from api.columnar import ColumnarBatch
+from api.endpoint_health import HealthRegistry
+from api.telemetry import metrics
+from api.json_stream import CHUNK_SIZE, project
+from api.sdmx_formats import FORMAT_QUERY, JSON, FormatError, FormatSelector, iter_records
+from api.wits_catalogs import CATALOG_DIR, CATALOGS, MAX_AGE, CatalogCache
 
 # WITS API Base URLs - Updated based on actual API structure
 TARIFF_BASE = "https://wits.worldbank.org/API/V1/SDMX/V21/datasource/TRN"
 TRADE_BASE = "https://wits.worldbank.org/API/V1/SDMX/V21/datasource/TMF"
 
+# Path under the base URL for one query ({reporter}, {partner}, {product}, {year} may be ';'-lists)
+TARIFF_PATH = "/reporter/{reporter}/partner/{partner}/product/{product}/year/{year}/datatype/reported"
+TRADE_PATH = "/reporter/{reporter}/partner/{partner}/product/{product}/year/{year}"
+
+# Candidate (base, path) URL structures probed by discover_endpoints, relative to the SDMX root
+ENDPOINT_CANDIDATES = {
+    "TRN": [
+        ("/datasource/TRN", TARIFF_PATH),
+        ("/datasource/TRN", TRADE_PATH),
+        ("/rest/data/TRN", TRADE_PATH),
+        ("/rest/data/TRN", "/{reporter}/{partner}/{product}/{year}"),
+    ],
+    "TMF": [
+        ("/datasource/TMF", TRADE_PATH),
+        ("/rest/data/TMF", TRADE_PATH),
+        ("/rest/data/TMF", "/{reporter}/{partner}/{product}/{year}"),
+    ],
+}
+ENDPOINTS_FILE = "data/raw/wits_endpoints.json"
+
+# Concurrent requests issued by the batch fetchers
+MAX_WORKERS = 8
+REQUEST_TIMEOUT = 30
+RATE_LIMIT_WAIT = 5
+
+TARIFF_DATASET = "TRN"
+TRADE_DATASET = "TMF"
+
+# Response format: "auto" picks the smallest supported one per dataset,
+# or pin one of sdmx_formats.FORMAT_QUERY ("json", "xml", "csv")
+AUTO = "auto"
+RESPONSE_FORMAT = AUTO
+format_selector = FormatSelector()
+
+# (reporter, partner, product, year)
+Cell = Tuple[int, int, str, int]
+
+# Response fields read into TariffData / TradeData (the rest are dropped while streaming)
+TARIFF_RECORD_FIELDS = ('SimpleAverage', 'MinRate', 'MaxRate', 'TariffType',
+                        'TotalNoOfLines', 'Nbr_MFN_Lines', 'Nbr_Pref_Lines', 'Nbr_NA_Lines')
+TRADE_RECORD_FIELDS = ('TradeValue', 'Quantity', 'Unit')
+
+# Pooled keep-alive connections shared by all fetchers
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS * 2))
+
+class InflightRequests:
+    """
+    Coalesces identical in-flight requests: the first caller for a key runs the
+    request, concurrent callers for the same key wait for and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def run(self, key: str, fn: Callable):
+        with self._lock:
+            future = self._calls.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._calls[key] = future
+
+        metrics.record_cache('inflight', hit=not owner)
+        if not owner:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+_inflight = InflightRequests()
+
+# Circuit breaker + adaptive concurrency ceiling per endpoint
+endpoint_health = HealthRegistry(MAX_WORKERS)
+
+def _timed_get(url: str, stream: bool) -> requests.Response:
+    """GET on the pooled session, recording status and time to response headers"""
+    start = time.perf_counter()
+    try:
+        response = _session.get(url, timeout=REQUEST_TIMEOUT, stream=stream)
+    except requests.exceptions.RequestException as e:
+        metrics.record_error(url, e)
+        raise
+    metrics.record_request(url, response.status_code, time.perf_counter() - start)
+    return response
+
+def _http_get(url: str, stream: bool = False) -> requests.Response:
+    """
+    Single GET on the pooled session (403 = WITS rate limit, retried once after a pause)
+    Runs within the endpoint's concurrency ceiling; raises CircuitOpenError without
+    sending anything while the endpoint's circuit is open
+    """
+    health = endpoint_health.get(url)
+    with health.slot():
+        try:
+            response = _timed_get(url, stream)
+            
+            # Handle rate limiting
+            if response.status_code == 403:
+                response.close()
+                health.record_rate_limited()
+                print(f"  Rate limited, waiting {RATE_LIMIT_WAIT} seconds...")
+                time.sleep(RATE_LIMIT_WAIT)
+                metrics.record_backoff(url, RATE_LIMIT_WAIT)
+                response = _timed_get(url, stream)
+        except requests.exceptions.RequestException:
+            health.record_exception()
+            raise
+    
+    health.record_status(response.status_code)
+    response.raise_for_status()
+    return response
+
+def _get_json(url: str) -> Dict:
+    """GET a URL and decode JSON, sharing the response with concurrent identical requests"""
+    def get():
+        start = time.perf_counter()
+        response = _http_get(url)
+        data = response.json()
+        metrics.record_stream(url, len(response.content), time.perf_counter() - start)
+        return data
+    return _inflight.run(url, get)
+
+def _iter_records(url: str, fields: Optional[Sequence[str]] = None,
+                  fmt: str = JSON, dataset: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream the records of a response as they download
+    Only `fields` of each record are kept (all when None); the connection is
+    released when the iterator is exhausted or closed. Bytes read and records
+    seen are reported to the format selector.
+    """
+    start = time.perf_counter()
+    response = _http_get(url, stream=True)
+    nbytes = 0
+    count = 0
+
+    def counted(chunks):
+        nonlocal nbytes
+        for chunk in chunks:
+            nbytes += len(chunk)
+            yield chunk
+
+    try:
+        for record in project(iter_records(counted(response.iter_content(CHUNK_SIZE)), fmt, dataset), fields):
+            count += 1
+            yield record
+    finally:
+        response.close()
+        metrics.record_stream(url, nbytes, time.perf_counter() - start, count)
+        if dataset is not None:
+            format_selector.observe(dataset, fmt, nbytes, count)
+
+def response_format(dataset: str) -> str:
+    """Format to request for a dataset (RESPONSE_FORMAT, or the selector's pick when "auto")"""
+    return format_selector.choose(dataset) if RESPONSE_FORMAT == AUTO else RESPONSE_FORMAT
+
+def _fetch_records(dataset: str, make_url: Callable[[str], str],
+                   fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """
+    Stream records for a query in the chosen response format
+    `make_url(fmt)` builds the URL; in auto mode a format the server rejects
+    (wrong body or 400/406/415) is dropped for the dataset and the query re-sent.
+    A non-JSON response without records is not trusted as "no data" until that
+    format has returned records for the dataset: the query is re-sent as JSON,
+    and the format is dropped if JSON does have records.
+    """
+    while True:
+        fmt = response_format(dataset)
+        records = _iter_records(make_url(fmt), fields, fmt, dataset)
+        try:
+            first = next(records, None)
+        except (FormatError, requests.exceptions.HTTPError) as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            rejected = isinstance(e, FormatError) or status in (400, 406, 415)
+            if RESPONSE_FORMAT != AUTO or fmt == JSON or not rejected:
+                raise
+            print(f"  {dataset} does not support {fmt} responses, falling back")
+            format_selector.mark_unsupported(dataset, fmt)
+            continue
+        break
+
+    if (first is None and RESPONSE_FORMAT == AUTO and fmt != JSON
+            and not format_selector.is_proven(dataset, fmt)):
+        # An XML body without <Obs> or a CSV body the parser can't read also gives 0 records
+        records.close()
+        records = _iter_records(make_url(JSON), fields, JSON, dataset)
+        first = next(records, None)
+        if first is None:
+            format_selector.observe_empty(dataset, fmt)
+        else:
+            print(f"  {dataset} {fmt} response had no records where JSON has data, falling back")
+            format_selector.mark_unsupported(dataset, fmt)
+
+    if first is None:
+        return
+    try:
+        yield first
+        yield from records
+    finally:
+        records.close()
+
+def _first_record(dataset: str, make_url: Callable[[str], str],
+                  fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+    """
+    First record of a response (None if empty), shared with concurrent identical requests
+    The body is only read up to the end of that record
+    """
+    def first():
+        records = _fetch_records(dataset, make_url, fields)
+        try:
+            return next(records, None)
+        finally:
+            records.close()
+    return _inflight.run(f"{make_url(JSON)}#first", first)
+
+def tariff_url(reporter, partner, product, year, fmt: str = JSON) -> str:
+    """WITS TRN (tariff) URL for one cell (or ';'-joined dimension values)"""
+    path = TARIFF_PATH.format(reporter=reporter, partner=partner, product=product, year=year)
+    return f"{TARIFF_BASE}{path}{FORMAT_QUERY[fmt]}"
+
+def trade_url(reporter, partner, product, year, fmt: str = JSON) -> str:
+    """WITS TMF (trade) URL for one cell (or ';'-joined dimension values)"""
+    path = TRADE_PATH.format(reporter=reporter, partner=partner, product=product, year=year)
+    return f"{TRADE_BASE}{path}{FORMAT_QUERY[fmt]}"
+
+def _sdmx_root() -> str:
+    return TARIFF_BASE.rsplit('/datasource/', 1)[0].rsplit('/rest/data/', 1)[0]
+
+def _apply_endpoint(dataset: str, base: str, path: str):
+    global TARIFF_BASE, TARIFF_PATH, TRADE_BASE, TRADE_PATH
+    if dataset == TARIFF_DATASET:
+        TARIFF_BASE, TARIFF_PATH = base, path
+    else:
+        TRADE_BASE, TRADE_PATH = base, path
+
+def discover_endpoints(probe_cell: Cell = (840, 156, "020110", 2022), timeout: float = 10,
+                       cache_file: Optional[str] = ENDPOINTS_FILE, force: bool = False) -> Dict[str, Dict]:
+    """
+    Find the working URL structure of each dataset and use it for all fetches
+
+    All candidate structures are probed concurrently (one request each, first
+    200 in candidate order wins) and the winners are cached in `cache_file`,
+    so later runs skip the probing entirely.
+
+    Returns:
+        dataset -> {"base", "path"} for the datasets a structure was found for
+    """
+    cached = {}
+    if cache_file and not force and os.path.exists(cache_file):
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+    root = _sdmx_root()
+
+    def probe(candidate):
+        dataset, base, path = candidate
+        reporter, partner, product, year = probe_cell
+        url = f"{root}{base}{path.format(reporter=reporter, partner=partner, product=product, year=year)}?format=JSON"
+        start = time.perf_counter()
+        try:
+            response = _session.get(url, timeout=timeout)
+            metrics.record_request(url, response.status_code, time.perf_counter() - start)
+            return candidate, response.status_code == 200
+        except requests.exceptions.RequestException as e:
+            metrics.record_error(url, e)
+            return candidate, False
+
+    candidates = [(dataset, base, path) for dataset, options in ENDPOINT_CANDIDATES.items()
+                  if dataset not in cached for base, path in options]
+    found = dict(cached)
+    if candidates:
+        print(f"🔎 Probing {len(candidates)} WITS endpoint structures...")
+        with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+            results = dict(executor.map(probe, candidates))
+        for candidate in candidates:
+            dataset = candidate[0]
+            if results[candidate] and dataset not in found:
+                found[dataset] = {'base': candidate[1], 'path': candidate[2]}
+                print(f"  ✓ {dataset}: {candidate[1]}{candidate[2]}")
+        if cache_file and found != cached:
+            os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump(found, f, indent=2)
+
+    for dataset, endpoint in found.items():
+        _apply_endpoint(dataset, f"{root}{endpoint['base']}", endpoint['path'])
+    return found
+
+_endpoints_lock = threading.Lock()
+_endpoints_ready = False
+
+def ensure_endpoints(cache_file: Optional[str] = ENDPOINTS_FILE) -> bool:
+    """Run endpoint discovery once per process (from the cache when present)"""
+    global _endpoints_ready
+    with _endpoints_lock:
+        if not _endpoints_ready:
+            discover_endpoints(cache_file=cache_file)
+            _endpoints_ready = True
+        return _endpoints_ready
+
+# Slotted records: no per-instance __dict__, so large fetches hold far less memory
+
 @dataclass
 class TariffData:
     """Clean tariff data structure"""
+    __slots__ = ('reporter', 'partner', 'product', 'year', 'simple_average', 'min_rate', 'max_rate',
+                 'tariff_type', 'total_lines', 'mfn_lines', 'pref_lines', 'na_lines')
     reporter: int
     partner: int
     product: str
@@ -28,6 +354,7 @@ class TariffData:
 @dataclass
 class TradeData:
     """Clean trade data structure"""
+    __slots__ = ('reporter', 'partner', 'product', 'year', 'trade_value_usd', 'quantity', 'unit')
     reporter: int
     partner: int
     product: str
@@ -36,44 +363,51 @@ class TradeData:
     quantity: float
     unit: str
 
+def tariff_from_record(tariff_info: Dict, cell: Cell) -> TariffData:
+    """Build a TariffData from one record of a WITS TRN response"""
+    reporter, partner, product, year = cell
+    return TariffData(
+        reporter=reporter,
+        partner=partner,
+        product=product,
+        year=year,
+        simple_average=float(tariff_info.get('SimpleAverage', 0)),
+        min_rate=float(tariff_info.get('MinRate', 0)),
+        max_rate=float(tariff_info.get('MaxRate', 0)),
+        tariff_type=tariff_info.get('TariffType', 'Unknown'),
+        total_lines=int(tariff_info.get('TotalNoOfLines', 0)),
+        mfn_lines=int(tariff_info.get('Nbr_MFN_Lines', 0)),
+        pref_lines=int(tariff_info.get('Nbr_Pref_Lines', 0)),
+        na_lines=int(tariff_info.get('Nbr_NA_Lines', 0))
+    )
+
+def trade_from_record(trade_info: Dict, cell: Cell) -> TradeData:
+    """Build a TradeData from one record of a WITS TMF response"""
+    reporter, partner, product, year = cell
+    return TradeData(
+        reporter=reporter,
+        partner=partner,
+        product=product,
+        year=year,
+        trade_value_usd=float(trade_info.get('TradeValue', 0)) * 1000,  # Convert from 1000 USD
+        quantity=float(trade_info.get('Quantity', 0)),
+        unit=trade_info.get('Unit', 'Unknown')
+    )
+
 def fetch_tariff_data(reporter: int, partner: int, product: str, year: int) -> Optional[TariffData]:
     """
     Fetch tariff data from WITS TRN endpoint
     Returns clean TariffData object or None if failed
     """
-    url = f"{TARIFF_BASE}/reporter/{reporter}/partner/{partner}/product/{product}/year/{year}/datatype/reported?format=JSON"
     print(f"Fetching tariff: {reporter}->{partner}, HS:{product}, {year}")
     
     try:
-        response = requests.get(url, timeout=30)
-        
-        # Handle rate limiting
-        if response.status_code == 403:
-            print(f"  Rate limited, waiting 5 seconds...")
-            time.sleep(5)
-            response = requests.get(url, timeout=30)
+        # First (and usually only) record, parsed as the response streams in
+        tariff_info = _first_record(TARIFF_DATASET, lambda fmt: tariff_url(reporter, partner, product, year, fmt),
+                                    TARIFF_RECORD_FIELDS)
         
-        response.raise_for_status()
-        data = response.json()
-        
-        # Extract tariff data from WITS response
-        if 'data' in data and data['data']:
-            tariff_info = data['data'][0]  # First (and usually only) record
-            
-            return TariffData(
-                reporter=reporter,
-                partner=partner,
-                product=product,
-                year=year,
-                simple_average=float(tariff_info.get('SimpleAverage', 0)),
-                min_rate=float(tariff_info.get('MinRate', 0)),
-                max_rate=float(tariff_info.get('MaxRate', 0)),
-                tariff_type=tariff_info.get('TariffType', 'Unknown'),
-                total_lines=int(tariff_info.get('TotalNoOfLines', 0)),
-                mfn_lines=int(tariff_info.get('Nbr_MFN_Lines', 0)),
-                pref_lines=int(tariff_info.get('Nbr_Pref_Lines', 0)),
-                na_lines=int(tariff_info.get('Nbr_NA_Lines', 0))
-            )
+        if tariff_info:
+            return tariff_from_record(tariff_info, (reporter, partner, product, year))
         else:
             print(f"  No tariff data found for {reporter}->{partner}, HS:{product}, {year}")
             return None
@@ -93,34 +427,15 @@ def fetch_trade_data(reporter: int, partner: int, product: str, year: int) -> Op
     Fetch trade data from WITS TMF endpoint
     Returns clean TradeData object or None if failed
     """
-    url = f"{TRADE_BASE}/reporter/{reporter}/partner/{partner}/product/{product}/year/{year}?format=JSON"
     print(f"Fetching trade: {reporter}->{partner}, HS:{product}, {year}")
     
     try:
-        response = requests.get(url, timeout=30)
-        
-        # Handle rate limiting
-        if response.status_code == 403:
-            print(f"  Rate limited, waiting 5 seconds...")
-            time.sleep(5)
-            response = requests.get(url, timeout=30)
+        # First (and usually only) record, parsed as the response streams in
+        trade_info = _first_record(TRADE_DATASET, lambda fmt: trade_url(reporter, partner, product, year, fmt),
+                                   TRADE_RECORD_FIELDS)
         
-        response.raise_for_status()
-        data = response.json()
-        
-        # Extract trade data from WITS response
-        if 'data' in data and data['data']:
-            trade_info = data['data'][0]  # First (and usually only) record
-            
-            return TradeData(
-                reporter=reporter,
-                partner=partner,
-                product=product,
-                year=year,
-                trade_value_usd=float(trade_info.get('TradeValue', 0)) * 1000,  # Convert from 1000 USD
-                quantity=float(trade_info.get('Quantity', 0)),
-                unit=trade_info.get('Unit', 'Unknown')
-            )
+        if trade_info:
+            return trade_from_record(trade_info, (reporter, partner, product, year))
         else:
             print(f"  No trade data found for {reporter}->{partner}, HS:{product}, {year}")
             return None
@@ -135,17 +450,16 @@ def fetch_trade_data(reporter: int, partner: int, product: str, year: int) -> Op
     # Rate limiting between calls
     time.sleep(0.5)
 
-def fetch_combined_data(reporter: int, partner: int, product: str, year: int) -> Optional[Dict]:
+def combine_records(cell: Cell, tariff_data: Optional[TariffData], trade_data: Optional[TradeData]) -> Optional[Dict]:
     """
-    Fetch both tariff and trade data and combine them
-    Returns merged dict or None if both failed
+    Merge the tariff and trade legs of one cell into a flat record
+    Returns None if both legs are missing
     """
-    tariff_data = fetch_tariff_data(reporter, partner, product, year)
-    trade_data = fetch_trade_data(reporter, partner, product, year)
-    
     if not tariff_data and not trade_data:
         return None
     
+    reporter, partner, product, year = cell
+    
     # Combine the data
     combined = {
         "reporter": reporter,
@@ -175,6 +489,148 @@ def fetch_combined_data(reporter: int, partner: int, product: str, year: int) ->
     
     return combined
 
+def _fetch_legs(cells: Sequence[Cell], max_workers: int) -> Dict[Cell, Tuple[Optional[TariffData], Optional[TradeData]]]:
+    """Fetch both legs of every distinct cell concurrently: cell -> (tariff, trade)"""
+    unique_cells = list(dict.fromkeys(tuple(cell) for cell in cells))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tariff_futures = {cell: executor.submit(fetch_tariff_data, *cell) for cell in unique_cells}
+        trade_futures = {cell: executor.submit(fetch_trade_data, *cell) for cell in unique_cells}
+        return {cell: (tariff_futures[cell].result(), trade_futures[cell].result()) for cell in unique_cells}
+
+def fetch_combined_batch(cells: Sequence[Cell], max_workers: int = MAX_WORKERS) -> List[Optional[Dict]]:
+    """
+    Fetch tariff and trade data for many cells concurrently
+    
+    Both legs of every cell are issued at the same time, duplicate cells are
+    fetched once, and identical requests already in flight from other callers
+    are shared. Returns one combined record (or None) per input cell, in order.
+    """
+    legs = _fetch_legs(cells, max_workers)
+    records = {cell: combine_records(cell, *pair) for cell, pair in legs.items()}
+    return [records[tuple(cell)] for cell in cells]
+
+def fetch_combined_columnar(cells: Sequence[Cell], max_workers: int = MAX_WORKERS,
+                            batch: Optional[ColumnarBatch] = None) -> ColumnarBatch:
+    """
+    Like fetch_combined_batch, but appends each distinct cell's legs straight into
+    a ColumnarBatch (no per-cell dicts); cells with no data are skipped
+    """
+    batch = batch if batch is not None else ColumnarBatch(capacity=max(len(cells), 1))
+    for cell, (tariff_data, trade_data) in _fetch_legs(cells, max_workers).items():
+        batch.append(cell, tariff_data, trade_data)
+    return batch
+
+def fetch_cell_record(cell: Cell) -> Optional[Dict]:
+    """
+    Fetch one combined cell without swallowing errors (for job runners)
+    Both legs are requested concurrently, as in _fetch_legs. Returns None when
+    WITS has no data for either leg; raises requests.RequestException /
+    ValueError when a request or parse fails
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        tariff_future = executor.submit(_first_record, TARIFF_DATASET,
+                                        lambda fmt: tariff_url(*cell, fmt), TARIFF_RECORD_FIELDS)
+        trade_future = executor.submit(_first_record, TRADE_DATASET,
+                                       lambda fmt: trade_url(*cell, fmt), TRADE_RECORD_FIELDS)
+        # result() re-raises a failed leg's error
+        tariff_record, trade_record = tariff_future.result(), trade_future.result()
+    
+    tariff_data = tariff_from_record(tariff_record, cell) if tariff_record else None
+    trade_data = trade_from_record(trade_record, cell) if trade_record else None
+    return combine_records(cell, tariff_data, trade_data)
+
+def fetch_combined_data(reporter: int, partner: int, product: str, year: int) -> Optional[Dict]:
+    """
+    Fetch both tariff and trade data and combine them
+    The two requests run concurrently, so latency is that of the slower one
+    Returns merged dict or None if both failed
+    """
+    return fetch_combined_batch([(reporter, partner, product, year)], max_workers=2)[0]
+
+class WitsApi:
+    """
+    WITS metadata client with locally cached catalogs
+
+    Catalogs (products, countries, nomenclatures) are downloaded at most once
+    per cache max-age into versioned files under data/raw/wits_catalogs and
+    loaded lazily, once per client, as compact tables indexed by code:
+
+        api = WitsApi()
+        api.product_name("8507")    # 'Electric accumulators...'
+        api.country("CHN")          # row of the countries catalog
+    """
+
+    def __init__(self, cache_dir: str = CATALOG_DIR, max_age: float = MAX_AGE,
+                 session: Optional[requests.Session] = None):
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session = session
+        self.catalogs = CatalogCache(cache_dir, max_age, session=session)
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, name: str) -> pd.DataFrame:
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = self.catalogs.load(name)
+            return self._tables[name]
+
+    def refresh(self, force: bool = False) -> Dict[str, str]:
+        """Revalidate every catalog; returns name -> version"""
+        with self._lock:
+            self._tables.clear()
+        return {name: self.catalogs.refresh(name, force=force) for name in CATALOGS}
+
+    def get_products(self) -> pd.DataFrame:
+        """Product catalog (productcode, productdescription, ...)"""
+        return self._table('products')
+
+    def get_countries(self) -> pd.DataFrame:
+        """Country catalog (countrycode, iso3code, name, isreporter, ispartner, ...)"""
+        return self._table('countries')
+
+    def get_reporters(self) -> pd.DataFrame:
+        """Countries WITS has tariff data for as reporters"""
+        return self._flagged('isreporter')
+
+    def get_partners(self) -> pd.DataFrame:
+        """Countries usable as partners"""
+        return self._flagged('ispartner')
+
+    def get_nomenclatures(self) -> pd.DataFrame:
+        """Nomenclature catalog (nomenclaturecode, description, ...)"""
+        return self._table('nomenclatures')
+
+    def _flagged(self, flag: str) -> pd.DataFrame:
+        countries = self.get_countries()
+        if flag not in countries.columns:
+            return countries
+        return countries[countries[flag].astype(str).isin(['1', 'Yes', 'yes', 'true', 'True'])]
+
+    def product_name(self, code: str) -> Optional[str]:
+        """Description of an HS product code (None if unknown)"""
+        products = self.get_products()
+        code = str(code)
+        if code not in products.index or 'productdescription' not in products.columns:
+            return None
+        value = products.loc[code, 'productdescription']
+        return str(value.iloc[0] if isinstance(value, pd.Series) else value)
+
+    def country(self, code) -> Optional[pd.Series]:
+        """Country row by numeric code (e.g. 156 or "156") or ISO3 code (e.g. "CHN")"""
+        countries = self.get_countries()
+        code = str(code).strip()
+        for candidate in (code, code.zfill(3)):
+            if candidate in countries.index:
+                return countries.loc[[candidate]].iloc[0]
+        if 'iso3code' in countries.columns:
+            matches = countries[countries['iso3code'].astype(str).str.upper() == code.upper()]
+            if len(matches):
+                return matches.iloc[0]
+        return None
+
 # Legacy functions for backward compatibility
 def fetch_country_tariffs(reporter: int, year: int) -> Dict:
     """Legacy function - not recommended"""
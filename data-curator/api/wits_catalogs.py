@@ -0,0 +1,169 @@
+# wits_catalogs.py
+"""
+Locally cached WITS metadata catalogs (products, countries, nomenclatures).
+
+WITS publishes its reference lists as multi-MB XML documents. A CatalogCache
+downloads each one at most once per `max_age` (and then only with a
+conditional GET), parses it while it streams, and stores it as a compact CSV
+under a versioned manifest:
+
+    data/raw/wits_catalogs/
+        catalogs.json        # name -> version, fetched_at, rows, validators
+        products.csv
+        countries.csv
+        nomenclatures.csv
+
+The version of a catalog is a hash of its parsed content, so a re-download
+with identical content keeps the version (and leaves the file untouched).
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+import requests
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from api.conditional_fetch import conditional_get, write_if_changed
+from api.json_stream import CHUNK_SIZE
+from api.telemetry import metrics
+
+CATALOG_DIR = "data/raw/wits_catalogs"
+MANIFEST_FILE = "catalogs.json"
+METADATA_BASE = "https://wits.worldbank.org/API/V1/wits/datasource/trn"
+
+# Refresh catalogs older than this (seconds); WITS updates them a few times a year
+MAX_AGE = 30 * 24 * 3600
+
+# name -> (URL path under METADATA_BASE, XML element of one item, code column)
+CATALOGS = {
+    'products': ('product/ALL', 'product', 'productcode'),
+    'countries': ('country/ALL', 'country', 'countrycode'),
+    'nomenclatures': ('nomenclature/ALL', 'nomenclature', 'nomenclaturecode'),
+}
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1].lower()
+
+def iter_catalog_items(chunks: Iterable[bytes], item: str) -> Iterator[Dict[str, str]]:
+    """
+    Stream the <item> elements of a WITS metadata document as flat dicts
+
+    Attributes and child element text become lower-case keys
+    (e.g. productcode, productdescription, iso3code, name).
+    """
+    parser = XMLPullParser(events=('end',))
+    item = item.lower()
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if _local(element.tag) != item:
+                    continue
+                record = {_local(key): value.strip() for key, value in element.attrib.items()}
+                for child in element:
+                    if child.text and child.text.strip():
+                        record[_local(child.tag)] = child.text.strip()
+                element.clear()
+                yield record
+        parser.close()
+    except ParseError as e:
+        raise ValueError(f"Malformed WITS metadata: {e}")
+
+def compact_table(df: pd.DataFrame, code_column: Optional[str] = None) -> pd.DataFrame:
+    """Low-cardinality text columns as categoricals, indexed by the code column"""
+    for col in df.columns:
+        if col != code_column and df[col].nunique() <= max(len(df) // 2, 1):
+            df[col] = df[col].astype('category')
+    if code_column and code_column in df.columns:
+        df = df.set_index(code_column, drop=False).sort_index()
+        df.index.name = None
+    return df
+
+class CatalogCache:
+    """Versioned on-disk cache of WITS metadata catalogs"""
+
+    def __init__(self, cache_dir: str = CATALOG_DIR, max_age: float = MAX_AGE,
+                 base_url: Optional[str] = None, session: Optional[requests.Session] = None):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.base_url = base_url
+        self.session = session
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, MANIFEST_FILE)
+
+    def manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict]):
+        write_if_changed(self.manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.csv")
+
+    def version(self, name: str) -> Optional[str]:
+        return self.manifest().get(name, {}).get('version')
+
+    def is_fresh(self, name: str) -> bool:
+        entry = self.manifest().get(name)
+        return bool(entry) and os.path.exists(self.path(name)) and \
+            time.time() - entry.get('fetched_at', 0) < self.max_age
+
+    def refresh(self, name: str, force: bool = False) -> str:
+        """
+        Make sure the cached catalog is current; returns its version
+
+        Fresh caches are used as-is; stale ones are revalidated with a conditional
+        GET and only rewritten when the content changed.
+        """
+        fresh = not force and self.is_fresh(name)
+        metrics.record_cache('catalog', hit=fresh)
+        if fresh:
+            return self.version(name)
+
+        path, item, code_column = CATALOGS[name]
+        url = f"{self.base_url or METADATA_BASE}/{path}"
+        manifest = self.manifest()
+        entry = manifest.get(name, {})
+        state = {url: entry} if not force else {}
+
+        print(f"📥 Refreshing WITS {name} catalog...")
+        response = conditional_get(url, state, outputs=[self.path(name)], session=self.session)
+        if response is None:
+            print(f"  ✓ {name} unchanged (version {entry.get('version')})")
+        else:
+            with response:
+                df = pd.DataFrame(list(iter_catalog_items(response.iter_content(CHUNK_SIZE), item)))
+            if code_column in df.columns:
+                df = df.sort_values(code_column, kind='stable')
+            data = df.to_csv(index=False).encode('utf-8')
+            version = hashlib.sha256(data).hexdigest()[:12]
+            write_if_changed(self.path(name), data)
+            entry = {
+                'version': version,
+                'rows': len(df),
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            print(f"  ✓ {name}: {len(df):,} rows (version {version})")
+
+        entry['fetched_at'] = time.time()
+        manifest[name] = entry
+        self._save_manifest(manifest)
+        return entry['version']
+
+    def load(self, name: str) -> pd.DataFrame:
+        """Refresh if needed and load a catalog as a compact table indexed by its code"""
+        self.refresh(name)
+        code_column = CATALOGS[name][2]
+        df = pd.read_csv(self.path(name), dtype=str, keep_default_na=False)
+        return compact_table(df, code_column)
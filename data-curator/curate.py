@@ -1,15 +1,22 @@
 # curate.py
+import argparse
 import os
 import pandas as pd
-from utils.data_cleaner import clean_tariff_data, clean_trade_data, validate_merged_data
+from utils.data_cleaner import clean_tariff_data, clean_trade_data, validate_merged_data, ENGINES, LEGACY_ENGINE
+from utils.publish import publish_outputs
+from utils.sketches import sketch_document, MERGED_SKETCH_FILE
+from utils.quality import check_quality, merged_rules, load_hs4_codes, MERGED_QUALITY_FILE
 
 # Set output directory
 OUTDIR = "data/processed"
 os.makedirs(OUTDIR, exist_ok=True)
 
-def main():
+def main(engine: str = LEGACY_ENGINE):
     """
     Main function to clean and merge tariff and trade data
+    
+    Args:
+        engine: HS4 normalization engine ("legacy" or "fast"; outputs are identical)
     """
     print("🚀 Starting data curation pipeline...")
     print("This will clean and merge tariff and trade CSV files by HS4 product code")
@@ -20,7 +27,7 @@ def main():
     
     # Step 1: Clean tariff data
     print("\n📊 Step 1: Cleaning tariff data...")
-    tariffs = clean_tariff_data(tariff_file)
+    tariffs = clean_tariff_data(tariff_file, engine)
     
     if tariffs.empty:
         print("❌ Failed to clean tariff data. Exiting.")
@@ -28,7 +35,7 @@ def main():
     
     # Step 2: Clean trade data
     print("\n📊 Step 2: Cleaning trade data...")
-    trades = clean_trade_data(trade_file)
+    trades = clean_trade_data(trade_file, engine)
     
     if trades.empty:
         print("❌ Failed to clean trade data. Exiting.")
@@ -51,13 +58,20 @@ def main():
     # Step 4: Validate the merged data
     print("\n🔍 Step 4: Validating merged data...")
     validation_results = validate_merged_data(merged)
+    quality_report = check_quality(merged, merged_rules(load_hs4_codes(os.path.join(OUTDIR, "hs_dictionary.json"))),
+                                   "merged dataset")
     
-    # Step 5: Save the merged dataset
-    print("\n💾 Step 5: Saving merged dataset...")
+    # Step 5: Publish the merged dataset as a new version
+    print("\n💾 Step 5: Publishing merged dataset...")
     output_file = os.path.join(OUTDIR, "merged_summary.csv")
-    merged.to_csv(output_file, index=False)
+    version = publish_outputs({
+        "merged_summary.csv": merged,
+        MERGED_SKETCH_FILE: sketch_document(merged),
+        MERGED_QUALITY_FILE: quality_report,
+    }, root=OUTDIR)
     
     print(f"✅ Saved merged dataset with shape: {merged.shape}")
+    print(f"🏷️  Version: {version}")
     print(f"📁 Output file: {output_file}")
     
     # Print final summary
@@ -77,4 +91,7 @@ def main():
     return merged
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Clean and merge the tariff and trade extracts")
+    parser.add_argument('--engine', choices=ENGINES, default=LEGACY_ENGINE,
+                        help='HS4 normalization implementation (outputs are identical)')
+    main(parser.parse_args().engine)
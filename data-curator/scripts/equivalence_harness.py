@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Equivalence harness for the pipeline engines.
+
+Runs every stage with the legacy and the fast engine on the real extracts in
+data/raw (when present) and on synthetic scale-ups, diffs the outputs and
+reports per-engine timings. Exits non-zero when any output differs, so it can
+gate performance changes:
+
+    python scripts/equivalence_harness.py --scale 1 2 --repeat 3 --output harness.json
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add the data-curator directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.equivalence import run_suite
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff the legacy and fast pipeline engines")
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 2],
+                        help='Partner scale-up factors of the synthetic extract')
+    parser.add_argument('--products', type=int, default=150, help='Synthetic HS4 products')
+    parser.add_argument('--partners', type=int, default=60, help='Synthetic partners (before scale-up)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per engine and stage (best time kept)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-raw', action='store_true', help='Skip the data/raw extracts')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    print(f"🚀 Engine equivalence harness: scales {args.scale}, repeat {args.repeat}")
+    report = run_suite(args.scale, args.products, args.partners, args.repeat, args.seed,
+                       include_raw=not args.no_raw)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"💾 Report saved to: {args.output}")
+
+    if report['equal']:
+        print("\n🎉 Legacy and fast engines produce identical outputs")
+    else:
+        print("\n❌ Engine outputs differ, see the mismatches above")
+    return report
+
+if __name__ == "__main__":
+    sys.exit(0 if main()['equal'] else 1)
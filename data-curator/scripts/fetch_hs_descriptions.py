@@ -1,58 +1,80 @@
-import pandas as pd
-import requests
+import csv
 import json
 import os
+import sys
+from typing import Dict, Iterable
+
+import requests
+
+# Add the data-curator directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.conditional_fetch import (conditional_get, load_state, remember, save_state,
+                                   write_if_changed, STATE_FILE)
+from api.json_stream import CHUNK_SIZE
+from api.sdmx_formats import iter_lines
 
-def fetch_and_process_hs_codes():
+# URL of the HS code dataset
+HS_CODES_URL = "https://raw.githubusercontent.com/datasets/harmonized-system-codes/main/data/harmonized-system-codes.csv"
+OUTPUT_PATH = os.path.join('../frontend/public', 'hs4_descriptions.json')
+
+def hs4_descriptions(chunks: Iterable[bytes]) -> Dict[str, str]:
+    """
+    Stream the HS codes CSV into an HS4 -> description mapping
+
+    Codes stay text (no leading zeros lost); HS6 codes are truncated to their
+    first 4 digits and the first description seen for each HS4 wins.
+    """
+    hs4_map = {}
+    for row in csv.DictReader(iter_lines(chunks)):
+        code = (row.get('hscode') or '').replace('.', '').strip()
+        if not code:
+            continue
+        hs4 = code.ljust(6, '0')[:4]
+        hs4_map.setdefault(hs4, row.get('description', ''))
+    return hs4_map
+
+def fetch_and_process_hs_codes(url: str = HS_CODES_URL, output_path: str = OUTPUT_PATH,
+                               state_file: str = STATE_FILE) -> bool:
     """
     Fetches HS code descriptions from a public source, processes them,
     and saves the result as a JSON file.
+
+    The request is conditional (ETag / Last-Modified from the last run), so an
+    unchanged source costs one 304 and no processing; the body is parsed as it
+    streams in and the output is only rewritten when its content changed.
+
+    Returns:
+        True if the output file was (re)written
     """
-    # URL of the HS code dataset
-    url = "https://raw.githubusercontent.com/datasets/harmonized-system-codes/main/data/harmonized-system-codes.csv"
-    
+    state = load_state(state_file)
+
     print("Fetching HS code data...")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        response = conditional_get(url, state, outputs=[output_path])
+        if response is None:
+            print("HS code data not modified since the last refresh, nothing to do.")
+            return False
+
+        print("Processing data...")
+        with response:
+            hs4_map = hs4_descriptions(response.iter_content(CHUNK_SIZE))
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data: {e}")
-        return
-
-    # Save the raw data to a temporary CSV file
-    raw_csv_path = 'temp_hs_codes.csv'
-    with open(raw_csv_path, 'w') as f:
-        f.write(response.text)
-    
-    print("Processing data...")
-    # Read the CSV with pandas
-    df = pd.read_csv(raw_csv_path)
-
-    # Filter for HS4-level codes (where hscode length is 4 or 6, and only keep the first 4 digits)
-    df['hs4'] = df['hscode'].astype(str).str.replace('.', '').str.pad(width=6, side='right', fillchar='0').str[:4]
-    
-    # Keep only the most relevant columns and drop duplicates
-    df_hs4 = df[['hs4', 'description']].drop_duplicates(subset=['hs4'])
-
-    # Create the dictionary for the JSON mapping
-    hs4_map = dict(zip(df_hs4['hs4'], df_hs4['description']))
-
-    # Define the output path
-    output_dir = '../frontend/public'
-    output_path = os.path.join(output_dir, 'hs4_descriptions.json')
-
-    # Ensure the output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Save the mapping as a JSON file
-    print(f"Saving HS4 descriptions to {output_path}...")
-    with open(output_path, 'w') as f:
-        json.dump(hs4_map, f, indent=2)
-    
-    # Clean up the temporary file
-    os.remove(raw_csv_path)
-    
+        return False
+
+    data = json.dumps(hs4_map, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    written = write_if_changed(output_path, data)
+    if written:
+        print(f"Saved {len(hs4_map)} HS4 descriptions to {output_path}")
+    else:
+        print(f"HS4 descriptions unchanged ({len(hs4_map)} codes), kept {output_path}")
+
+    remember(state, url, response)
+    save_state(state, state_file)
+
     print("Processing complete.")
+    return written
 
 if __name__ == "__main__":
     fetch_and_process_hs_codes()
@@ -2,12 +2,10 @@ import json
 import os
 import sys
 
-# Add the project root to the Python path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+# Add the data-curator directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_curator.api.wits_api import WitsApi
+from api.wits_api import WitsApi
 
 def fetch_and_save_product_definitions():
     """
@@ -19,8 +17,8 @@ def fetch_and_save_product_definitions():
 
     print("Fetching product definitions...")
     try:
-        # Fetch the product definitions (this might take a moment)
-        products_df = wits_api.get_products()
+        # Product definitions come from the local catalog cache (downloaded only when stale)
+        products_df = wits_api.get_products().copy()
         
         # Filter for HS4-level codes
         products_df['hs4'] = products_df['productcode'].astype(str).str.replace('.', '').str.pad(width=6, side='right', fillchar='0').str[:4]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Load harness for the fetch layer.
+
+Drives the WITS fetchers against the offline ReplayServer and reports
+throughput, latency percentiles and retry/error behaviour, so concurrency and
+backoff changes can be benchmarked without the network.
+
+    python scripts/load_harness.py --cells 200 --latency 0.05 --rate-limit 40 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Add the data-curator directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.replay_server import ReplayServer
+from api import wits_api
+from api.telemetry import metrics
+from api.wits_api import Cell, fetch_combined_data
+from api.fetch_jobs import grid_cells
+from api.fetch_planner import fetch_planned
+
+def _percentiles(latencies: Sequence[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    values = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(values, 50)),
+        'p90_ms': float(np.percentile(values, 90)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+def run_load(cells: Sequence[Cell], fetch: Callable[[Cell], Optional[Dict]], workers: int) -> Dict:
+    """Fetch every cell with `workers` concurrent callers, timing each call"""
+    latencies: List[float] = []
+    outcomes = {'records': 0, 'empty': 0, 'exceptions': 0}
+
+    def timed(cell):
+        start = time.perf_counter()
+        try:
+            result = fetch(cell)
+            outcome = 'records' if result else 'empty'
+        except Exception:
+            outcome = 'exceptions'
+        return time.perf_counter() - start, outcome
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for latency, outcome in executor.map(timed, cells):
+            latencies.append(latency)
+            outcomes[outcome] += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        'cells': len(cells),
+        'workers': workers,
+        'elapsed_s': elapsed,
+        'cells_per_s': len(cells) / elapsed if elapsed else 0.0,
+        'latency': _percentiles(latencies),
+        **outcomes,
+    }
+
+def run_scenario(cells: Sequence[Cell], mode: str = "combined", workers: int = 8,
+                 latency: float = 0.05, jitter: float = 0.01, rate_limit: Optional[int] = None,
+                 error_rate: float = 0.0, seed: int = 0) -> Dict:
+    """
+    Run one harness scenario against a fresh ReplayServer
+
+    Args:
+        cells: Grid to fetch
+        mode: "combined" (fetch_combined_data per cell) or "planned" (fetch_planned batches)
+        workers: Concurrent callers (combined mode)
+        latency, jitter, rate_limit, error_rate, seed: ReplayServer fault settings
+
+    Returns:
+        Report dict with client timings and server-side request/403/error counts
+    """
+    metrics.reset()
+    with ReplayServer(latency=latency, jitter=jitter, rate_limit=rate_limit,
+                      error_rate=error_rate, seed=seed) as server:
+        with server.patch_fetchers():
+            if mode == "planned":
+                start = time.perf_counter()
+                records = fetch_planned(cells)
+                elapsed = time.perf_counter() - start
+                report = {
+                    'cells': len(cells),
+                    'elapsed_s': elapsed,
+                    'cells_per_s': len(cells) / elapsed if elapsed else 0.0,
+                    'records': sum(1 for r in records.values() if r),
+                }
+            else:
+                report = run_load(cells, lambda cell: fetch_combined_data(*cell), workers)
+
+        server_stats = server.stats()
+
+    report['mode'] = mode
+    report['server'] = server_stats
+    # Each 403 served makes the client pause and retry once
+    report['retries'] = server_stats['rate_limited']
+    # Bytes per record of each response format tried (see wits_api.RESPONSE_FORMAT)
+    report['formats'] = wits_api.format_selector.summary()
+    # Client-side view of the same run (latency/stream histograms, bytes, backoff, cache hits)
+    report['telemetry'] = metrics.snapshot()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch layer against the offline replay server")
+    parser.add_argument('--cells', type=int, default=100, help='Number of grid cells to fetch')
+    parser.add_argument('--mode', choices=['combined', 'planned'], default='combined')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='Server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per second before 403s')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    partners = range(1, 1000)
+    cells = grid_cells([840], partners, ["85", "1001", "1201", "8507"], [2021, 2022, 2023])[:args.cells]
+
+    print(f"🚀 Load harness: {len(cells)} cells, mode={args.mode}, workers={args.workers}")
+    report = run_scenario(cells, args.mode, args.workers, args.latency, args.jitter,
+                          args.rate_limit, args.error_rate)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to: {args.output}")
+
+    return report
+
+if __name__ == "__main__":
+    main()
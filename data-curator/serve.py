@@ -0,0 +1,189 @@
+# serve.py
+"""
+Local HTTP data service for the curated outputs.
+
+Serves data/processed from memory (see utils/data_store.py) with ETag /
+If-None-Match and gzip support, and hot-reloads when the pipeline rewrites
+the outputs. Runs on plain asyncio; `make_asgi_app` exposes the same routes to an
+ASGI server such as uvicorn if one is installed.
+
+Routes:
+    GET /api/summary              merged_summary.csv
+    GET /api/summary/<hs4>        one merged_summary.csv row
+    GET /api/hs4/<hs4>            expanded rows (all partners) for one product
+    GET /api/partner/<iso3>       expanded rows (all products) for one partner
+    GET /api/categories           category_summary.csv
+    GET /api/high-tariff          high_tariff_products.csv
+    GET /api/validation           expansion_validation.json
+    GET /api/stats[/<partitions>] approximate stats from expanded_sketches.json
+    GET /api/groups               trade, revenue and tariff per partner group (EU, ASEAN, ...)
+    GET /api/groups/<group>       per-HS4 rollup of one partner group
+"""
+import asyncio
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.data_store import DataStore, PROCESSED_DIR
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+ROUTES = [
+    (re.compile(r'^/api/summary/?$'), lambda m: 'summary'),
+    (re.compile(r'^/api/summary/(\d{4})$'), lambda m: f"summary:{m.group(1)}"),
+    (re.compile(r'^/api/hs4/(\d{4})$'), lambda m: f"hs4:{m.group(1)}"),
+    (re.compile(r'^/api/partner/([A-Za-z]{3})$'), lambda m: f"partner:{m.group(1).upper()}"),
+    (re.compile(r'^/api/categories/?$'), lambda m: 'categories'),
+    (re.compile(r'^/api/high-tariff/?$'), lambda m: 'high-tariff'),
+    (re.compile(r'^/api/validation/?$'), lambda m: 'validation'),
+    (re.compile(r'^/api/stats/?$'), lambda m: 'stats'),
+    (re.compile(r'^/api/stats/([\w,-]+)$'), lambda m: f"stats:{m.group(1)}"),
+    (re.compile(r'^/api/groups/?$'), lambda m: 'groups'),
+    (re.compile(r'^/api/groups/([A-Za-z0-9_-]+)$'), lambda m: f"groups:{m.group(1).upper()}"),
+]
+
+REASONS = {200: 'OK', 304: 'Not Modified', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+def _error(message: str) -> bytes:
+    return json.dumps({'status': 'error', 'message': message}).encode('utf-8')
+
+def handle_request(store: DataStore, method: str, path: str,
+                   headers: Dict[str, str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """
+    Resolve one request against the store
+
+    Args:
+        store: Loaded DataStore
+        method: HTTP method
+        path: Request path (query string is ignored)
+        headers: Request headers with lower-cased names
+
+    Returns:
+        (status, response headers, body)
+    """
+    if method not in ('GET', 'HEAD'):
+        return 405, [('Content-Type', 'application/json')], _error('Only GET is supported')
+
+    store.refresh_if_changed()
+    path = path.split('?', 1)[0]
+
+    key = None
+    for pattern, to_key in ROUTES:
+        match = pattern.match(path)
+        if match:
+            key = to_key(match)
+            break
+
+    cached = store.response(key) if key else None
+    if cached is None:
+        return 404, [('Content-Type', 'application/json')], _error(f'Not found: {path}')
+
+    response_headers = [
+        ('ETag', cached.etag),
+        ('Cache-Control', 'no-cache'),
+        ('Vary', 'Accept-Encoding'),
+        ('X-Data-Version', store.version),
+    ]
+
+    if_none_match = headers.get('if-none-match', '')
+    if if_none_match and (if_none_match.strip() == '*' or cached.etag in [t.strip() for t in if_none_match.split(',')]):
+        return 304, response_headers, b''
+
+    response_headers.append(('Content-Type', 'application/json'))
+    if 'gzip' in headers.get('accept-encoding', ''):
+        response_headers.append(('Content-Encoding', 'gzip'))
+        body = cached.gzip_body
+    else:
+        body = cached.body
+
+    return 200, response_headers, (b'' if method == 'HEAD' else body)
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str]]]:
+    """Read one request head; returns None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return None
+
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) < 3:
+        return None
+
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    # Requests we serve have no body; drain one if a client sends it anyway
+    length = int(headers.get('content-length', '0') or 0)
+    if length:
+        await reader.readexactly(length)
+
+    return parts[0].upper(), parts[1], headers
+
+async def _serve_connection(store: DataStore, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve requests on one keep-alive connection"""
+    try:
+        while True:
+            request = await _read_request(reader)
+            if request is None:
+                break
+            method, path, headers = request
+
+            status, response_headers, body = handle_request(store, method, path, headers)
+            keep_alive = headers.get('connection', '').lower() != 'close'
+
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+            head += [f"{name}: {value}" for name, value in response_headers]
+            head.append(f"Content-Length: {len(body)}")
+            head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(store: DataStore, host: str = HOST, port: int = PORT):
+    """Run the asyncio HTTP server until cancelled"""
+    server = await asyncio.start_server(
+        lambda r, w: _serve_connection(store, r, w), host, port
+    )
+    print(f"🌐 Serving curated data on http://{host}:{port}/api/summary")
+    async with server:
+        await server.serve_forever()
+
+def make_asgi_app(store: DataStore):
+    """ASGI application exposing the same routes (for uvicorn and friends)"""
+    async def app(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        status, response_headers, body = handle_request(store, scope['method'], scope['path'], headers)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response_headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+    return app
+
+def main(root: str = PROCESSED_DIR, host: str = HOST, port: int = PORT):
+    """Load the curated outputs and serve them"""
+    print("🚀 Starting curated data service...")
+    store = DataStore(root)
+    store.warm()
+    try:
+        asyncio.run(serve(store, host, port))
+    except KeyboardInterrupt:
+        print("\n👋 Data service stopped")
+
+if __name__ == "__main__":
+    import sys
+    main(*sys.argv[1:2])
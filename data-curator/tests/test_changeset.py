@@ -0,0 +1,91 @@
+# test_changeset.py
+"""
+Tests for the expanded dataset changeset (diff / apply)
+"""
+import json
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.changeset import diff_datasets, apply_changeset, CHANGESET_FILE
+from utils.expand_tariffs import attach_changeset
+from utils.publish import publish_outputs, load_manifest, list_versions
+
+def make_expanded():
+    return pd.DataFrame({
+        'hs4': ['0102', '0102', '8517'],
+        'partner_iso': ['CAN', 'MEX', 'CAN'],
+        'year_y': [2024, 2024, 2024],
+        'simple_average': [2.5, 2.5, 0.0],
+        'trade_value_total': [60.0, 40.0, 200.0],
+        'category': ['Live animals', 'Live animals', 'Electrical'],
+    })
+
+def test_diff_reports_changed_columns_only():
+    """Inserts, deletes and updates with just the changed columns"""
+    print("🧪 Testing changeset diff...")
+    old = make_expanded()
+    new = old.copy()
+    new.loc[0, 'simple_average'] = 5.0
+    new = new.drop(index=1)
+    new = pd.concat([new, pd.DataFrame([{
+        'hs4': '8517', 'partner_iso': 'MEX', 'year_y': 2024,
+        'simple_average': 0.0, 'trade_value_total': 10.0, 'category': 'Electrical',
+    }])], ignore_index=True)
+
+    changeset = diff_datasets(old, new)
+    assert changeset['summary'] == {'inserts': 1, 'updates': 1, 'deletes': 1, 'unchanged': 1}
+    assert changeset['updates'][0] == {'key': ['0102', 'CAN', 2024], 'changes': {'simple_average': 5.0}}
+    assert changeset['deletes'] == [['0102', 'MEX', 2024]]
+
+def test_apply_roundtrip():
+    """Applying the (JSON round-tripped) changeset reproduces the new dataset"""
+    print("🧪 Testing changeset apply...")
+    old = make_expanded()
+    new = old.copy()
+    new.loc[2, 'trade_value_total'] = 250.0
+    new.loc[2, 'category'] = 'Electronics'
+    new = new.drop(index=0).reset_index(drop=True)
+
+    changeset = json.loads(json.dumps(diff_datasets(old, new)))
+    result = apply_changeset(old, changeset)
+    assert result.equals(new)
+
+def test_float_noise_is_not_an_update():
+    """Numeric comparisons use a tolerance"""
+    old = make_expanded()
+    new = old.copy()
+    new['trade_value_total'] = new['trade_value_total'] * (1 + 1e-12)
+    assert diff_datasets(old, new)['summary']['updates'] == 0
+
+def test_published_changesets_follow_the_data(tmp_path):
+    """Identical reruns keep the version, stale changesets are never carried forward"""
+    print("🧪 Testing published changesets...")
+    root = str(tmp_path)
+    old = make_expanded()
+    new = old.assign(simple_average=[5.0, 2.5, 0.0])
+    publish_outputs({'expanded_summary.csv': old}, root=root)
+
+    outputs = {'expanded_summary.csv': new}
+    assert attach_changeset(outputs, new, root) == []
+    changed = publish_outputs(outputs, root=root)
+    with open(os.path.join(root, 'versions', changed, CHANGESET_FILE)) as f:
+        assert json.load(f)['summary']['updates'] == 1
+
+    for _ in range(2):
+        outputs = {'expanded_summary.csv': new}
+        drop = attach_changeset(outputs, new, root)
+        assert CHANGESET_FILE not in outputs and drop == []
+        assert publish_outputs(outputs, root=root, drop=drop) == changed
+    assert len(list_versions(root)) == 2
+
+    # No diff possible (duplicate keys): the old changeset must not survive
+    broken = pd.concat([new, new])
+    outputs = {'expanded_summary.csv': broken}
+    drop = attach_changeset(outputs, broken, root)
+    publish_outputs(outputs, root=root, drop=drop)
+    assert CHANGESET_FILE not in load_manifest(root=root)['files']
+    assert not os.path.exists(os.path.join(root, CHANGESET_FILE))
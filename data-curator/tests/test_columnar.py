@@ -0,0 +1,70 @@
+# test_columnar.py
+"""
+Tests for columnar record batches and the columnar fetch path (no network)
+"""
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import wits_api
+from api.endpoint_health import HealthRegistry
+from api.columnar import ColumnarBatch
+from api.wits_api import TariffData, TradeData, combine_records
+from tests.test_wits_concurrency import FakeSession
+
+def _legs(i):
+    cell = (840, 100 + i, "85", 2022)
+    tariff = TariffData(840, 100 + i, "85", 2022, float(i), 0.0, 10.0, "MFN", i, 0, 0, 0)
+    trade = TradeData(840, 100 + i, "85", 2022, 1000.0 * i, 5.0, "KG")
+    return cell, tariff, trade
+
+def test_batch_matches_combined_records():
+    """Batch rows equal combine_records output; missing legs become nulls"""
+    print("🧪 Testing columnar batch...")
+    assert not hasattr(_legs(0)[1], '__dict__')  # Slotted records
+
+    batch = ColumnarBatch(capacity=2)  # Forces growth
+    expected = []
+    for i in range(5):
+        cell, tariff, trade = _legs(i)
+        if i == 3:
+            trade = None
+        if i == 4:
+            tariff = None
+        batch.append(cell, tariff, trade)
+        expected.append(combine_records(cell, tariff, trade))
+    assert not batch.append((840, 1, "85", 2022), None, None)
+
+    assert len(batch) == 5
+    assert batch.to_records() == expected
+
+    df = batch.to_pandas()
+    assert list(df['partner']) == [100, 101, 102, 103, 104]
+    assert np.isnan(df['trade_value_usd'][3]) and df['total_lines'].isna()[4]
+    assert df['unit'].isna()[3] and df['unit'][0] == "KG"
+
+    # Numeric columns are views of the batch's buffers
+    assert np.shares_memory(df['simple_average'].to_numpy(), batch.columns()['simple_average'])
+
+    # Dict rows round-trip
+    other = ColumnarBatch()
+    assert other.extend(expected + [None]) == 5
+    assert other.to_records() == expected
+
+def test_fetch_combined_columnar(monkeypatch):
+    """Columnar fetch appends each distinct cell once"""
+    print("🧪 Testing columnar fetch...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+    monkeypatch.setattr(wits_api, 'endpoint_health', HealthRegistry(wits_api.MAX_WORKERS))
+    monkeypatch.setattr(wits_api, '_session', FakeSession(delay=0.0))
+    cells = [(840, 156, "85", 2022), (840, 76, "85", 2022), (840, 156, "85", 2022)]
+
+    batch = wits_api.fetch_combined_columnar(cells)
+    df = batch.to_pandas()
+    assert len(df) == 2
+    assert list(df['simple_average']) == [2.5, 2.5]
+    assert list(df['trade_value_usd']) == [3000.0, 3000.0]
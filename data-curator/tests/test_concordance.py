@@ -0,0 +1,102 @@
+"""
+Tests for the HS revision concordance
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.concordance import Concordance, harmonize, load_concordance, normalize_hs_code
+from utils.expand_tariffs import load_tariff_data, load_trade_data
+
+def _table() -> pd.DataFrame:
+    # 240399 splits in two (1:n), 382490 and 240399 partly merge into 2404 headings
+    return pd.DataFrame({
+        'HS 2017 Code': ['010121', '240399', '240399', '382490', '851712'],
+        'HS 2022 Code': ['010121', '240399', '240411', '240412', '851713'],
+    })
+
+def test_convert_frame_splits_and_preserves_totals():
+    """Split codes duplicate rows, values are allocated, rates are copied"""
+    print("🧪 Testing concordance conversion...")
+    concordance = Concordance.from_table(_table(), 'HS2017', 'HS2022')
+    assert concordance.fanout()['240399'] == 2
+    assert concordance.relationships()[('240399', '240411')] == '1:n'
+
+    flows = pd.DataFrame({
+        'ProductCode': [24039900, 10121, 999999, '3824.90'],   # national line, lost zero, unknown, dotted
+        'trade': [100.0, 50.0, 7.0, 10.0],
+        'tariff': [3.5, 1.0, 2.0, 4.0],
+    })
+    converted = concordance.convert_frame(flows, 'ProductCode', ['trade'])
+    assert converted['ProductCode'].tolist() == ['240399', '240411', '010121', '999999', '240412']
+    assert converted['trade'].tolist() == [50.0, 50.0, 50.0, 7.0, 10.0]
+    assert converted['tariff'].tolist() == [3.5, 3.5, 1.0, 2.0, 4.0]
+    assert converted['trade'].sum() == flows['trade'].sum()
+
+    dropped = concordance.convert_codes(flows['ProductCode'], unknown='drop')
+    assert dropped['row'].tolist() == [0, 0, 1, 3] and dropped['mapped'].all()
+    try:
+        concordance.convert_codes(flows['ProductCode'], unknown='raise')
+        assert False, "unknown codes should raise"
+    except KeyError as e:
+        assert '999999' in str(e)
+
+    by_hs4 = concordance.at_level(4).convert_frame(
+        pd.DataFrame({'hs4': ['2403', '3824'], 'trade': [10.0, 4.0]}), 'hs4', ['trade'], aggregate_by=[])
+    assert dict(zip(by_hs4['hs4'], by_hs4['trade'])) == {'2403': 5.0, '2404': 9.0}
+    print("  ✅ Concordance conversion passed!")
+
+def test_reweight_uses_observed_target_values():
+    """1:n splits follow the trade observed under the target codes"""
+    print("🧪 Testing concordance reweighting...")
+    concordance = Concordance.from_table(_table(), 'HS2017', 'HS2022').reweight(
+        pd.Series({'240399': 3.0, '240411': 1.0}))
+    table = concordance.table().set_index(['from', 'to'])['weight']
+    assert table[('240399', '240399')] == 0.75
+    assert table[('240399', '240411')] == 0.25
+    assert table[('382490', '240412')] == 1.0
+    assert normalize_hs_code(pd.Series([10121, 10121.0, '0101.21', None])).tolist() == ['010121'] * 3 + ['']
+    print("  ✅ Concordance reweighting passed!")
+
+def test_load_chains_and_inverts_tables(tmp_path):
+    """Revisions without a direct table are chained or inverted"""
+    print("🧪 Testing concordance loading...")
+    _table().to_csv(tmp_path / "HS2017_HS2022.csv", index=False)
+    pd.DataFrame({'HS2012': ['010120', '851712'], 'HS2017': ['010121', '851712'],
+                  'weight': [1, 1]}).to_csv(tmp_path / "HS2012_HS2017.csv", index=False)
+
+    chained = load_concordance('HS2012', 'HS2022', str(tmp_path))
+    assert (chained.source, chained.target) == ('HS2012', 'HS2022')
+    assert dict(zip(chained.table()['from'], chained.table()['to'])) == {'010120': '010121', '851712': '851713'}
+
+    backwards = load_concordance('HS2022', 'HS2017', str(tmp_path))
+    assert backwards.table().set_index('from').loc['240412', 'to'] == '382490'
+    assert load_concordance('HS2017', 'HS2017', str(tmp_path)) is None
+
+    flows = pd.DataFrame({'ProductCode': ['851712'], 'trade': [1.0]})
+    assert harmonize(flows, 'ProductCode', 'HS2022', 'HS2022') is flows
+    assert harmonize(flows, 'ProductCode', 'HS2012', 'HS2017', root=str(tmp_path / "missing")) is flows
+    assert harmonize(flows, 'ProductCode', 'HS2017', 'HS2022', ['trade'],
+                     root=str(tmp_path))['ProductCode'].tolist() == ['851713']
+    print("  ✅ Concordance loading passed!")
+
+def test_converted_trade_joins_tariff_codes(tmp_path, monkeypatch):
+    """Converted trade codes and tariff lines normalize to the same HS4 (chapters 01-09 included)"""
+    print("🧪 Testing HS4 join after conversion...")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/raw/concordance")
+    _table().to_csv("data/raw/concordance/HS2017_HS2022.csv", index=False)
+    pd.DataFrame({'ProductCode': ['01012100', '85171300'], 'AdValorem Equivalent': [1.0, 2.0], 'Year': 2023,
+                  'Reporter_ISO_N': 840, 'ReporterName': 'United States'}).to_csv("tariffs.csv", index=False)
+    pd.DataFrame({'ProductCode': [10121, 851712], 'PartnerISO3': 'CAN', 'PartnerName': 'Canada',
+                  'TradeValue in 1000 USD': [5.0, 7.0], 'Year': 2024, 'ReporterName': 'USA',
+                  'ReporterCode': 842}).to_csv("trade.csv", index=False)
+
+    tariffs = load_tariff_data("tariffs.csv")
+    for nomenclature in ('HS2017', 'HS2022'):
+        trades = load_trade_data("trade.csv", nomenclature=nomenclature)
+        assert sorted(trades['hs4']) == sorted(tariffs['hs4']) == ['0101', '8517']
+    print("  ✅ HS4 join after conversion passed!")
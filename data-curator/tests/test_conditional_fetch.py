@@ -0,0 +1,84 @@
+# test_conditional_fetch.py
+"""
+Tests for conditional GET refreshes of the HS reference data (local server, no network)
+"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.conditional_fetch import write_if_changed
+from scripts.fetch_hs_descriptions import fetch_and_process_hs_codes
+
+class _Source:
+    body = b"section,hscode,description,parent,level\nI,01,Animals,TOTAL,2\nI,0101,Horses,01,4\nI,010121,Pure-bred,0101,6\n"
+    etag = '"v1"'
+    requests = []
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        _Source.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == _Source.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', _Source.etag)
+        self.send_header('Content-Length', str(len(_Source.body)))
+        self.end_headers()
+        self.wfile.write(_Source.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_refresh_skips_unchanged_source(tmp_path):
+    """First run writes, an unchanged source answers 304, a new body is parsed from the stream"""
+    print("🧪 Testing conditional HS refresh...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/hs.csv"
+    output = str(tmp_path / "hs4_descriptions.json")
+    state = str(tmp_path / "state.json")
+
+    try:
+        assert fetch_and_process_hs_codes(url, output, state)
+        with open(output) as f:
+            assert json.load(f) == {'0100': 'Animals', '0101': 'Horses'}
+        mtime = os.stat(output).st_mtime_ns
+
+        # Unchanged: conditional request, 304, output untouched
+        assert not fetch_and_process_hs_codes(url, output, state)
+        assert _Source.requests[-1].get('If-None-Match') == '"v1"'
+        assert os.stat(output).st_mtime_ns == mtime
+
+        # New version with the same content: downloaded but not rewritten
+        _Source.etag = '"v2"'
+        assert not fetch_and_process_hs_codes(url, output, state)
+
+        # Changed content is written
+        _Source.etag = '"v3"'
+        _Source.body += b"II,0601,Bulbs,06,4\n"
+        assert fetch_and_process_hs_codes(url, output, state)
+        with open(output) as f:
+            assert json.load(f)['0601'] == 'Bulbs'
+
+        # A missing output forces a full download
+        os.remove(output)
+        assert fetch_and_process_hs_codes(url, output, state)
+        assert 'If-None-Match' not in _Source.requests[-1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_write_if_changed(tmp_path):
+    """Identical bytes leave the file alone"""
+    print("🧪 Testing write_if_changed...")
+    path = str(tmp_path / "out" / "data.json")
+    assert write_if_changed(path, b"{}")
+    assert not write_if_changed(path, b"{}")
+    assert write_if_changed(path, b"[]")
+    assert os.listdir(tmp_path / "out") == ["data.json"]
@@ -0,0 +1,81 @@
+# test_data_store.py
+"""
+Tests for the in-memory curated data store and HTTP handler
+"""
+import gzip
+import json
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_store import DataStore
+from utils.publish import publish_outputs
+from serve import handle_request
+
+def write_outputs(root, tariff=2.5):
+    """Write a minimal set of processed outputs"""
+    pd.DataFrame({
+        'hs4': ['0102', '8517'], 'simple_average': [tariff, 0.0], 'trade_value_total': [100.0, 200.0],
+    }).to_csv(os.path.join(root, 'merged_summary.csv'), index=False)
+    pd.DataFrame({
+        'hs4': ['0102', '0102', '8517'], 'partner_iso': ['CAN', 'MEX', 'CAN'],
+        'partner_name': ['Canada', 'Mexico', 'Canada'],
+        'simple_average': [tariff, tariff, 0.0], 'trade_value_total': [60.0, 40.0, 200.0],
+    }).to_csv(os.path.join(root, 'expanded_summary.csv'), index=False)
+
+def test_routes_etag_and_gzip(tmp_path):
+    """Per-hs4/per-partner lookups, conditional GET and gzip"""
+    print("🧪 Testing data store routes...")
+    write_outputs(str(tmp_path))
+    store = DataStore(str(tmp_path))
+
+    status, headers, body = handle_request(store, 'GET', '/api/hs4/0102', {})
+    assert status == 200
+    payload = json.loads(body)
+    assert payload['meta']['partners'] == 2 and payload['data'][0]['hs4'] == '0102'
+
+    status, headers, body = handle_request(store, 'GET', '/api/partner/can', {'accept-encoding': 'gzip'})
+    assert status == 200 and dict(headers)['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(body))['data']) == 2
+
+    etag = dict(headers)['ETag']
+    status, _, body = handle_request(store, 'GET', '/api/partner/CAN', {'if-none-match': etag})
+    assert status == 304 and body == b''
+
+    assert handle_request(store, 'GET', '/api/hs4/9999', {})[0] == 404
+
+def test_hot_reload(tmp_path):
+    """Rewritten outputs are picked up and change the ETag"""
+    print("🧪 Testing hot reload...")
+    write_outputs(str(tmp_path))
+    store = DataStore(str(tmp_path), reload_interval=0)
+    _, headers, _ = handle_request(store, 'GET', '/api/summary/0102', {})
+
+    write_outputs(str(tmp_path), tariff=7.5)
+    os.utime(os.path.join(str(tmp_path), 'merged_summary.csv'), ns=(0, 10**18))
+    _, new_headers, body = handle_request(store, 'GET', '/api/summary/0102', {})
+
+    assert json.loads(body)['data']['simple_average'] == 7.5
+    assert dict(new_headers)['ETag'] != dict(headers)['ETag']
+
+def test_unpublished_artifacts_fall_back_to_flat_files(tmp_path):
+    """Artifacts missing from the current version are still served from the flat directory"""
+    print("🧪 Testing versioned/flat fallback...")
+    root = str(tmp_path)
+    write_outputs(root)
+    pd.DataFrame({'category': ['Animals'], 'count': [1]}).to_csv(os.path.join(root, 'category_summary.csv'), index=False)
+    with open(os.path.join(root, 'expansion_validation.json'), 'w') as f:
+        json.dump({'rows': 3}, f)
+
+    merged = pd.DataFrame({'hs4': ['0102', '8517'], 'simple_average': [9.0, 0.0], 'trade_value_total': [1.0, 2.0]})
+    publish_outputs({'merged_summary.csv': merged}, root=root)
+    store = DataStore(root)
+
+    assert len(store.tables['expanded']) == 3
+    assert len(store.tables['categories']) == 1
+    assert store.validation == {'rows': 3}
+    status, _, body = handle_request(store, 'GET', '/api/summary/0102', {})
+    assert status == 200 and json.loads(body)['data']['simple_average'] == 9.0
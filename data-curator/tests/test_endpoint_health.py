@@ -0,0 +1,128 @@
+# test_endpoint_health.py
+"""
+Tests for the circuit breaker, adaptive concurrency and endpoint discovery (no network)
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import wits_api
+from api.endpoint_health import (CLOSED, HALF_OPEN, OPEN, AdaptiveLimiter, CircuitBreaker,
+                                 CircuitOpenError, HealthRegistry)
+from api.replay_server import ReplayServer
+from tests.test_wits_concurrency import FakeResponse
+
+def test_circuit_breaker_states():
+    """Opens after the threshold, lets one half-open probe through, closes on success"""
+    print("🧪 Testing circuit breaker...")
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.1)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.12)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.12)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+def test_adaptive_limiter():
+    """403s halve the ceiling, successes grow it back; acquire blocks at the ceiling"""
+    print("🧪 Testing adaptive concurrency...")
+    limiter = AdaptiveLimiter(max_limit=8)
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.limit == 2
+    for _ in range(20):
+        limiter.on_success()
+    assert 4 < limiter.limit <= 8
+
+    limiter = AdaptiveLimiter(max_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    limiter.release()
+    assert acquired.wait(1)
+    waiter.join()
+
+def test_open_circuit_stops_requests(monkeypatch):
+    """A failing endpoint is cut off after the threshold instead of being retried"""
+    print("🧪 Testing fail-fast on outages...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+    monkeypatch.setattr(wits_api, 'endpoint_health', HealthRegistry(4, failure_threshold=3, reset_timeout=60))
+
+    with ReplayServer(error_rate=1.0) as server:
+        with server.patch_fetchers():
+            for partner in range(10):
+                assert wits_api.fetch_tariff_data(840, partner, "85", 2022) is None
+            with pytest.raises(CircuitOpenError):
+                wits_api.fetch_cell_record((840, 1, "85", 2022))
+        stats = server.stats()
+
+    # 3 TRN requests until its circuit opened, plus the job cell's concurrent TMF leg
+    assert stats['requests'] == 4
+    states = {key.rsplit('.', 1)[-1]: s['state'] for key, s in wits_api.endpoint_health.status().items()}
+    assert states['TRN'] == OPEN and states['TMF'] != OPEN
+
+class _ProbeSession:
+    """Only the /rest/data/TRN/reporter/... structure answers 200"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, timeout=None, **kwargs):
+        self.calls.append(url)
+        time.sleep(0.2)
+        ok = '/rest/data/TRN/reporter/' in url or '/datasource/TMF/reporter/' in url
+        return FakeResponse({'data': []}, status_code=200 if ok else 404)
+
+def test_discover_endpoints(tmp_path, monkeypatch):
+    """Candidates are probed concurrently, the working structure is used and cached"""
+    print("🧪 Testing endpoint discovery...")
+    for name in ('TARIFF_BASE', 'TARIFF_PATH', 'TRADE_BASE', 'TRADE_PATH'):
+        monkeypatch.setattr(wits_api, name, getattr(wits_api, name))
+    session = _ProbeSession()
+    monkeypatch.setattr(wits_api, '_session', session)
+    cache_file = str(tmp_path / "endpoints.json")
+
+    start = time.perf_counter()
+    found = wits_api.discover_endpoints(cache_file=cache_file)
+    assert time.perf_counter() - start < 0.6  # 7 probes, ~one round trip
+    assert found['TRN'] == {'base': '/rest/data/TRN', 'path': wits_api.TRADE_PATH}
+    assert wits_api.tariff_url(840, 156, "85", 2022).startswith(
+        "https://wits.worldbank.org/API/V1/SDMX/V21/rest/data/TRN/reporter/840/partner/156/")
+
+    probes = len(session.calls)
+    assert wits_api.discover_endpoints(cache_file=cache_file) == found
+    assert len(session.calls) == probes  # Served from the cache file
+
+def test_ensure_endpoints_runs_once(tmp_path, monkeypatch):
+    """Fetch start-up discovers the structures once, then reuses them"""
+    print("🧪 Testing start-up endpoint discovery...")
+    for name in ('TARIFF_BASE', 'TARIFF_PATH', 'TRADE_BASE', 'TRADE_PATH'):
+        monkeypatch.setattr(wits_api, name, getattr(wits_api, name))
+    monkeypatch.setattr(wits_api, '_endpoints_ready', False)
+    session = _ProbeSession()
+    monkeypatch.setattr(wits_api, '_session', session)
+    cache_file = tmp_path / "endpoints.json"
+
+    assert wits_api.ensure_endpoints(cache_file=str(cache_file))
+    assert cache_file.exists()
+    probes = len(session.calls)
+    assert wits_api.ensure_endpoints(cache_file=str(cache_file))
+    assert len(session.calls) == probes
+    assert '/rest/data/TRN/' in wits_api.tariff_url(840, 156, "85", 2022)
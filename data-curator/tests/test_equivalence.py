@@ -0,0 +1,114 @@
+"""
+Tests for the legacy/fast engine equivalence harness
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_cleaner import (clean_tariff_data, clean_trade_data, normalize_codes, normalize_hs4,
+                                normalize_hs4_column, LEGACY_ENGINE)
+from utils.equivalence import (_raw_files, check_published, compare_frames, leading_zero_codes,
+                               run_harness, scale_up, synthetic_raw)
+from utils.expand_tariffs import load_tariff_data, load_trade_data, main, STAGES
+
+def test_engines_match_on_synthetic_extracts():
+    """Every stage of the fast engine reproduces the legacy output"""
+    print("🧪 Testing engine equivalence...")
+    tariff_raw, trade_raw = synthetic_raw(n_products=20, n_partners=8, seed=3)
+    report = run_harness(*scale_up(tariff_raw, trade_raw, 2), label="test")
+
+    assert report['equal'], [s['diff'] for s in report['stages'] if not s['equal']]
+    stages = {stage['stage']: stage for stage in report['stages']}
+    assert stages['pipeline']['diff']['csv_identical']
+    assert stages['expand']['legacy_s'] > 0 and stages['expand']['fast_s'] > 0
+    print("  ✅ Engine equivalence passed!")
+
+def test_normalize_hs4_column_edge_cases():
+    """The vectorized normalizer keeps the legacy handling of odd codes"""
+    print("🧪 Testing vectorized HS4 normalization...")
+    codes = pd.Series(['01022940', '85', '', 'abc123def', None, '12345678', 1001, 1001.0,
+                       float('nan'), ' 84.71 ', '85'], dtype=object, name='ProductCode')
+    fast = normalize_hs4_column(codes)
+    assert fast.tolist() == codes.apply(normalize_hs4).tolist()
+    assert fast.name == 'ProductCode'
+    try:
+        normalize_codes(codes, 'turbo')
+        assert False, "unknown engines should be rejected"
+    except ValueError:
+        pass
+    try:
+        main('turbo')
+        assert False, "unknown engines should be rejected"
+    except ValueError:
+        pass
+    print("  ✅ Vectorized HS4 normalization passed!")
+
+def test_compare_frames_reports_differences():
+    """Numeric drift beyond tolerance, text changes and column changes are caught"""
+    print("🧪 Testing frame diffs...")
+    expected = pd.DataFrame({'hs4': ['0101', '0102'], 'value': [1.0, 2.0]})
+
+    within = expected.assign(value=[1.0 + 1e-12, 2.0])
+    assert compare_frames(expected, within)['equal']
+    assert not compare_frames(expected, within, csv=True)['equal']
+
+    drift = compare_frames(expected, expected.assign(value=[1.0, 2.1]))
+    assert not drift['equal']
+    assert drift['mismatches']['value']['count'] == 1
+    assert drift['mismatches']['value']['sample'][0]['row'] == 1
+
+    renamed = compare_frames(expected, expected.assign(hs4=['0101', '102']))
+    assert renamed['mismatches']['hs4']['sample'] == [{'row': 1, 'expected': '0102', 'actual': '102'}]
+
+    reordered = compare_frames(expected, expected[['value', 'hs4']])
+    assert not reordered['equal'] and not reordered['columns']['same_order']
+    print("  ✅ Frame diffs passed!")
+
+def test_published_check_skips_recorded_changes(tmp_path):
+    """Only the HS4 codes of a recorded change may differ from the published output"""
+    print("🧪 Testing the published-output check...")
+    tariff_raw, trade_raw = synthetic_raw(n_products=30, n_partners=6, seed=1)
+    excluded = leading_zero_codes(tariff_raw['ProductCode'], trade_raw['ProductCode'])
+    assert '0102' in leading_zero_codes(pd.Series([1022940]), pd.Series(['010221']))
+    assert not leading_zero_codes(pd.Series(['85171200']))
+
+    published_file = tmp_path / "expanded_summary.csv"
+    with _raw_files(tariff_raw, trade_raw) as (tariff_file, trade_file):
+        current = load_trade_data(trade_file)
+        assert current['hs4'].str.startswith('0').any()  # Chapters 01-09 keep their zero
+        assert set(current['hs4']) & set(load_tariff_data(tariff_file)['hs4']) & excluded
+
+    # Published before the change: int-truncated codes for chapters 01-09, the rest identical
+    with _raw_files(tariff_raw, trade_raw) as (tariff_file, trade_file):
+        expanded = STAGES[LEGACY_ENGINE]['computed_fields'](STAGES[LEGACY_ENGINE]['expand'](
+            load_tariff_data(tariff_file), load_trade_data(trade_file)))
+    codes = trade_raw['ProductCode'].astype(str)
+    truncated = dict(zip(codes.str.zfill(6).str[:4], codes.str[:4]))
+    old = expanded.assign(hs4=expanded['hs4'].map(lambda code: truncated.get(code, code)))
+    assert (old['hs4'] != expanded['hs4']).any()
+    old.to_csv(published_file, index=False)
+    report = check_published(tariff_raw, trade_raw, str(published_file))
+    assert report['equal'], report['diff']
+    assert 'zero-padded product codes' in report['recorded_changes'] and report['excluded_hs4']
+
+    untouched = ~old['hs4'].isin(excluded)
+    old.loc[untouched.idxmax(), 'simple_average'] += 1
+    old.to_csv(published_file, index=False)
+    assert not check_published(tariff_raw, trade_raw, str(published_file))['equal']
+    print("  ✅ Published-output check passed!")
+
+def test_merged_and_expanded_pipelines_share_hs4_codes():
+    """curate's cleaners and expand_tariffs' loaders agree on HS4 codes, chapters 01-09 included"""
+    print("🧪 Testing HS4 codes across pipelines...")
+    tariff_raw, trade_raw = synthetic_raw(n_products=40, n_partners=6, seed=2)
+    with _raw_files(tariff_raw, trade_raw) as (tariff_file, trade_file):
+        for engine in (LEGACY_ENGINE, 'fast'):
+            cleaned = (clean_tariff_data(tariff_file, engine), clean_trade_data(trade_file, engine))
+            loaded = (load_tariff_data(tariff_file, engine), load_trade_data(trade_file, engine))
+            for clean, load in zip(cleaned, loaded):
+                assert sorted(clean['hs4']) == sorted(load['hs4'].unique())
+            assert cleaned[0]['hs4'].str.startswith('0').any()
+    print("  ✅ HS4 codes across pipelines passed!")
@@ -0,0 +1,76 @@
+# test_flow_tiles.py
+"""
+Tests for the precomputed binary globe flow tiles
+"""
+import json
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.flow_tiles import FIELDS, build_flow_tiles, country_centroids, read_tile, write_flow_tiles
+
+def _countries(tmp_path) -> str:
+    square = lambda x, y, size: [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]
+    countries = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'id': 'USA', 'properties': {'name': 'USA'},
+         'geometry': {'type': 'MultiPolygon', 'coordinates': [square(-100, 30, 20), square(-160, 20, 2)]}},
+        {'type': 'Feature', 'id': 'CAN', 'properties': {'name': 'Canada'},
+         'geometry': {'type': 'Polygon', 'coordinates': square(-110, 50, 10)}},
+        {'type': 'Feature', 'id': 'ROU', 'properties': {'name': 'Romania'},
+         'geometry': {'type': 'Polygon', 'coordinates': square(22, 44, 4)}},
+    ]}
+    path = str(tmp_path / "countries.json")
+    with open(path, 'w') as f:
+        json.dump(countries, f)
+    return path
+
+def _expanded() -> pd.DataFrame:
+    return pd.DataFrame({
+        'hs4': ['8703', '8703', '8703', '8704', '8704', '0102'],
+        'partner_iso': ['WLD', 'CAN', 'ROM', 'CAN', 'XXX', 'ROM'],
+        'partner_name': ['World', 'Canada', 'Romania', 'Canada', 'Nowhere', 'Romania'],
+        'simple_average': [2.0, 2.0, 2.0, 25.0, 25.0, 1.0],
+        'trade_value_total': [900.0, 600.0, 300.0, 100.0, 50.0, 10.0],
+        'tariff_revenue_estimate': [18.0, 12.0, 6.0, 25.0, 12.5, 0.1],
+    })
+
+def test_centroids_use_largest_polygon(tmp_path):
+    """Outlying islands do not move the centroid"""
+    print("🧪 Testing country centroids...")
+    centroids = country_centroids(_countries(tmp_path))
+    assert centroids['USA'] == (-90.0, 40.0)
+    assert centroids['CAN'] == (-105.0, 55.0)
+    assert 'SGP' in centroids  # Small partners without shapes
+
+def test_flow_tiles(tmp_path):
+    """Top-N flows per tile with coordinates, aggregated tariffs trade-weighted"""
+    print("🧪 Testing flow tiles...")
+    centroids = country_centroids(_countries(tmp_path))
+    files, manifest = build_flow_tiles(_expanded(), centroids, top_n=1)
+
+    assert set(files) == {'all.bin', 'hs2/87.bin', 'hs2/01.bin', 'hs4/8703.bin', 'hs4/8704.bin', 'hs4/0102.bin'}
+    assert manifest['unplaced'] == ['XXX'] and manifest['partners']['iso'] == ['CAN', 'ROM']
+    assert manifest['origin'] == {'iso': 'USA', 'lon': -90.0, 'lat': 40.0}
+
+    out_dir = str(tmp_path / "flows")
+    written = write_flow_tiles(_expanded(), out_dir, _countries(tmp_path), top_n=1)
+    chapter = read_tile(os.path.join(out_dir, 'hs2', '87.bin'))
+    assert chapter.shape == (1, len(FIELDS))
+    lon, lat, trade, tariff, revenue, partner = chapter[0]
+    assert manifest['partners']['iso'][int(partner)] == 'CAN'
+    assert (lon, lat) == (-105.0, 55.0)
+    assert (trade, revenue) == (700.0, 37.0)
+    assert abs(tariff - 37.0 / 700.0 * 100) < 1e-4
+
+    # Romania's legacy WITS code is placed via its ISO3 alias
+    product = read_tile(os.path.join(out_dir, 'hs4', '0102.bin'))
+    assert tuple(product[0, :2]) == (24.0, 46.0)
+    # The overall tile keeps every placed partner whatever top_n is
+    overall = read_tile(os.path.join(out_dir, 'all.bin'))
+    assert overall.shape == (2, len(FIELDS)) and overall[0, 2] == 700.0
+    entry = written['tiles']['hs2/87.bin']
+    assert entry['count'] == 1 and entry['bytes'] == 4 * len(FIELDS)
+    assert entry['coverage'] == 0.7  # CAN's 700 of 1000 located (XXX is unplaced)
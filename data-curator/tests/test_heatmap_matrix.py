@@ -0,0 +1,65 @@
+# test_heatmap_matrix.py
+"""
+Tests for the HS2 × partner heatmap matrices
+"""
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.heatmap_matrix import DATA_FILE, HEADER_FILE, HeatmapMatrix, write_heatmap
+
+def _expanded() -> pd.DataFrame:
+    return pd.DataFrame({
+        'hs4': ['8703', '8704', '8703', '0102', '0102'],
+        'partner_iso': ['CAN', 'CAN', 'MEX', 'MEX', 'WLD'],
+        'partner_name': ['Canada', 'Canada', 'Mexico', 'Mexico', 'World'],
+        'simple_average': [2.0, 25.0, 2.0, 1.0, 1.0],
+        'trade_value_total': [600.0, 100.0, 50.0, 0.0, 999.0],
+        'tariff_revenue_estimate': [12.0, 25.0, 1.0, 0.0, 9.99],
+        'category': ['Vehicles', 'Vehicles', 'Vehicles', 'Live animals', 'Live animals'],
+    })
+
+def test_matrices():
+    """Chapters × partners (largest first), trade-weighted tariff, NaN for empty cells"""
+    print("🧪 Testing heatmap aggregation...")
+    matrix = HeatmapMatrix.from_expanded(_expanded())
+    assert matrix.hs2 == ['01', '87'] and matrix.partners == ['CAN', 'MEX']
+    assert matrix.chapter_names == ['Live animals', 'Vehicles']
+    assert matrix.matrices['tariff'].dtype == np.float32
+
+    assert matrix.cell('87', 'CAN') == pytest.approx({'tariff': 37 / 700 * 100, 'trade_value': 700, 'tariff_revenue': 37})
+    assert matrix.cell('01', 'MEX')['tariff'] == 1.0  # No trade: simple mean
+    assert matrix.cell('01', 'CAN') == {'tariff': None, 'trade_value': None, 'tariff_revenue': None}
+
+    trade = matrix.slice('trade_value', partners='MEX')
+    assert list(trade.index) == ['01', '87'] and trade.loc['87', 'MEX'] == 50
+    assert matrix.quantiles['trade_value'][0] == 0 and matrix.quantiles['trade_value'][-1] == 700
+
+    totals = matrix.partner_totals()
+    assert totals['trade_value'].tolist() == [700, 50]
+    assert totals['tariff'].tolist() == pytest.approx([37 / 700 * 100, 1 / 50 * 100])
+    assert matrix.partner_quantiles()['trade_value'][-1] == 700
+    with pytest.raises(KeyError):
+        matrix.slice('tariff', hs2='99')
+
+def test_save_and_load(tmp_path):
+    """Binary file holds the metrics back-to-back as described by the header"""
+    print("🧪 Testing heatmap storage...")
+    out_dir = str(tmp_path)
+    header = write_heatmap(_expanded(), out_dir, version="v1")
+    assert os.path.getsize(os.path.join(out_dir, DATA_FILE)) == header['bytes'] == 3 * 2 * 2 * 4
+    with open(os.path.join(out_dir, HEADER_FILE)) as f:
+        assert json.load(f)['metrics']['trade_value'] == {'offset': 16, 'length': 4}
+
+    loaded = HeatmapMatrix.load(out_dir)
+    original = HeatmapMatrix.from_expanded(_expanded())
+    for name in original.matrices:
+        np.testing.assert_array_equal(loaded.matrices[name], original.matrices[name])
+    assert loaded.quantiles == original.quantiles
+    assert loaded.slice('tariff', hs2=['87'], partners=['MEX']).iloc[0, 0] == 2.0
@@ -0,0 +1,74 @@
+# test_hierarchies.py
+"""
+Tests for the pruned treemap/sunburst/Sankey hierarchies
+"""
+import json
+import os
+import sys
+import pandas as pd
+import pytest
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hierarchies import OTHER, build_tree, to_flat, to_nested, to_sankey, write_hierarchies
+
+def _expanded() -> pd.DataFrame:
+    rows = [
+        ('8703', 'CAN', 'Canada', 2.0, 600.0),
+        ('8703', 'MEX', 'Mexico', 2.0, 200.0),
+        ('8703', 'JPN', 'Japan', 2.0, 100.0),
+        ('8703', 'KOR', 'Korea', 2.0, 50.0),
+        ('8708', 'MEX', 'Mexico', 4.0, 40.0),
+        ('8714', 'CHN', 'China', 10.0, 10.0),
+        ('0102', 'CAN', 'Canada', 1.0, 0.0),
+        ('2709', 'CAN', 'Canada', 0.5, 1000.0),
+        ('2709', 'WLD', 'World', 0.5, 5000.0),
+    ]
+    df = pd.DataFrame(rows, columns=['hs4', 'partner_iso', 'partner_name', 'simple_average', 'trade_value_total'])
+    df['tariff_revenue_estimate'] = df['simple_average'] / 100 * df['trade_value_total']
+    df['category'] = df['hs4'].str[:2].map({'87': 'Vehicles', '01': 'Live animals', '27': 'Mineral fuels'})
+    return df
+
+def test_pruning_preserves_totals():
+    """Tail children merge into Other; values still add up at every level"""
+    print("🧪 Testing hierarchy pruning...")
+    limits = {'hs2': (1, 0.0), 'hs4': (1, 0.0), 'partner': (2, 0.0)}
+    root = build_tree(_expanded(), limits)
+
+    assert root['value'] == 2000.0  # World aggregate excluded
+    assert [child['key'] for child in root['children']] == ['27', OTHER]
+    other = root['children'][1]
+    assert other['merged'] == 2 and other['value'] == 1000.0
+    assert other['tariff'] == pytest.approx((12 + 4 + 2 + 1 + 1.6 + 1) / 1000 * 100)
+
+    # A single leftover child is kept instead of becoming a lone "Other"
+    vehicles = build_tree(_expanded(), {'hs4': (2, 0.0), 'partner': (2, 0.0)})['children'][1]
+    assert [child['key'] for child in vehicles['children']] == ['8703', '8708', '8714']
+    cars = vehicles['children'][0]
+    assert [child['key'] for child in cars['children']] == ['CAN', 'MEX', 'Other-8703']
+    assert sum(child['value'] for child in cars['children']) == cars['value'] == 950.0
+
+def test_chart_documents(tmp_path):
+    """Nested /api/sectors shape, flat Plotly arrays with unique ids, Sankey links"""
+    print("🧪 Testing chart documents...")
+    root = build_tree(_expanded(), {'partner': (1, 0.0)})
+    nested = to_nested(root)
+    assert nested['total_value'] == 2000.0 and nested['children'][0]['hs2'] == '27'
+    assert nested['children'][0]['share_of_total'] == 50.0
+    assert nested['children'][1]['children'][0]['children'][0]['partner_iso'] == 'CAN'
+
+    flat = to_flat(root)
+    assert len(set(flat['ids'])) == len(flat['ids'])
+    assert flat['parents'][0] == '' and flat['ids'][1] == 'world/27'
+    assert flat['keys'][:2] == ['world', '27']
+    assert set(flat['parents'][1:]) <= set(flat['ids'])
+
+    sankey = to_sankey(build_tree(_expanded(), depth=2))
+    assert sankey['levels'].count('hs2') == 3 and 'partner' not in sankey['levels']
+    assert len(sankey['source']) == len(sankey['labels']) - 1
+
+    sizes = write_hierarchies(_expanded(), str(tmp_path))
+    with open(tmp_path / 'tree.json') as f:
+        assert json.load(f)['total_value'] == 2000.0
+    assert set(sizes) == {'tree.json', 'nodes.json', 'sankey.json'}
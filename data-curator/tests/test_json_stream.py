@@ -0,0 +1,72 @@
+# test_json_stream.py
+"""
+Tests for the incremental JSON record parser (no network)
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.json_stream import iter_array_records, project, records_to_columns
+
+def _chunks(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def test_records_stream_at_any_chunk_boundary():
+    """Every chunk size yields the same records, including multi-byte text and edge numbers"""
+    print("🧪 Testing streaming JSON parser...")
+    payload = {
+        'page': {'total': 3, 'note': 'skip [me] {"data": 1}'},
+        'count': 12345,
+        'data': [
+            {'Partner': '156', 'SimpleAverage': 3.25, 'Unit': 'Kilogrammes – net'},
+            {'Partner': 'CIV', 'Name': "Côte d'Ivoire", 'TradeValue': 1e12, 'Tags': [1, [2, 3]]},
+            {'Partner': '76', 'Quantity': -0.5, 'Unit': None},
+        ],
+        'trailer': 'ignored',
+    }
+    body = json.dumps(payload, ensure_ascii=False, indent=1).encode('utf-8')
+
+    for size in (1, 2, 3, 7, 64, len(body)):
+        assert list(iter_array_records(_chunks(body, size))) == payload['data']
+
+    assert list(iter_array_records(_chunks(b'{"data": []}', 3))) == []
+    assert list(iter_array_records(_chunks(b'{"data": null}', 3))) == []
+    assert list(iter_array_records(_chunks(b'{"other": 1}', 3))) == []
+    assert list(iter_array_records(_chunks(b'{}', 1))) == []
+
+    with pytest.raises(ValueError):
+        list(iter_array_records(_chunks(b'{"data": [{"a": 1} {"b": 2}]}', 4)))
+    with pytest.raises(ValueError):
+        list(iter_array_records(_chunks(b'{"data": [{"a": 1}', 4)))
+
+def test_parsing_overlaps_download():
+    """The first record is yielded before the rest of the body is read"""
+    print("🧪 Testing incremental consumption...")
+    records = [{'i': i, 'pad': 'x' * 50} for i in range(2000)]
+    body = json.dumps({'data': records}).encode('utf-8')
+
+    consumed = []
+    def tracked():
+        for chunk in _chunks(body, 1024):
+            consumed.append(len(chunk))
+            yield chunk
+
+    stream = iter_array_records(tracked())
+    assert next(stream) == records[0]
+    assert sum(consumed) <= 1024
+
+    rest = list(stream)
+    assert len(rest) == len(records) - 1
+
+def test_projection_and_columns():
+    """Records reduce to the requested fields and accumulate by column"""
+    print("🧪 Testing projection...")
+    records = [{'a': 1, 'b': 2, 'c': 3}, {'a': 4, 'd': 5}]
+    assert list(project(records, ('a', 'd'))) == [{'a': 1}, {'a': 4, 'd': 5}]
+    assert records_to_columns(records) == {'a': [1, 4], 'b': [2, None], 'c': [3, None], 'd': [None, 5]}
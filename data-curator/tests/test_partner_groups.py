@@ -0,0 +1,78 @@
+"""
+Tests for the sparse partner-group rollups
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_store import DataStore
+from utils.partner_groups import GroupMembership
+from serve import handle_request
+
+def _expanded() -> pd.DataFrame:
+    df = pd.DataFrame({
+        'hs4': ['0101', '0101', '0101', '8703', '8703', '8703', '2709'],
+        'partner_iso': ['FRA', 'ROM', 'CAN', 'DEU', 'JPN', 'WLD', 'BRA'],
+        'partner_name': ['France', 'Romania', 'Canada', 'Germany', 'Japan', 'World', 'Brazil'],
+        'simple_average': [2.0, 2.0, 2.0, 5.0, 5.0, 5.0, 1.0],
+        'trade_value_total': [100.0, 50.0, 30.0, 200.0, 0.0, 999.0, 10.0],
+    })
+    df['tariff_revenue_estimate'] = df['simple_average'] / 100 * df['trade_value_total']
+    return df
+
+def _membership() -> GroupMembership:
+    return GroupMembership({
+        'EU': ("European Union", ['FRA', 'DEU', 'ROU']),
+        'G7': ("G7", ['CAN', 'FRA', 'DEU', 'JPN']),
+    })
+
+def test_overlapping_groups_match_groupby():
+    """One sparse product gives the same sums as a filter-and-groupby per group"""
+    print("🧪 Testing partner group rollups...")
+    membership = _membership().add_group('EMPTY', ['ZZZ'])
+    rollup = membership.aggregate(_expanded())
+    trade = rollup['trade_value']
+
+    assert list(trade.columns) == ['EU', 'G7', 'EMPTY']
+    # ROM is the legacy WITS code for Romania; the World row never counts
+    assert trade.loc['0101', 'EU'] == 150.0
+    assert trade.loc['0101', 'G7'] == 130.0
+    assert trade.loc['8703', 'G7'] == 200.0
+    assert trade.loc['2709'].sum() == 0.0
+    assert rollup['tariff_revenue'].loc['0101', 'EU'] == 3.0
+    assert rollup['tariff'].loc['8703', 'G7'] == 5.0
+    assert np.isnan(rollup['tariff'].loc['2709', 'EU'])
+    assert np.isnan(rollup['tariff'].loc['0101', 'EMPTY'])
+
+    totals = membership.totals(_expanded()).set_index('group')
+    assert totals.loc['EU', 'records'] == 3 and totals.loc['EU', 'partners'] == 3
+    assert totals.loc['G7', 'trade_value'] == 330.0
+    assert totals.loc['EMPTY', 'records'] == 0
+
+    offsets, groups = membership.matrix(['FRA', 'BRA', 'CAN'])
+    assert offsets.tolist() == [0, 2, 2, 3]
+    assert sorted(groups[:2].tolist()) == [0, 1] and groups[2] == 1
+    print("  ✅ Partner group rollups passed!")
+
+def test_group_routes(tmp_path):
+    """/api/groups lists the blocs and /api/groups/<group> their products"""
+    print("🧪 Testing partner group routes...")
+    _expanded().to_csv(os.path.join(str(tmp_path), 'expanded_summary.csv'), index=False)
+    store = DataStore(str(tmp_path), groups=_membership())
+
+    status, _, body = handle_request(store, 'GET', '/api/groups', {})
+    assert status == 200
+    assert [row['group'] for row in json.loads(body)['data']] == ['EU', 'G7']
+
+    status, _, body = handle_request(store, 'GET', '/api/groups/eu', {})
+    payload = json.loads(body)
+    assert status == 200 and payload['meta']['members'] == ['DEU', 'FRA', 'ROU']
+    assert {row['hs4']: row['trade_value'] for row in payload['data']} == {'0101': 150.0, '8703': 200.0}
+
+    assert handle_request(store, 'GET', '/api/groups/ASEAN', {})[0] == 404
+    print("  ✅ Partner group routes passed!")
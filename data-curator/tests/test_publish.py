@@ -0,0 +1,53 @@
+# test_publish.py
+"""
+Tests for atomic versioned publishing of processed datasets
+"""
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.publish import publish_outputs, current_version, load_manifest, resolve_path, list_versions
+
+def test_publish_versions_and_carry_forward(tmp_path):
+    """Each run gets a version, unchanged files are carried forward"""
+    print("🧪 Testing versioned publish...")
+    root = str(tmp_path)
+    merged = pd.DataFrame({'hs4': ['0102'], 'simple_average': [2.5]})
+    expanded = pd.DataFrame({'hs4': ['0102', '0102'], 'partner_iso': ['CAN', 'MEX']})
+
+    first = publish_outputs({'merged_summary.csv': merged}, root=root)
+    second = publish_outputs({'expanded_summary.csv': expanded, 'expansion_validation.json': {'rows': 2}}, root=root)
+
+    assert current_version(root) == second != first
+    manifest = load_manifest(root=root)
+    assert manifest['parent'] == first
+    assert set(manifest['files']) == {'merged_summary.csv', 'expanded_summary.csv', 'expansion_validation.json'}
+    assert manifest['files']['expanded_summary.csv']['rows'] == 2
+    assert manifest['files']['expansion_validation.json']['rows'] is None
+
+    # Current version and the legacy flat copy both hold the data
+    assert resolve_path('merged_summary.csv', root).endswith(os.path.join(second, 'merged_summary.csv'))
+    assert len(pd.read_csv(os.path.join(root, 'expanded_summary.csv'))) == 2
+
+def test_unchanged_outputs_keep_version(tmp_path):
+    """Republishing identical outputs does not create a new version"""
+    print("🧪 Testing unchanged republish...")
+    root = str(tmp_path)
+    merged = pd.DataFrame({'hs4': ['0102'], 'simple_average': [2.5]})
+
+    first = publish_outputs({'merged_summary.csv': merged}, root=root)
+    assert publish_outputs({'merged_summary.csv': merged}, root=root) == first
+    assert list_versions(root) == [first]
+
+def test_prune_keeps_current(tmp_path):
+    """Old versions are pruned, the current one never is"""
+    print("🧪 Testing version pruning...")
+    root = str(tmp_path)
+    for tariff in range(4):
+        latest = publish_outputs({'merged_summary.csv': pd.DataFrame({'t': [tariff]})}, root=root, keep_versions=2)
+
+    assert len(list_versions(root)) == 2
+    assert latest in list_versions(root)
@@ -0,0 +1,101 @@
+"""
+Tests for the vectorized data-quality rules and the publish gate
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.quality import (
+    QUALITY_FILE,
+    DataQualityError,
+    check_quality,
+    enforce,
+    evaluate,
+    expanded_rules,
+    in_range,
+    unique,
+)
+from utils.publish import list_versions, publish_outputs
+
+def _expanded() -> pd.DataFrame:
+    return pd.DataFrame({
+        'hs4': ['0101', '0101', '85', '2404', '8703'],
+        'partner_iso': ['CAN', 'CAN', 'MEX', 'CHN', 'DEU'],
+        'partner_name': ['Canada', 'Canada', 'Mexico', None, 'Germany'],
+        'trade_value_total': [100.0, 50.0, -5.0, 20.0, 80.0],
+        'tariff_revenue_estimate': [1.0, 0.5, 0.0, 2.0, 2.0],
+        'simple_average': [1.0, 1.0, 2.0, 10.0, 2500.0],
+        'year_x': [2023] * 5,
+        'year_y': [2024, 2024, 2024, 2024, 1900],
+    })
+
+def test_evaluate_counts_and_samples():
+    """Every rule reports its violation count and the offending rows"""
+    print("🧪 Testing rule evaluation...")
+    report = evaluate(_expanded(), expanded_rules(['0101', '0085', '8703']), sample_size=1)
+    results = {r['rule']: r for r in report['results']}
+
+    assert report['rows'] == 5
+    assert results['hs4_format']['violations'] == 1
+    assert results['hs4_format']['sample'] == [{'row': 2, 'hs4': '85'}]
+    assert results['unique_hs4_partner_iso']['violations'] == 2
+    assert len(results['unique_hs4_partner_iso']['sample']) == 1
+    assert results['trade_value_total_range']['violations'] == 1
+    assert results['simple_average_range']['violations'] == 1
+    assert results['year_y_range']['violations'] == 1
+    assert results['year_x_range']['violations'] == 0
+    assert results['partner_name_not_null']['violations'] == 1
+    # '85' and '2404' are both missing from the reference codes
+    assert results['hs4_in_dictionary']['violations'] == 2
+    assert report['violations'] == {'error': 6, 'warning': 3, 'info': 0}
+    assert report['failed_rows'] == 5
+    print("  ✅ Rule evaluation passed!")
+
+def test_gate_fails_on_configured_severities():
+    """Errors stop the publish; warnings only fail when asked to"""
+    print("🧪 Testing quality gate...")
+    clean = _expanded().iloc[[0, 3]].reset_index(drop=True)
+    report = check_quality(clean, expanded_rules(['0101']), "sample")
+    assert report['violations']['error'] == 0
+    assert report['violations']['warning'] == 2
+
+    try:
+        enforce(report, fail_on=('error', 'warning'))
+        assert False, "warnings should fail when configured"
+    except DataQualityError as e:
+        assert 'hs4_in_dictionary (1)' in str(e)
+        assert e.report is report
+
+    try:
+        check_quality(_expanded(), expanded_rules(), "sample")
+        assert False, "errors should fail the gate"
+    except DataQualityError as e:
+        assert 'unique_hs4_partner_iso (2)' in str(e)
+    print("  ✅ Quality gate passed!")
+
+def test_missing_columns_do_not_pass():
+    """A rule whose columns are absent counts every row as a violation"""
+    print("🧪 Testing rules on missing columns...")
+    df = pd.DataFrame({'hs4': ['0101', '0102']})
+    report = evaluate(df, [in_range('simple_average', 0, 1000), unique(['hs4'])])
+    missing, key = report['results']
+    assert missing['violations'] == 2
+    assert missing['missing_columns'] == ['simple_average']
+    assert missing['sample'] == []
+    assert key['violations'] == 0
+    print("  ✅ Missing column handling passed!")
+
+def test_identical_rerun_keeps_published_version(tmp_path):
+    """The published report is deterministic, so an unchanged rerun reuses the version"""
+    print("🧪 Testing quality report determinism...")
+    clean = _expanded().iloc[[0, 3]].reset_index(drop=True)
+    versions = [publish_outputs({'expanded_summary.csv': clean,
+                                 QUALITY_FILE: check_quality(clean, expanded_rules(['0101']), "sample")},
+                                root=str(tmp_path))
+                for _ in range(3)]
+    assert versions[0] == versions[1] == versions[2]
+    assert list_versions(str(tmp_path)) == versions[:1]
+    print("  ✅ Quality report determinism passed!")
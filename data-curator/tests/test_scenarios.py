@@ -0,0 +1,56 @@
+# test_scenarios.py
+"""
+Tests for the batched tariff scenario simulator
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scenarios import Scenario, prepare_baseline, evaluate_scenarios, scenarios_from_records
+
+def make_expanded():
+    """Small expanded dataset with a World aggregate row"""
+    return pd.DataFrame({
+        'hs4': ['7208', '7308', '8517', '8517', '7208'],
+        'partner_iso': ['CHN', 'CHN', 'CHN', 'MEX', 'WLD'],
+        'simple_average': [2.0, 4.0, 0.0, 0.0, 2.0],
+        'trade_value_total': [1000.0, 500.0, 2000.0, 1000.0, 1000.0],
+    })
+
+def test_steel_scenario_on_china():
+    """Raising HS 72/73 by 25 points on CHN only touches those cells"""
+    print("🧪 Testing HS 72/73 +25pp on CHN...")
+    baseline = prepare_baseline(make_expanded())
+    assert baseline.row_count == 4  # WLD aggregate excluded
+
+    results = evaluate_scenarios(baseline, [
+        Scenario(name='steel_chn', hs_prefixes=('72', '73'), partners=('CHN',), rate_change=25.0),
+    ])
+    row = results.iloc[0]
+    assert row['affected_rows'] == 2
+    assert row['affected_trade_value'] == 1500.0
+    assert np.isclose(row['revenue_delta'], 0.25 * 1500.0)
+
+def test_floor_and_batch_match_single_runs():
+    """Batched evaluation matches evaluating each scenario on its own"""
+    print("🧪 Testing batched vs single evaluation...")
+    baseline = prepare_baseline(make_expanded())
+    scenarios = scenarios_from_records([
+        {'name': 'mfn_floor', 'rate_floor': 3.0},
+        {'name': 'double', 'rate_multiplier': 2.0},
+        {'name': 'zero_mex', 'partners': ['MEX'], 'rate_set': 0.0},
+    ])
+
+    batched = evaluate_scenarios(baseline, scenarios, elasticity=-1.0, chunk_size=2)
+    for i, scenario in enumerate(scenarios):
+        single = evaluate_scenarios(baseline, [scenario], elasticity=-1.0)
+        assert np.isclose(batched.loc[i, 'scenario_revenue'], single.loc[0, 'scenario_revenue'])
+
+    floor = batched.set_index('scenario').loc['mfn_floor']
+    assert floor['affected_rows'] == 3
+    assert floor['price_impact_pct'] > 0
+    assert batched.set_index('scenario').loc['zero_mex', 'affected_rows'] == 0
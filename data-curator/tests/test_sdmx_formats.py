@@ -0,0 +1,157 @@
+# test_sdmx_formats.py
+"""
+Tests for SDMX-ML / SDMX-CSV response parsing and automatic format selection (no network)
+"""
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import wits_api
+from api.replay_server import ReplayServer, render_sdmx
+from api.sdmx_formats import (CSV, JSON, XML, FormatError, FormatSelector,
+                              iter_csv_records, iter_records, iter_xml_records)
+from api.wits_api import fetch_tariff_data, fetch_trade_data
+
+RECORDS = [
+    {'Partner': '156', 'ProductCode': '85', 'Year': '2022', 'SimpleAverage': '3.5', 'TariffType': 'MFN'},
+    {'Partner': '76', 'ProductCode': '85', 'Year': '2022', 'SimpleAverage': '1.25', 'TariffType': 'A&B'},
+]
+
+def _chunks(text: str, size: int):
+    body = text.encode('utf-8')
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def test_xml_and_csv_parse_to_json_records():
+    """Compact XML and CSV bodies yield the same records as the JSON path"""
+    print("🧪 Testing SDMX-ML / SDMX-CSV parsing...")
+    for fmt in (XML, CSV):
+        body = render_sdmx(RECORDS, 'TRN', fmt)
+        for size in (5, 4096):
+            assert list(iter_records(_chunks(body, size), fmt, 'TRN')) == RECORDS
+
+    # Series attributes are inherited by every observation
+    xml = ('<DataSet><Series PARTNER="156" PRODUCTCODE="85">'
+           '<Obs TIME_PERIOD="2021" OBS_VALUE="2.0"/><Obs TIME_PERIOD="2022" OBS_VALUE="3.0" MIN_RATE=""/>'
+           '</Series></DataSet>')
+    records = list(iter_xml_records(_chunks(xml, 7), 'TMF'))
+    assert records == [{'Partner': '156', 'ProductCode': '85', 'Year': '2021', 'TradeValue': '2.0'},
+                       {'Partner': '156', 'ProductCode': '85', 'Year': '2022', 'TradeValue': '3.0'}]
+
+    with pytest.raises(FormatError):
+        list(iter_xml_records(_chunks('{"data": []}', 4)))
+    with pytest.raises(FormatError):
+        list(iter_csv_records(_chunks('{"data": []}', 4)))
+
+def test_selector_prefers_smallest_format():
+    """Every format is tried, then the fewest bytes per record wins; rejected formats are skipped"""
+    print("🧪 Testing format selection...")
+    selector = FormatSelector()
+    assert selector.choose('TRN') == JSON
+    selector.observe('TRN', JSON, 900, 3)
+    assert selector.choose('TRN') == XML
+    selector.observe('TRN', XML, 600, 3)
+    selector.mark_unsupported('TRN', CSV)
+    assert selector.choose('TRN') == XML
+    assert selector.choose('TMF') == JSON
+    assert selector.summary()['TRN'] == {JSON: 300.0, XML: 200.0, CSV: None}
+
+def test_auto_format_against_replay_server(monkeypatch):
+    """Auto mode converges on a compact format and the fetched values are unchanged"""
+    print("🧪 Testing automatic format choice...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'auto')
+    monkeypatch.setattr(wits_api, 'format_selector', FormatSelector())
+
+    with ReplayServer() as server:
+        with server.patch_fetchers():
+            tariffs = [fetch_tariff_data(840, 156, "85", 2022) for _ in range(4)]
+            trade = fetch_trade_data(840, 156, "85", 2022)
+            monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+            baseline = fetch_tariff_data(840, 156, "85", 2022)
+
+    assert all(t == baseline for t in tariffs)
+    assert trade is not None
+    assert wits_api.format_selector.choose('TRN') in (XML, CSV)
+
+# WITS TRN responses for 840 -> 124 (data in every format), 840 -> 156 (data in JSON only:
+# an SDMX-ML data set without <Obs>, a header-only SDMX-CSV) and 840 -> 4 (no data at all).
+# Same layout as record_responses output; refresh with
+#   record_responses([tariff_url(840, p, "020110", 2022, fmt) for p in (124, 156, 4)
+#                     for fmt in (JSON, XML, CSV)], FORMAT_FIXTURES)
+FORMAT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "wits_formats.json")
+
+def _fixture_server() -> ReplayServer:
+    return ReplayServer.from_file(FORMAT_FIXTURES)
+
+def test_wits_format_fixtures_parse_alike(monkeypatch):
+    """Every format of the recorded Canada response gives the same tariff"""
+    print("🧪 Testing WITS format fixtures...")
+    values = {}
+    with _fixture_server() as server:
+        with server.patch_fetchers():
+            for fmt in (JSON, XML, CSV):
+                monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', fmt)
+                values[fmt] = fetch_tariff_data(840, 124, "020110", 2022)
+    assert values[JSON] is not None and values[JSON].simple_average == 4.4
+    assert values[XML] == values[CSV] == values[JSON]
+
+def test_empty_format_response_is_checked_against_json(monkeypatch):
+    """0 records in XML/CSV is not taken as "no data" while JSON has the record"""
+    print("🧪 Testing empty compact responses...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'auto')
+    monkeypatch.setattr(wits_api, 'format_selector', FormatSelector())
+
+    with _fixture_server() as server:
+        with server.patch_fetchers():
+            assert fetch_tariff_data(840, 124, "020110", 2022) is not None  # JSON first
+            assert wits_api.format_selector.choose('TRN') == XML
+            xml_pick = fetch_tariff_data(840, 156, "020110", 2022)
+            assert wits_api.format_selector.choose('TRN') == CSV
+            csv_pick = fetch_tariff_data(840, 156, "020110", 2022)
+            monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+            baseline = fetch_tariff_data(840, 156, "020110", 2022)
+
+    assert baseline is not None and baseline.simple_average == 26.4
+    assert xml_pick == csv_pick == baseline
+    assert wits_api.format_selector.summary()['TRN'][XML] is None
+    assert wits_api.format_selector.choose('TRN') == JSON
+
+def test_unproven_format_is_dropped_after_confirmed_empties(monkeypatch):
+    """Empty cells stay empty, and a format that never returns records stops being chosen"""
+    print("🧪 Testing unproven formats...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'auto')
+    monkeypatch.setattr(wits_api, 'format_selector', FormatSelector(max_empty=2))
+
+    with _fixture_server() as server:
+        with server.patch_fetchers():
+            assert fetch_tariff_data(840, 124, "020110", 2022) is not None
+            assert fetch_tariff_data(840, 4, "020110", 2022) is None
+            assert wits_api.format_selector.choose('TRN') == XML  # One confirmed empty: still unproven
+            assert fetch_tariff_data(840, 4, "020110", 2022) is None
+            assert wits_api.format_selector.choose('TRN') == CSV
+        stats = server.stats()
+
+    assert stats['replayed'] == stats['requests'] == 5  # Each XML answer re-checked as JSON
+
+def test_proven_format_empty_response_is_trusted(monkeypatch):
+    """Once a format has returned records, its empty answers cost no extra JSON request"""
+    print("🧪 Testing empty responses from a proven format...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'auto')
+    monkeypatch.setattr(wits_api, 'format_selector', FormatSelector())
+    wits_api.format_selector.mark_unsupported('TRN', CSV)
+
+    with _fixture_server() as server:
+        with server.patch_fetchers():
+            assert fetch_tariff_data(840, 124, "020110", 2022) is not None  # JSON
+            assert fetch_tariff_data(840, 124, "020110", 2022) is not None  # XML, now proven
+            assert wits_api.format_selector.is_proven('TRN', XML)
+            # One small record favours JSON; on real batches XML is the cheaper format
+            wits_api.format_selector.observe('TRN', JSON, 100_000, 0)
+            assert wits_api.format_selector.choose('TRN') == XML
+            before = server.stats()['requests']
+            assert fetch_tariff_data(840, 4, "020110", 2022) is None
+            assert server.stats()['requests'] == before + 1
@@ -0,0 +1,64 @@
+# test_shards.py
+"""
+Tests for the per-product and per-partner frontend shards
+"""
+import json
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.shards import build_shards, write_shards, MANIFEST_FILE
+
+def _expanded() -> pd.DataFrame:
+    return pd.DataFrame({
+        'hs4': ['0102', '0102', '0102', '8703', '8703'],
+        'partner_iso': ['WLD', 'CAN', 'MEX', 'WLD', 'CAN'],
+        'partner_name': ['World', 'Canada', None, 'World', 'Canada'],
+        'simple_average': [2.5, 2.5, 2.5, 1.123456, 1.123456],
+        'trade_value_total': [300.0, 100.0, 200.0, 5000.0, 5000.0],
+        'tariff_revenue_estimate': [7.5, 2.5, 5.0, 56.1728, 56.1728],
+        'category': ['Live animals & animal products'] * 3 + ['Vehicles other than railway or tramway rolling stock'] * 2,
+    })
+
+def test_shard_contents():
+    """Column-oriented slices per HS4 and partner, World excluded from the totals"""
+    print("🧪 Testing shard contents...")
+    files = build_shards(_expanded())
+    assert set(files) == {'partners.json', 'products.json', 'hs4/0102.json', 'hs4/8703.json',
+                          'partner/WLD.json', 'partner/CAN.json', 'partner/MEX.json'}
+
+    product = json.loads(files['hs4/0102.json'])
+    assert product['hs4'] == '0102' and product['rows'] == 3
+    assert product['partner_iso'] == ['CAN', 'MEX', 'WLD']
+    assert product['trade_value_total'] == [100, 200, 300]
+
+    partners = json.loads(files['partners.json'])
+    assert partners['partner_iso'] == ['CAN', 'MEX']  # Largest first, no WLD
+    assert partners['trade_value_total'] == [5100, 200]
+    assert partners['avg_tariff'][0] == round((2.5 + 1.123456) / 2, 4)
+    assert partners['name'] == ['Canada', 'MEX']  # Missing names fall back to the ISO code
+    assert partners['rank'] == [1, 2]
+
+    assert b' ' not in files['partner/CAN.json']  # Minified
+
+def test_write_shards_incremental(tmp_path):
+    """Manifest lists sizes and hashes; unchanged files are kept, stale shards removed"""
+    print("🧪 Testing shard writing...")
+    out_dir = str(tmp_path / "shards")
+    df = _expanded()
+
+    manifest = write_shards(df, out_dir, version="v1")
+    with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+        assert json.load(f) == manifest
+    entry = manifest['files']['hs4/8703.json']
+    assert entry['bytes'] == os.path.getsize(os.path.join(out_dir, 'hs4', '8703.json'))
+    assert len(entry['sha256']) == 64
+
+    mtime = os.path.getmtime(os.path.join(out_dir, 'hs4', '0102.json'))
+    second = write_shards(df[df['hs4'] == '0102'], out_dir, version="v2")
+    assert os.path.getmtime(os.path.join(out_dir, 'hs4', '0102.json')) == mtime
+    assert not os.path.exists(os.path.join(out_dir, 'hs4', '8703.json'))
+    assert second['hs4'] == ['0102'] and second['hash'] != manifest['hash']
@@ -0,0 +1,104 @@
+# test_sketches.py
+"""
+Tests for the mergeable quantile, heavy-hitter and distinct-count sketches
+"""
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_store import DataStore
+from utils.sketches import (HyperLogLog, KLLSketch, SpaceSaving, SKETCH_FILE,
+                            load_sketch, sketch_csv, sketch_document)
+from serve import handle_request
+
+def test_kll_merged_partitions():
+    """Quantiles of merged partition sketches stay within ~1% rank error"""
+    print("🧪 Testing KLL quantiles...")
+    values = np.random.default_rng(7).lognormal(size=50_000)
+    merged = KLLSketch()
+    for part in np.array_split(values, 10):
+        sketch = KLLSketch()
+        sketch.update(part)
+        merged.merge(KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict()))))
+
+    assert merged.count == len(values)
+    assert merged.quantile(0) == values.min() and merged.quantile(1) == values.max()
+    for q in (0.1, 0.5, 0.9):
+        assert abs((values <= merged.quantile(q)).mean() - q) < 0.02
+    assert sum(len(items) for items in merged.levels) < 1000  # Bounded size
+
+def test_space_saving_and_hll():
+    """Heavy hitters are found with a valid lower bound; distinct counts are close"""
+    print("🧪 Testing heavy hitters and distinct counts...")
+    rng = np.random.default_rng(3)
+    items = np.concatenate([np.repeat(['CAN', 'MEX', 'CHN'], [5000, 3000, 2000]),
+                            rng.integers(0, 5000, 20_000).astype(str)])
+    halves = np.array_split(rng.permutation(items), 2)
+    sketches = []
+    for half in halves:
+        sketch = SpaceSaving(capacity=32)
+        sketch.update_many(half)
+        sketches.append(sketch)
+    top = sketches[0].merge(sketches[1]).top(3)
+    assert [entry['item'] for entry in top] == ['CAN', 'MEX', 'CHN']
+    assert top[0]['lower_bound'] <= 5000 <= top[0]['estimate']
+
+    hll_a, hll_b = HyperLogLog(), HyperLogLog()
+    hll_a.update_many(range(0, 30_000))
+    hll_b.update_many(range(20_000, 50_000))
+    assert abs(hll_a.merge(hll_b).estimate() - 50_000) < 50_000 * 0.05
+    small = HyperLogLog()
+    small.update_many(['CAN', 'MEX', 'CAN'])
+    assert small.estimate() == 2
+
+def _expanded() -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    n = 2000
+    return pd.DataFrame({
+        'hs4': rng.integers(1000, 1100, n).astype(str),
+        'partner_iso': rng.choice(['CAN', 'MEX', 'CHN', 'DEU', 'JPN', 'WLD'], n),
+        'simple_average': rng.uniform(0, 30, n).round(2),
+        'trade_value_total': rng.lognormal(12, 2, n),
+        'Reporter_ISO_N': 840,
+        'year_y': rng.choice([2023, 2024], n),
+    })
+
+def test_document_partitions_and_route(tmp_path):
+    """Per-partition sketches merge to the dataset summary and are served by /api/stats"""
+    print("🧪 Testing published sketches...")
+    df = _expanded()
+    bilateral = df[df['partner_iso'] != 'WLD']
+    document = sketch_document(df)
+    assert sorted(document['partitions']) == ['840-2023', '840-2024']
+
+    summary = document['summary']
+    assert summary['rows'] == len(bilateral)
+    assert abs(summary['tariff']['mean'] - bilateral['simple_average'].mean()) < 1e-9
+    assert abs(summary['tariff']['median'] - bilateral['simple_average'].median()) < 1.0
+    top_partner = bilateral.groupby('partner_iso')['trade_value_total'].sum().idxmax()
+    assert summary['top']['partners'][0]['item'] == top_partner
+    assert summary['distinct']['partners'] == 5
+
+    one_year = load_sketch(document, ['840-2024']).summary()
+    assert one_year['rows'] == int((bilateral['year_y'] == 2024).sum())
+
+    # Chunked CSV sketching gives the same exact stats
+    csv_path = str(tmp_path / "expanded_summary.csv")
+    df.to_csv(csv_path, index=False)
+    chunked = sketch_csv(csv_path, chunksize=300).summary()
+    assert chunked['rows'] == summary['rows']
+    assert abs(chunked['trade_value']['total'] / summary['trade_value']['total'] - 1) < 1e-9
+
+    with open(tmp_path / SKETCH_FILE, 'w') as f:
+        json.dump(document, f)
+    store = DataStore(str(tmp_path))
+    status, _, body = handle_request(store, 'GET', '/api/stats', {})
+    assert status == 200 and json.loads(body)['data']['rows'] == summary['rows']
+    status, _, body = handle_request(store, 'GET', '/api/stats/840-2023,840-2024', {})
+    assert json.loads(body)['data']['distinct']['partners'] == 5
+    assert handle_request(store, 'GET', '/api/stats/999-2000', {})[0] == 404
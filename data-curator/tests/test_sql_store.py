@@ -0,0 +1,54 @@
+# test_sql_store.py
+"""
+Tests for the embedded SQL store loader
+"""
+import json
+import os
+import sqlite3
+import sys
+import pandas as pd
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sql_store import load_sql_store
+
+def test_load_tables_and_indexes(tmp_path):
+    """Tables are loaded with zero-padded codes and queries use the indexes"""
+    print("🧪 Testing SQL store load...")
+    root = str(tmp_path)
+    pd.DataFrame({
+        'hs4': ['0102', '0102', '8517'], 'partner_iso': ['CAN', 'MEX', 'CAN'], 'year_y': [2024] * 3,
+        'simple_average': [2.5, 2.5, None], 'trade_value_total': [60.0, 40.0, 200.0],
+        'category_code': ['01', '01', '85'],
+    }).to_csv(os.path.join(root, 'expanded_summary.csv'), index=False)
+    with open(os.path.join(root, 'hs_dictionary.json'), 'w') as f:
+        json.dump({'0102': 'Live bovine animals'}, f)
+
+    counts = load_sql_store(root)
+    assert counts == {'expanded_summary': 3, 'hs_dictionary': 1}
+
+    conn = sqlite3.connect(os.path.join(root, 'tariffic.db'))
+    rows = conn.execute("SELECT hs4, category_code, simple_average FROM expanded_summary "
+                        "WHERE partner_iso = 'CAN' ORDER BY hs4").fetchall()
+    assert rows == [('0102', '01', 2.5), ('8517', '85', None)]
+
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM expanded_summary "
+                        "WHERE hs4 = '0102' AND partner_iso = 'CAN' AND year_y = 2024").fetchall()
+    assert 'USING INDEX' in plan[0][-1]
+    conn.close()
+
+def test_only_code_columns_are_padded(tmp_path):
+    """category_summary.hs4 is a product count and stays INTEGER; its hs2 codes are padded"""
+    print("🧪 Testing per-table code columns...")
+    root = str(tmp_path)
+    pd.DataFrame({'hs2': [1, 85], 'simple_average': [0.8, 2.1], 'trade_value_total': [5.0, 9.0],
+                  'hs4': [6, 12]}).to_csv(os.path.join(root, 'category_summary.csv'), index=False)
+
+    assert load_sql_store(root) == {'category_summary': 2}
+    conn = sqlite3.connect(os.path.join(root, 'tariffic.db'))
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(category_summary)")}
+    assert types['hs4'] == 'INTEGER' and types['hs2'] == 'TEXT'
+    assert conn.execute("SELECT hs2, hs4 FROM category_summary ORDER BY hs4 DESC").fetchall() == [('85', 12), ('01', 6)]
+    assert conn.execute("SELECT SUM(hs4) FROM category_summary").fetchone() == (18,)
+    conn.close()
@@ -0,0 +1,60 @@
+# test_telemetry.py
+"""
+Tests for fetch-layer telemetry (replay server, no network)
+"""
+import json
+import os
+import sys
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import wits_api
+from api.replay_server import ReplayServer
+from api.telemetry import Histogram, Metrics, endpoint_name, metrics, start_reporter
+
+def test_histogram_and_registry():
+    """Histograms bucket values; cache ratios derive from hit/miss counters"""
+    print("🧪 Testing metrics registry...")
+    histogram = Histogram()
+    for value in (3, 4, 40, 400, 500000):
+        histogram.observe(value)
+    summary = histogram.to_dict()
+    assert summary['count'] == 5 and summary['max'] == 500000
+    assert summary['p50'] == 50 and summary['p99'] == 500000
+    assert summary['buckets'] == {'le_5': 2, 'le_50': 1, 'le_500': 1, 'inf': 1}
+
+    registry = Metrics()
+    for hit in (True, True, False, True):
+        registry.record_cache('catalog', hit)
+    registry.record_backoff("https://wits.worldbank.org/API/V1/SDMX/V21/datasource/TRN/x", 5)
+    snap = registry.snapshot()
+    assert snap['cache_hit_ratio'] == {'catalog': 0.75}
+    assert snap['counters']['backoff_s{endpoint=wits.TRN}'] == 5
+
+    assert endpoint_name("https://wits.worldbank.org/API/V1/wits/datasource/trn/product/ALL") == 'wits.metadata'
+    assert endpoint_name("https://comtradeapi.un.org/data/v1/get/bilateral") == 'comtrade'
+
+def test_fetchers_record_metrics(tmp_path, monkeypatch):
+    """Requests, statuses, bytes and 403 backoff are counted; the reporter writes JSON"""
+    print("🧪 Testing fetch telemetry...")
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+    metrics.reset()
+    report_path = str(tmp_path / "metrics.json")
+    reporter = start_reporter(report_path, interval=60)
+
+    with ReplayServer(rate_limit=1, rate_window=0.2) as server:
+        with server.patch_fetchers(rate_limit_wait=0.25):
+            wits_api.fetch_tariff_data(840, 156, "85", 2022)
+            wits_api.fetch_tariff_data(840, 76, "85", 2022)
+    reporter.stop()
+
+    with open(report_path) as f:
+        report = json.load(f)
+    counters = report['counters']
+    assert counters['requests{endpoint=wits.TRN,status=200}'] == 2
+    assert counters['requests{endpoint=wits.TRN,status=403}'] >= 1
+    assert counters['retries{endpoint=wits.TRN}'] >= 1
+    assert counters['bytes{endpoint=wits.TRN}'] > 0
+    assert report['histograms']['latency_ms{endpoint=wits.TRN}']['count'] >= 3
+    assert report['cache_hit_ratio']['inflight'] == 0.0
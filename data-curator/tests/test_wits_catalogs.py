@@ -0,0 +1,78 @@
+# test_wits_catalogs.py
+"""
+Tests for the WitsApi metadata client and its catalog cache (local server, no network)
+"""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import wits_catalogs
+from api.wits_api import WitsApi
+
+DOCUMENTS = {
+    '/product/ALL': b"""<?xml version="1.0" encoding="utf-8"?>
+<wits:datasource xmlns:wits="http://wits.worldbank.org"><wits:products>
+  <wits:product productcode="8507" isgroup="No"><wits:productdescription>Electric accumulators</wits:productdescription></wits:product>
+  <wits:product productcode="0101" isgroup="No"><wits:productdescription>Live horses</wits:productdescription></wits:product>
+</wits:products></wits:datasource>""",
+    '/country/ALL': b"""<?xml version="1.0" encoding="utf-8"?>
+<wits:datasource xmlns:wits="http://wits.worldbank.org"><wits:countries>
+  <wits:country countrycode="156" isreporter="1" ispartner="1"><wits:iso3Code>CHN</wits:iso3Code><wits:name>China</wits:name></wits:country>
+  <wits:country countrycode="076" isreporter="0" ispartner="1"><wits:iso3Code>BRA</wits:iso3Code><wits:name>Brazil</wits:name></wits:country>
+</wits:countries></wits:datasource>""",
+}
+REQUESTS = []
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        REQUESTS.append(self.path)
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = DOCUMENTS.get(self.path)
+        self.send_response(200 if body else 404)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body or b'')))
+        self.end_headers()
+        self.wfile.write(body or b'')
+
+    def log_message(self, format, *args):
+        pass
+
+def test_catalogs_are_cached_and_versioned(tmp_path, monkeypatch):
+    """Catalogs download once, resolve codes, and revalidate with a 304 when stale"""
+    print("🧪 Testing WITS catalog cache...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(wits_catalogs, 'METADATA_BASE', f"http://127.0.0.1:{server.server_address[1]}")
+    cache_dir = str(tmp_path / "catalogs")
+
+    try:
+        api = WitsApi(cache_dir=cache_dir)
+        assert api.product_name("8507") == "Electric accumulators"
+        assert api.product_name("9999") is None
+        assert list(api.get_products().index) == ["0101", "8507"]  # Codes stay text
+        assert api.country("CHN")['name'] == "China"
+        assert api.country(76)['iso3code'] == "BRA"
+        assert list(api.get_reporters()['iso3code']) == ["CHN"]
+        version = api.catalogs.version('products')
+        assert REQUESTS == ['/product/ALL', '/country/ALL']
+
+        # A second client reads the fresh cache without any request
+        again = WitsApi(cache_dir=cache_dir)
+        assert again.product_name("0101") == "Live horses"
+        assert len(REQUESTS) == 2
+
+        # A stale cache is revalidated (304) and keeps its version
+        stale = WitsApi(cache_dir=cache_dir, max_age=0)
+        assert stale.get_products().loc["8507", "productdescription"] == "Electric accumulators"
+        assert len(REQUESTS) == 3
+        assert stale.catalogs.version('products') == version
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,111 @@
+# test_wits_concurrency.py
+"""
+Tests for concurrent tariff+trade fetching and in-flight request coalescing
+(uses a fake HTTP session, no network access)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import wits_api
+from api.endpoint_health import HealthRegistry
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+    def iter_content(self, chunk_size=1):
+        body = json.dumps(self._payload).encode('utf-8')
+        for i in range(0, len(body), 16):
+            yield body[i:i + 16]
+
+    def close(self):
+        pass
+
+class FakeSession:
+    """Answers TRN/TMF URLs after a fixed delay and counts calls per URL"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, **kwargs):
+        with self._lock:
+            self.calls[url] = self.calls.get(url, 0) + 1
+        time.sleep(self.delay)
+        if '/TRN/' in url:
+            return FakeResponse({'data': [{'SimpleAverage': '2.5', 'TariffType': 'MFN', 'TotalNoOfLines': '10'}]})
+        return FakeResponse({'data': [{'TradeValue': '3', 'Quantity': '7', 'Unit': 'KG'}]})
+
+def test_combined_legs_run_concurrently(monkeypatch):
+    """Combined fetch takes one round-trip, not two"""
+    print("🧪 Testing concurrent tariff+trade legs...")
+    session = FakeSession(delay=0.3)
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+    monkeypatch.setattr(wits_api, 'endpoint_health', HealthRegistry(wits_api.MAX_WORKERS))
+    monkeypatch.setattr(wits_api, '_session', session)
+
+    start = time.perf_counter()
+    record = wits_api.fetch_combined_data(840, 156, "85", 2022)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.55
+    assert record['simple_average'] == 2.5 and record['trade_value_usd'] == 3000.0
+    assert len(session.calls) == 2
+
+def test_cell_record_legs_run_concurrently(monkeypatch):
+    """The job runner's fetch also takes one round-trip, and still raises on errors"""
+    print("🧪 Testing concurrent legs for job cells...")
+    session = FakeSession(delay=0.3)
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+    monkeypatch.setattr(wits_api, 'endpoint_health', HealthRegistry(wits_api.MAX_WORKERS))
+    monkeypatch.setattr(wits_api, '_session', session)
+
+    start = time.perf_counter()
+    record = wits_api.fetch_cell_record((840, 156, "85", 2022))
+    assert time.perf_counter() - start < 0.55
+    assert record['simple_average'] == 2.5 and record['trade_value_usd'] == 3000.0
+    assert len(session.calls) == 2
+
+    class FailingTrade(FakeSession):
+        def get(self, url, timeout=None, **kwargs):
+            if '/TMF/' in url:
+                raise requests.exceptions.ConnectionError("trade leg down")
+            return super().get(url, timeout, **kwargs)
+
+    monkeypatch.setattr(wits_api, '_session', FailingTrade(delay=0.1))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        wits_api.fetch_cell_record((840, 156, "85", 2023))
+
+def test_identical_requests_are_coalesced(monkeypatch):
+    """Concurrent callers and duplicate cells share one request per URL"""
+    print("🧪 Testing request coalescing...")
+    session = FakeSession(delay=0.2)
+    monkeypatch.setattr(wits_api, 'RESPONSE_FORMAT', 'json')
+    monkeypatch.setattr(wits_api, 'endpoint_health', HealthRegistry(wits_api.MAX_WORKERS))
+    monkeypatch.setattr(wits_api, '_session', session)
+
+    cell = (840, 156, "85", 2022)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(wits_api.fetch_combined_batch, [cell, cell]) for _ in range(4)]
+        results = [f.result() for f in futures]
+
+    assert all(r[0] == results[0][0] for r in results)
+    assert set(session.calls.values()) == {1}
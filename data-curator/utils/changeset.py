@@ -0,0 +1,178 @@
+# changeset.py
+"""
+Delta/changelog between two versions of the expanded dataset.
+
+Rows are matched on (hs4, partner_iso, year_y) - one row per partner trade flow.
+The diff is computed with one keyed outer merge and column-wise vectorized
+comparisons, and the resulting changeset only carries what moved:
+
+    {
+      "key": ["hs4", "partner_iso", "year_y"],
+      "inserts": [{...full row...}],
+      "updates": [{"key": [...], "changes": {"simple_average": 2.5}}],
+      "deletes": [[...key...]],
+      "summary": {"inserts": 1, "updates": 1, "deletes": 0, "unchanged": 9186}
+    }
+
+`apply_changeset` turns the previous dataset plus a changeset back into the new one.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ['hs4', 'partner_iso', 'year_y']
+CHANGESET_FILE = "expanded_changeset.json"
+
+def _python_value(value):
+    """numpy/pandas scalar -> JSON-friendly python value"""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _normalize_keys(df: pd.DataFrame, key: Sequence[str]) -> pd.DataFrame:
+    """hs4 as a 4-character string so '0102' and 102 (int-parsed CSV) match"""
+    df = df.copy()
+    if 'hs4' in key:
+        df['hs4'] = df['hs4'].astype(str).str.zfill(4)
+    return df
+
+def _differs(old: pd.Series, new: pd.Series, rtol: float, atol: float) -> np.ndarray:
+    """Vectorized per-row inequality (NaN == NaN, numeric columns within tolerance)"""
+    old_missing = old.isna().to_numpy()
+    new_missing = new.isna().to_numpy()
+
+    if pd.api.types.is_numeric_dtype(old) and pd.api.types.is_numeric_dtype(new):
+        old_values = old.to_numpy(dtype=np.float64, na_value=np.nan)
+        new_values = new.to_numpy(dtype=np.float64, na_value=np.nan)
+        equal = np.isclose(old_values, new_values, rtol=rtol, atol=atol)
+    else:
+        equal = (old.astype(str) == new.astype(str)).to_numpy()
+
+    return ~((old_missing & new_missing) | (~old_missing & ~new_missing & equal))
+
+def diff_datasets(old_df: pd.DataFrame, new_df: pd.DataFrame,
+                  key: Sequence[str] = KEY_COLUMNS,
+                  rtol: float = 1e-9, atol: float = 1e-9) -> Dict:
+    """
+    Diff two versions of a keyed dataset
+
+    Args:
+        old_df: Previously published dataset
+        new_df: Newly computed dataset
+        key: Columns identifying a row (must be unique in both frames)
+        rtol, atol: Tolerances for numeric comparisons
+
+    Returns:
+        Changeset dict with inserts, updates (changed columns only) and deletes
+    """
+    key = list(key)
+    old_df = _normalize_keys(old_df, key)
+    new_df = _normalize_keys(new_df, key)
+
+    for name, df in (('old', old_df), ('new', new_df)):
+        if df.duplicated(key).any():
+            raise ValueError(f"{name} dataset has duplicate rows for key {key}")
+
+    value_columns = [c for c in new_df.columns if c not in key]
+    shared_columns = [c for c in value_columns if c in old_df.columns]
+
+    joined = old_df.merge(new_df, on=key, how='outer', suffixes=('__old', ''), indicator=True)
+    side = joined['_merge'].to_numpy()
+
+    inserts = joined.loc[side == 'right_only', key + value_columns]
+    deletes = joined.loc[side == 'left_only', key]
+    both = joined[side == 'both']
+
+    # One boolean matrix (rows x columns) of changed cells
+    if shared_columns and not both.empty:
+        changed = np.column_stack([
+            _differs(both[f"{c}__old"], both[c], rtol, atol)
+            for c in shared_columns
+        ])
+    else:
+        changed = np.zeros((len(both), 0), dtype=bool)
+    # Columns that only exist in the new dataset count as changed on every row
+    added_columns = [c for c in value_columns if c not in old_df.columns]
+    if added_columns:
+        changed = np.column_stack([changed, np.ones((len(both), len(added_columns)), dtype=bool)])
+    compared_columns = shared_columns + added_columns
+
+    updated_rows = changed.any(axis=1) if changed.size else np.zeros(len(both), dtype=bool)
+    updates = []
+    if updated_rows.any():
+        updated = both[updated_rows]
+        key_values = updated[key].to_numpy(dtype=object)
+        new_values = updated[compared_columns].to_numpy(dtype=object)
+        for row_keys, row_values, row_changed in zip(key_values, new_values, changed[updated_rows]):
+            updates.append({
+                'key': [_python_value(v) for v in row_keys],
+                'changes': {compared_columns[j]: _python_value(row_values[j]) for j in np.flatnonzero(row_changed)},
+            })
+
+    return {
+        'key': key,
+        'inserts': [{k: _python_value(v) for k, v in row.items()} for row in inserts.to_dict(orient='records')],
+        'updates': updates,
+        'deletes': [[_python_value(v) for v in row] for row in deletes.to_numpy(dtype=object)],
+        'summary': {
+            'inserts': len(inserts),
+            'updates': len(updates),
+            'deletes': len(deletes),
+            'unchanged': int(len(both) - updated_rows.sum()),
+        },
+    }
+
+def apply_changeset(old_df: pd.DataFrame, changeset: Dict) -> pd.DataFrame:
+    """
+    Apply a changeset produced by diff_datasets to the previous dataset
+
+    Args:
+        old_df: Dataset the changeset was computed against
+        changeset: Output of diff_datasets (or its JSON round-trip)
+
+    Returns:
+        The new dataset (row order: surviving old rows, then inserts)
+    """
+    key = list(changeset['key'])
+    df = _normalize_keys(old_df, key).set_index(key)
+
+    if changeset['deletes']:
+        delete_index = pd.MultiIndex.from_tuples([tuple(k) for k in changeset['deletes']], names=key)
+        df = df[~df.index.isin(delete_index)]
+
+    if changeset['updates']:
+        # Group updates by the set of changed columns so each group is one vectorized assignment
+        groups: Dict[tuple, List[Dict]] = {}
+        for update in changeset['updates']:
+            groups.setdefault(tuple(update['changes']), []).append(update)
+
+        for columns, updates in groups.items():
+            index = pd.MultiIndex.from_tuples([tuple(u['key']) for u in updates], names=key)
+            values = pd.DataFrame([u['changes'] for u in updates], index=index)
+            for col in columns:
+                if col not in df.columns:
+                    df[col] = np.nan
+                if not pd.api.types.is_numeric_dtype(df[col]) or not pd.api.types.is_numeric_dtype(values[col]):
+                    df[col] = df[col].astype(object)
+                df.loc[index, col] = values[col].to_numpy()
+
+    df = df.reset_index()
+    if changeset['inserts']:
+        inserts = _normalize_keys(pd.DataFrame(changeset['inserts']), key)
+        df = pd.concat([df, inserts], ignore_index=True)
+
+    ordered = [c for c in old_df.columns if c in df.columns]
+    df = df[ordered + [c for c in df.columns if c not in ordered]]
+
+    # Object columns introduced by mixed-type assignment go back to the original dtypes
+    for col in df.columns:
+        if col in old_df.columns and df[col].dtype != old_df[col].dtype:
+            try:
+                df[col] = df[col].astype(old_df[col].dtype)
+            except (TypeError, ValueError):
+                pass
+
+    return df
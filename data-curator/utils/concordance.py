@@ -0,0 +1,309 @@
+# concordance.py
+"""
+HS nomenclature concordance (HS2012 ↔ HS2017 ↔ HS2022).
+
+Tariff schedules and trade flows can be reported in different HS revisions,
+and truncating codes to HS4 silently mixes them (e.g. HS2022 heading 2404 did
+not exist in HS2017). A Concordance holds one correlation table as an indexed
+sparse mapping. Edges are sorted by source code, with per-source offsets and
+one weight per edge; the weights of each source code sum to 1. Whole columns
+convert with array operations and no per-row lookups:
+
+    conc = load_concordance('HS2017', 'HS2022')     # data/raw/concordance/HS2017_HS2022.csv
+    conc = conc.reweight(trade_2022_by_hs6)         # split 1:n codes by observed trade
+    flows_2022 = conc.convert_frame(flows_2017, 'ProductCode', value_columns=['trade_value'])
+
+One-to-many and many-to-many splits duplicate the row once per target code.
+Value columns are multiplied by the edge weight, so totals are preserved;
+rates and labels are copied. Tables are the UN Statistics Division /
+WITS correlation tables saved as CSV. Their "HS 2017" / "HS 2022" style
+headers are detected automatically, and an optional weight column is
+honoured. Without weights a source code is split equally across its targets.
+Revisions chain with compose(), e.g. HS2012 → HS2017 → HS2022.
+"""
+import os
+import re
+import sys
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/concordance.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONCORDANCE_DIR = "data/raw/concordance"
+REVISIONS = ['HS2012', 'HS2017', 'HS2022']
+
+# What to do with codes missing from the table
+KEEP, DROP, RAISE = 'keep', 'drop', 'raise'
+
+def normalize_hs_code(codes: pd.Series) -> pd.Series:
+    """
+    Digit-only HS code strings, restoring a leading zero lost to int parsing
+
+    HS codes always have an even number of digits, so "10121" becomes "010121".
+    """
+    positions, uniques = pd.factorize(codes, use_na_sentinel=False)
+    digits = pd.Series(uniques, dtype=object).astype(str).fillna("").str.replace(r'\.0$', '', regex=True) \
+        .str.replace(r'\D', '', regex=True)
+    odd = digits.str.len() % 2 == 1
+    digits = digits.where(~odd, "0" + digits)
+    return pd.Series(digits.to_numpy(dtype=object)[positions], index=codes.index, name=codes.name)
+
+def _revision_column(columns: Sequence[str], revision: str) -> Optional[str]:
+    """Column whose header names the revision year (e.g. "HS 2017 Code" for HS2017)"""
+    year = re.sub(r'\D', '', revision)
+    matches = [c for c in columns if re.search(rf'(?:^|\D){year}(?:\D|$)', str(c))]
+    return matches[0] if len(matches) == 1 else None
+
+class Concordance:
+    """Sparse source → target code mapping with per-edge allocation weights"""
+
+    def __init__(self, source: str, target: str, from_codes: Sequence[str], to_codes: Sequence[str],
+                 weights: Optional[Sequence[float]] = None):
+        edges = pd.DataFrame({
+            'from': normalize_hs_code(pd.Series(list(from_codes), dtype=object)),
+            'to': normalize_hs_code(pd.Series(list(to_codes), dtype=object)),
+            'weight': np.ones(len(from_codes)) if weights is None else np.asarray(weights, dtype=float),
+        })
+        edges = edges[(edges['from'] != "") & (edges['to'] != "")]
+        edges = edges.groupby(['from', 'to'], sort=True, as_index=False)['weight'].sum()
+
+        self.source = source
+        self.target = target
+        self.sources = pd.Index(edges['from'].unique())
+        self.targets = pd.Index(np.sort(edges['to'].unique()))
+        self.edge_source = self.sources.get_indexer(edges['from'])
+        self.edge_target = self.targets.get_indexer(edges['to'])
+        self.weights = self._normalized(edges['weight'].to_numpy(dtype=float))
+        # Edges are sorted by source: source i owns edges offsets[i]:offsets[i + 1]
+        self.offsets = np.searchsorted(self.edge_source, np.arange(len(self.sources) + 1))
+        # Code length of the table (6 for the UN HS6 tables); longer national lines map by prefix
+        lengths = self.sources.str.len()
+        self.digits = int(lengths.max()) if len(lengths) else 6
+
+    def _normalized(self, weights: np.ndarray) -> np.ndarray:
+        """Scale weights so each source code sums to 1 (equal split where all are 0)"""
+        weights = np.where(np.isfinite(weights) & (weights > 0), weights, 0.0)
+        totals = np.bincount(self.edge_source, weights=weights, minlength=len(self.sources))
+        fanout = np.bincount(self.edge_source, minlength=len(self.sources))
+        equal = totals[self.edge_source] == 0
+        return np.where(equal, 1.0 / fanout[self.edge_source],
+                        weights / np.where(equal, 1.0, totals[self.edge_source]))
+
+    def __len__(self):
+        return len(self.edge_source)
+
+    def __repr__(self):
+        return (f"Concordance({self.source} → {self.target}: {len(self.sources):,} codes, "
+                f"{len(self):,} edges)")
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, source: str, target: str,
+                   from_column: Optional[str] = None, to_column: Optional[str] = None,
+                   weight_column: Optional[str] = None) -> 'Concordance':
+        """
+        Build from a correlation table
+
+        Args:
+            table: One row per (source code, target code) pair
+            source, target: Revision names (e.g. "HS2017", "HS2022")
+            from_column, to_column: Code columns (detected from the revision years if omitted)
+            weight_column: Allocation weights ("weight" if present; equal split otherwise)
+
+        Raises:
+            ValueError: The code columns could not be identified
+        """
+        from_column = from_column or _revision_column(table.columns, source)
+        to_column = to_column or _revision_column(table.columns, target)
+        if from_column is None or to_column is None:
+            raise ValueError(f"Cannot find {source}/{target} code columns in {list(table.columns)}")
+        if weight_column is None and 'weight' in table.columns:
+            weight_column = 'weight'
+        weights = table[weight_column] if weight_column else None
+        return cls(source, target, table[from_column], table[to_column], weights)
+
+    @classmethod
+    def identity(cls, revision: str, codes: Sequence[str]) -> 'Concordance':
+        """Mapping of a revision onto itself"""
+        return cls(revision, revision, codes, codes)
+
+    def table(self) -> pd.DataFrame:
+        """Edges as a DataFrame (from, to, weight)"""
+        return pd.DataFrame({
+            'from': self.sources[self.edge_source],
+            'to': self.targets[self.edge_target],
+            'weight': self.weights,
+        })
+
+    def fanout(self) -> pd.Series:
+        """Number of target codes per source code"""
+        return pd.Series(np.diff(self.offsets), index=self.sources, name='targets')
+
+    def relationships(self) -> pd.Series:
+        """UN relationship label per edge: 1:1, 1:n, n:1 or n:n"""
+        out_degree = np.bincount(self.edge_source, minlength=len(self.sources))[self.edge_source]
+        in_degree = np.bincount(self.edge_target, minlength=len(self.targets))[self.edge_target]
+        labels = np.select([(out_degree == 1) & (in_degree == 1), in_degree == 1, out_degree == 1],
+                           ['1:1', '1:n', 'n:1'], 'n:n')
+        return pd.Series(labels, index=pd.MultiIndex.from_arrays(
+            [self.sources[self.edge_source], self.targets[self.edge_target]], names=['from', 'to']))
+
+    def reweight(self, target_values: pd.Series) -> 'Concordance':
+        """
+        Split weights proportional to observed values of the target codes
+
+        Args:
+            target_values: Value per target code (e.g. trade by HS6 in the target revision);
+                sources whose targets have no value keep an equal split
+
+        Returns:
+            A new Concordance
+        """
+        values = target_values.groupby(normalize_hs_code(pd.Series(target_values.index, dtype=object)).values).sum()
+        weights = values.reindex(self.targets).fillna(0.0).to_numpy(dtype=float)[self.edge_target]
+        table = self.table()
+        return Concordance(self.source, self.target, table['from'], table['to'], weights)
+
+    def at_level(self, digits: int) -> 'Concordance':
+        """
+        Coarser mapping (e.g. HS4 → HS4) from an HS6 table
+
+        Each source HS6 line counts equally within its truncated source code.
+        """
+        table = self.table()
+        table['from'] = table['from'].str[:digits]
+        table['to'] = table['to'].str[:digits]
+        return Concordance(self.source, self.target, table['from'], table['to'], table['weight'])
+
+    def compose(self, other: 'Concordance') -> 'Concordance':
+        """Chain two mappings (self: A → B, other: B → C) into A → C"""
+        if self.target != other.source:
+            raise ValueError(f"Cannot chain {self.source}→{self.target} with {other.source}→{other.target}")
+        left = self.table().rename(columns={'to': 'via', 'weight': 'w1'})
+        right = other.table().rename(columns={'from': 'via', 'weight': 'w2'})
+        chained = left.merge(right, on='via', how='inner')
+        return Concordance(self.source, other.target, chained['from'], chained['to'],
+                           chained['w1'] * chained['w2'])
+
+    def inverse(self) -> 'Concordance':
+        """Reverse mapping (target → source), equal split unless reweighted"""
+        table = self.table()
+        return Concordance(self.target, self.source, table['to'], table['from'])
+
+    def _expand(self, codes: pd.Series, unknown: str):
+        """Row positions, target codes, weights and mapped flags for a code column"""
+        normalized = normalize_hs_code(codes)
+        source_pos = self.sources.get_indexer(normalized.str[:self.digits])
+        known = source_pos >= 0
+        if unknown == RAISE and not known.all():
+            missing = sorted(set(normalized[~known]))
+            raise KeyError(f"{len(missing)} {self.source} codes missing from the concordance: {missing[:10]}")
+
+        fanout = np.append(np.diff(self.offsets), 0)
+        counts = np.where(known, fanout[np.maximum(source_pos, 0)], 0 if unknown == DROP else 1)
+        rows = np.repeat(np.arange(len(codes)), counts)
+        # Position of each output row within its source row's edge block
+        within = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        edge = self.offsets[np.maximum(source_pos, 0)][rows] + within
+        mapped = known[rows]
+
+        edge = np.where(mapped, edge, 0)
+        to_codes = np.where(mapped, self.targets.to_numpy(dtype=object)[self.edge_target[edge]] if len(self) else "",
+                            normalized.to_numpy(dtype=object)[rows])
+        weights = np.where(mapped, self.weights[edge] if len(self) else 1.0, 1.0)
+        return rows, to_codes, weights, mapped
+
+    def convert_codes(self, codes: pd.Series, unknown: str = KEEP) -> pd.DataFrame:
+        """
+        Map a code column to the target revision
+
+        Args:
+            codes: Source revision codes (any dtype; leading zeros restored)
+            unknown: 'keep' unmapped codes as-is, 'drop' them, or 'raise' KeyError
+
+        Returns:
+            One row per (input row, target code): row (input position), code, weight, mapped
+        """
+        rows, to_codes, weights, mapped = self._expand(codes, unknown)
+        return pd.DataFrame({'row': rows, 'code': to_codes, 'weight': weights, 'mapped': mapped})
+
+    def convert_frame(self, df: pd.DataFrame, code_column: str, value_columns: Sequence[str] = (),
+                      unknown: str = KEEP, aggregate_by: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Re-express a dataset in the target revision
+
+        Args:
+            df: Rows keyed by a source revision code
+            code_column: Column holding the codes (replaced by target codes)
+            value_columns: Additive columns allocated by the edge weights
+            unknown: Handling of codes missing from the table (see convert_codes)
+            aggregate_by: Optional key columns (besides the code) to sum the values over
+
+        Returns:
+            Converted rows; value totals are unchanged unless rows were dropped
+        """
+        rows, to_codes, weights, _ = self._expand(df[code_column], unknown)
+        converted = df.iloc[rows].reset_index(drop=True)
+        converted[code_column] = to_codes
+        for col in value_columns:
+            converted[col] = pd.to_numeric(converted[col], errors='coerce').to_numpy(dtype=float) * weights
+        if aggregate_by is not None:
+            keys = [code_column] + [c for c in aggregate_by if c != code_column]
+            converted = converted.groupby(keys, sort=True, as_index=False, dropna=False)[list(value_columns)].sum()
+        return converted
+
+def concordance_path(source: str, target: str, root: str = CONCORDANCE_DIR) -> str:
+    return os.path.join(root, f"{source}_{target}.csv")
+
+def load_concordance(source: str, target: str, root: str = CONCORDANCE_DIR) -> Optional[Concordance]:
+    """
+    Concordance between two revisions from the CSV tables in `root`
+
+    Uses <source>_<target>.csv, else the reverse table inverted, else chains
+    through intermediate revisions (HS2012 → HS2017 → HS2022). Returns None
+    when no table path exists; the same revision needs no table (None too,
+    meaning no conversion).
+    """
+    if source == target:
+        return None
+
+    def single(a: str, b: str) -> Optional[Concordance]:
+        if os.path.exists(concordance_path(a, b, root)):
+            return Concordance.from_table(pd.read_csv(concordance_path(a, b, root), dtype=str), a, b)
+        if os.path.exists(concordance_path(b, a, root)):
+            return Concordance.from_table(pd.read_csv(concordance_path(b, a, root), dtype=str), b, a).inverse()
+        return None
+
+    direct = single(source, target)
+    if direct is not None or source not in REVISIONS or target not in REVISIONS:
+        return direct
+
+    i, j = REVISIONS.index(source), REVISIONS.index(target)
+    step = 1 if j > i else -1
+    chain = None
+    for k in range(i, j, step):
+        link = single(REVISIONS[k], REVISIONS[k + step])
+        if link is None:
+            return None
+        chain = link if chain is None else chain.compose(link)
+    return chain
+
+def harmonize(df: pd.DataFrame, code_column: str, source: str, target: str,
+              value_columns: Sequence[str] = (), root: str = CONCORDANCE_DIR) -> pd.DataFrame:
+    """
+    Convert a dataset to another HS revision when a table is available
+
+    Returns the frame unchanged (with a warning) when the revisions match or no
+    correlation table is found.
+    """
+    if source == target:
+        return df
+    concordance = load_concordance(source, target, root)
+    if concordance is None:
+        print(f"  ⚠️  No {source} → {target} correlation table in {root}, codes left as reported")
+        return df
+    converted = concordance.convert_frame(df, code_column, value_columns)
+    print(f"  🔁 Converted {len(df):,} rows from {source} to {target} ({len(converted):,} rows after splits)")
+    return converted
@@ -3,6 +3,13 @@ import pandas as pd
 import numpy as np
 from typing import Optional
 
+from utils.concordance import normalize_hs_code
+
+# Implementations selectable by the pipelines (see utils/equivalence.py)
+LEGACY_ENGINE = "legacy"
+FAST_ENGINE = "fast"
+ENGINES = [LEGACY_ENGINE, FAST_ENGINE]
+
 def normalize_hs4(product_code: str) -> str:
     """
     Normalize product code to HS4 format (first 4 digits)
@@ -31,12 +38,37 @@ def normalize_hs4(product_code: str) -> str:
     else:
         return ""
 
-def clean_tariff_data(csv_path: str) -> pd.DataFrame:
+def normalize_hs4_column(codes: pd.Series) -> pd.Series:
+    """
+    Vectorized normalize_hs4 over a whole column of product codes
+    
+    Args:
+        codes: Product codes of any dtype (missing values become "")
+        
+    Returns:
+        HS4 code strings, aligned with the input index
+    """
+    # Extracts repeat each product code many times: normalize the distinct codes once
+    positions, uniques = pd.factorize(codes, use_na_sentinel=False)
+    digits = pd.Series(uniques, dtype=object).astype(str).fillna("").str.replace(r'\D', '', regex=True)
+    hs4 = digits.str[:4].str.zfill(4).where(digits != "", "")
+    return pd.Series(hs4.to_numpy(dtype=object)[positions], index=codes.index, name=codes.name)
+
+def normalize_codes(codes: pd.Series, engine: str = LEGACY_ENGINE) -> pd.Series:
+    """Normalize a product code column with the selected engine"""
+    if engine == LEGACY_ENGINE:
+        return codes.apply(normalize_hs4)
+    if engine == FAST_ENGINE:
+        return normalize_hs4_column(codes)
+    raise ValueError(f"Unknown engine {engine!r} (expected one of {ENGINES})")
+
+def clean_tariff_data(csv_path: str, engine: str = LEGACY_ENGINE) -> pd.DataFrame:
     """
     Clean tariff CSV data from WITS
     
     Args:
         csv_path: Path to the tariff CSV file
+        engine: HS4 normalization engine ("legacy" or "fast")
         
     Returns:
         Cleaned DataFrame with normalized HS4 codes and aggregated data
@@ -45,7 +77,7 @@ def clean_tariff_data(csv_path: str) -> pd.DataFrame:
     
     # Read the CSV file
     try:
-        df = pd.read_csv(csv_path)
+        df = pd.read_csv(csv_path, dtype={'ProductCode': str})
         print(f"  ✓ Loaded {len(df)} tariff records")
     except Exception as e:
         print(f"  ❌ Error loading CSV: {e}")
@@ -62,8 +94,8 @@ def clean_tariff_data(csv_path: str) -> pd.DataFrame:
     # Clean the data
     print("  🔧 Cleaning data...")
     
-    # Create HS4 column
-    df['hs4'] = df['ProductCode'].apply(normalize_hs4)
+    # Create HS4 column (leading zero restored, as in expand_tariffs, so chapters 01-09 match)
+    df['hs4'] = normalize_codes(normalize_hs_code(df['ProductCode']), engine)
     
     # Filter out invalid HS4 codes
     df = df[df['hs4'] != ""]
@@ -97,12 +129,13 @@ def clean_tariff_data(csv_path: str) -> pd.DataFrame:
     
     return aggregated
 
-def clean_trade_data(csv_path: str) -> pd.DataFrame:
+def clean_trade_data(csv_path: str, engine: str = LEGACY_ENGINE) -> pd.DataFrame:
     """
     Clean trade flow CSV data from Comtrade/WITS
     
     Args:
         csv_path: Path to the trade CSV file
+        engine: HS4 normalization engine ("legacy" or "fast")
         
     Returns:
         Cleaned DataFrame with normalized HS4 codes and aggregated trade values
@@ -111,7 +144,7 @@ def clean_trade_data(csv_path: str) -> pd.DataFrame:
     
     # Read the CSV file
     try:
-        df = pd.read_csv(csv_path)
+        df = pd.read_csv(csv_path, dtype={'ProductCode': str})
         print(f"  ✓ Loaded {len(df)} trade records")
     except Exception as e:
         print(f"  ❌ Error loading CSV: {e}")
@@ -128,8 +161,8 @@ def clean_trade_data(csv_path: str) -> pd.DataFrame:
     # Clean the data
     print("  🔧 Cleaning data...")
     
-    # Create HS4 column
-    df['hs4'] = df['ProductCode'].apply(normalize_hs4)
+    # Create HS4 column (leading zero restored, as in expand_tariffs, so chapters 01-09 match)
+    df['hs4'] = normalize_codes(normalize_hs_code(df['ProductCode']), engine)
     
     # Filter out invalid HS4 codes
     df = df[df['hs4'] != ""]
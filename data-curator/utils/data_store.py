@@ -0,0 +1,300 @@
+# data_store.py
+"""
+In-memory store of the curated outputs in data/processed.
+
+Loads the processed CSV/JSON artifacts once, indexes them by hs4 and partner,
+and caches the encoded JSON responses (plain and gzip) together with their ETag,
+so serving a query is a dictionary lookup instead of a CSV re-parse.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.publish import PROCESSED_DIR, current_version, resolve_path
+from utils.sketches import load_sketch
+from utils.partner_groups import GroupMembership, default_membership, REQUIRED_COLUMNS
+
+# Artifacts loaded by the store (name -> file in the processed directory)
+ARTIFACTS = {
+    'merged': 'merged_summary.csv',
+    'expanded': 'expanded_summary.csv',
+    'categories': 'category_summary.csv',
+    'high_tariff': 'high_tariff_products.csv',
+    'validation': 'expansion_validation.json',
+    'sketches': 'expanded_sketches.json',
+}
+
+# Low-cardinality text columns stored as categoricals to keep the expanded table small
+CATEGORICAL_COLUMNS = ['partner_name', 'partner_iso', 'category', 'ReporterName_x', 'ReporterName_y']
+
+class CachedResponse:
+    """Encoded response body with its gzip variant and ETag"""
+    __slots__ = ('body', 'gzip_body', 'etag')
+
+    def __init__(self, payload: Dict, version: str):
+        self.body = json.dumps(payload, separators=(',', ':'), default=_json_default).encode('utf-8')
+        self.gzip_body = gzip.compress(self.body, compresslevel=6)
+        digest = hashlib.sha1(self.body).hexdigest()[:16]
+        self.etag = f'"{version}-{digest}"'
+
+def _json_default(value):
+    """Convert numpy scalars for json.dumps"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return str(value)
+
+def _records(df: pd.DataFrame) -> list:
+    """DataFrame rows as JSON-ready dicts (NaN -> None)"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+class DataStore:
+    """
+    Curated outputs held in memory with prebuilt, cached responses.
+
+    Call `refresh_if_changed()` before serving; it reloads (at most once per
+    `reload_interval` seconds) when the pipeline has published new outputs.
+    Published versions (utils/publish.py) are read through the CURRENT pointer
+    and their version ID is used in ETags; artifacts a version does not hold,
+    and unversioned directories, fall back to the flat files and their
+    modification times.
+    """
+
+    def __init__(self, root: str = PROCESSED_DIR, reload_interval: float = 1.0,
+                 groups: Optional[GroupMembership] = None):
+        self.root = root
+        self.groups = groups or default_membership()
+        self.reload_interval = reload_interval
+        self.version = ''
+        self._signature: Tuple = ()
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._responses: Dict[str, CachedResponse] = {}
+        self.tables: Dict[str, pd.DataFrame] = {}
+        self.validation: Dict = {}
+        self.sketches: Dict = {}
+        self._hs4_rows: Dict[str, np.ndarray] = {}
+        self._partner_rows: Dict[str, np.ndarray] = {}
+        self._group_rollup: Dict[str, pd.DataFrame] = {}
+        self._group_totals = pd.DataFrame()
+        self.load()
+
+    def _paths(self, version: Optional[str] = None) -> Dict[str, str]:
+        """
+        Artifact paths inside a published version
+
+        Artifacts the version does not hold (never published by curate.py or
+        expand_tariffs.py) fall back to the flat processed directory.
+        """
+        return {name: resolve_path(filename, self.root, version) if version else os.path.join(self.root, filename)
+                for name, filename in ARTIFACTS.items()}
+
+    def _current_signature(self) -> Tuple:
+        """Published version plus (mtime, size) of every flat-directory artifact"""
+        version = current_version(self.root)
+        flat_dir = os.path.normpath(self.root)
+
+        signature = []
+        for path in self._paths(version).values():
+            if version is not None and os.path.dirname(os.path.normpath(path)) != flat_dir:
+                continue
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        if version is not None:
+            return ('version', version) + tuple(signature)
+        return tuple(signature)
+
+    def load(self):
+        """Load all artifacts and rebuild the indexes"""
+        signature = self._current_signature()
+        paths = self._paths(signature[1] if signature[:1] == ('version',) else None)
+        tables = {}
+
+        for name in ('merged', 'expanded', 'categories', 'high_tariff'):
+            if os.path.exists(paths[name]):
+                df = pd.read_csv(paths[name], dtype={'hs4': str, 'hs2': str, 'category_code': str})
+                for col in CATEGORICAL_COLUMNS:
+                    if col in df.columns:
+                        df[col] = df[col].astype('category')
+                tables[name] = df
+            else:
+                tables[name] = pd.DataFrame()
+
+        validation = {}
+        if os.path.exists(paths['validation']):
+            with open(paths['validation'], 'r') as f:
+                validation = json.load(f)
+
+        sketches = {}
+        if os.path.exists(paths['sketches']):
+            with open(paths['sketches'], 'r') as f:
+                sketches = json.load(f)
+
+        expanded = tables['expanded']
+        hs4_rows = expanded.groupby('hs4', observed=True).indices if not expanded.empty else {}
+        partner_rows = expanded.groupby('partner_iso', observed=True).indices if not expanded.empty else {}
+        # Every bloc rollup in one sparse product per load
+        rollup_ready = self.groups.keys and all(col in expanded.columns for col in REQUIRED_COLUMNS)
+        group_rollup = self.groups.aggregate(expanded) if rollup_ready else {}
+        group_totals = self.groups.totals(expanded) if group_rollup else pd.DataFrame()
+
+        with self._lock:
+            self.tables = tables
+            self.validation = validation
+            self.sketches = sketches
+            self._hs4_rows = dict(hs4_rows)
+            self._partner_rows = {str(k): v for k, v in partner_rows.items()}
+            self._group_rollup = group_rollup
+            self._group_totals = group_totals
+            self._signature = signature
+            if signature[:1] == ('version',):
+                self.version = signature[1]
+            else:
+                self.version = hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+            self._responses = {}
+
+        print(f"📦 Loaded curated outputs (version {self.version}): "
+              f"{len(tables['merged'])} merged, {len(expanded)} expanded rows")
+
+    def refresh_if_changed(self) -> bool:
+        """Reload when the processed outputs changed on disk; returns True if reloaded"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+
+        if self._current_signature() == self._signature:
+            return False
+        self.load()
+        return True
+
+    def response(self, key: str) -> Optional[CachedResponse]:
+        """Cached response for a route key such as 'summary' or 'hs4:2709', or None if unknown"""
+        cached = self._responses.get(key)
+        if cached is not None:
+            return cached
+
+        version = self.version
+        payload = self._build(key)
+        if payload is None:
+            return None
+
+        cached = CachedResponse(payload, version)
+        with self._lock:
+            # Don't cache a payload built from tables that were swapped out meanwhile
+            if version == self.version:
+                self._responses[key] = cached
+        return cached
+
+    def warm(self):
+        """Prebuild every route's response so first requests are lookups too"""
+        keys = ['summary', 'categories', 'high-tariff', 'validation', 'stats', 'groups']
+        keys += [f"groups:{group}" for group in self._group_totals.get('group', [])]
+        keys += [f"hs4:{hs4}" for hs4 in self._hs4_rows]
+        keys += [f"partner:{iso}" for iso in self._partner_rows]
+        for key in keys:
+            self.response(key)
+        print(f"  ✓ Prebuilt {len(keys)} responses")
+
+    def _build(self, key: str) -> Optional[Dict]:
+        """Build the JSON payload for a route key"""
+        kind, _, arg = key.partition(':')
+        merged = self.tables.get('merged', pd.DataFrame())
+        expanded = self.tables.get('expanded', pd.DataFrame())
+
+        if kind == 'summary' and not arg:
+            return {
+                'status': 'success',
+                'data': _records(merged),
+                'meta': {
+                    'total': len(merged),
+                    'totalTradeValue': merged['trade_value_total'].sum() if not merged.empty else 0,
+                    'averageTariff': merged['simple_average'].mean() if not merged.empty else None,
+                    'version': self.version,
+                },
+            }
+
+        if kind == 'summary':
+            rows = merged[merged['hs4'] == arg] if not merged.empty else merged
+            if rows.empty:
+                return None
+            return {'status': 'success', 'data': _records(rows)[0], 'meta': {'hs4': arg}}
+
+        if kind == 'hs4':
+            index = self._hs4_rows.get(arg)
+            if index is None:
+                return None
+            rows = expanded.iloc[index]
+            return {
+                'status': 'success',
+                'data': _records(rows),
+                'meta': {'hs4': arg, 'partners': len(rows), 'totalTradeValue': rows['trade_value_total'].sum()},
+            }
+
+        if kind == 'partner':
+            index = self._partner_rows.get(arg.upper())
+            if index is None:
+                return None
+            rows = expanded.iloc[index]
+            return {
+                'status': 'success',
+                'data': _records(rows),
+                'meta': {'partner_iso': arg.upper(), 'products': len(rows),
+                         'totalTradeValue': rows['trade_value_total'].sum()},
+            }
+
+        if kind == 'categories':
+            categories = self.tables.get('categories', pd.DataFrame())
+            return {'status': 'success', 'data': _records(categories), 'meta': {'total': len(categories)}}
+
+        if kind == 'high-tariff':
+            high_tariff = self.tables.get('high_tariff', pd.DataFrame())
+            return {'status': 'success', 'data': _records(high_tariff), 'meta': {'total': len(high_tariff)}}
+
+        if kind == 'validation':
+            return {'status': 'success', 'data': self.validation, 'meta': {'version': self.version}}
+
+        if kind == 'stats':
+            if not self.sketches:
+                return None
+            if arg:
+                # Any combination of partitions, merged from their sketches
+                keys = arg.split(',')
+                if not all(key in self.sketches['partitions'] for key in keys):
+                    return None
+                data = load_sketch(self.sketches, keys).summary()
+            else:
+                data = self.sketches['summary']
+            return {'status': 'success', 'data': data,
+                    'meta': {'partitions': list(self.sketches['partitions']), 'version': self.version}}
+
+        if kind == 'groups':
+            if self._group_totals.empty:
+                return None
+            if not arg:
+                return {'status': 'success', 'data': _records(self._group_totals),
+                        'meta': {'total': len(self._group_totals), 'version': self.version}}
+            group = arg.upper()
+            if group not in self._group_rollup['trade_value'].columns:
+                return None
+            rows = pd.DataFrame({metric: self._group_rollup[metric][group] for metric in self._group_rollup})
+            rows = rows[rows['trade_value'] > 0].rename_axis('hs4').reset_index()
+            return {
+                'status': 'success',
+                'data': _records(rows),
+                'meta': {'group': group, 'name': self.groups.names[group],
+                         'members': self.groups.members(group), 'products': len(rows)},
+            }
+
+        return None
@@ -0,0 +1,363 @@
+# equivalence.py
+"""
+Differential harness for the legacy and fast pipeline engines.
+
+Every stage with two implementations (see data_cleaner.ENGINES and
+expand_tariffs.STAGES) runs on the same inputs with both engines:
+
+    normalize_hs4      data_cleaner.normalize_codes
+    clean_tariff_data  clean_trade_data
+    load_tariff_data   load_trade_data
+    expand             expand_tariffs_across_partners vs expand_tariffs_vectorized
+    computed_fields    add_computed_fields vs add_computed_fields_vectorized
+    pipeline           load → expand → computed fields, end to end
+
+The outputs are diffed column by column. Numbers must match within
+rtol/atol and text must match exactly. The pipeline stage must also
+serialize to byte-identical CSV, i.e. the same expanded_summary.csv. Each
+engine is timed (best of `repeat` runs) and the report gives the speedup.
+
+On the real extracts the pipeline output is also checked against the
+published expanded_summary.csv. Intentional output changes are listed in
+RECORDED_CHANGES; the HS4 codes they touch are left out of that check and
+everything else must be unchanged.
+
+Inputs are the real WITS extracts in data/raw when present, or a synthetic
+extract with the same quirks. That extract has int-typed product codes,
+several HS6 lines per HS4, unnamed partners and a World row. scale_up()
+multiplies the partner count for larger runs:
+
+    tariff_raw, trade_raw = synthetic_raw(n_products=150, n_partners=60)
+    report = run_harness(*scale_up(tariff_raw, trade_raw, 2))
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/equivalence.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_cleaner import (
+    clean_tariff_data,
+    clean_trade_data,
+    normalize_codes,
+    FAST_ENGINE,
+    LEGACY_ENGINE,
+)
+from utils.concordance import normalize_hs_code
+from utils.expand_tariffs import load_tariff_data, load_trade_data, STAGES, TARIFF_FILE, TRADE_FILE
+from utils.publish import resolve_path
+
+RTOL = 1e-9
+ATOL = 1e-6
+SAMPLE_SIZE = 5
+
+# Intentional changes to expanded_summary.csv since it was last published (change -> what changed)
+RECORDED_CHANGES = {
+    'zero-padded product codes': "ProductCode keeps its leading zero in the loaders and cleaners, so chapters 01-09 get their own "
+                "HS4 codes instead of int-truncated ones (01022940 -> 0102, not 1022)",
+}
+
+def _as_frame(output) -> pd.DataFrame:
+    if isinstance(output, pd.Series):
+        return output.to_frame()
+    return output
+
+def _text(values: pd.Series) -> np.ndarray:
+    """Object array of strings with None for missing values"""
+    return np.array([None if pd.isna(v) else str(v) for v in values], dtype=object)
+
+def compare_frames(expected, actual, rtol: float = RTOL, atol: float = ATOL,
+                   csv: bool = False, sample_size: int = SAMPLE_SIZE) -> Dict:
+    """
+    Diff two outputs (DataFrames or Series) cell by cell
+
+    Args:
+        expected: Legacy output
+        actual: Fast output
+        rtol, atol: Tolerances for numeric columns (NaN equals NaN)
+        csv: Also require byte-identical CSV serialization
+        sample_size: Mismatching cells kept per column
+
+    Returns:
+        {'equal', 'rows', 'columns': {missing, extra, same_order}, 'mismatches': {column:
+        {count, sample}}, 'dtypes': {column: [expected, actual]}} (+ 'csv_identical')
+    """
+    expected, actual = _as_frame(expected), _as_frame(actual)
+    common = [c for c in expected.columns if c in actual.columns]
+    report = {
+        'rows': [len(expected), len(actual)],
+        'columns': {
+            'missing': [c for c in expected.columns if c not in actual.columns],
+            'extra': [c for c in actual.columns if c not in expected.columns],
+            'same_order': list(expected.columns) == list(actual.columns),
+        },
+        'mismatches': {},
+        'dtypes': {},
+    }
+
+    if len(expected) == len(actual):
+        for col in common:
+            left, right = expected[col], actual[col]
+            if str(left.dtype) != str(right.dtype):
+                report['dtypes'][col] = [str(left.dtype), str(right.dtype)]
+            if pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right):
+                a, b = left.to_numpy(dtype=float), right.to_numpy(dtype=float)
+                bad = ~np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+            else:
+                a, b = _text(left), _text(right)
+                bad = a != b
+            if bad.any():
+                rows = np.flatnonzero(bad)
+                report['mismatches'][col] = {
+                    'count': int(bad.sum()),
+                    'sample': [{'row': int(i), 'expected': a[i], 'actual': b[i]} for i in rows[:sample_size]],
+                }
+
+    report['equal'] = (len(expected) == len(actual) and not report['mismatches']
+                       and not report['columns']['missing'] and not report['columns']['extra']
+                       and report['columns']['same_order'])
+    if csv:
+        report['csv_identical'] = expected.to_csv(index=False) == actual.to_csv(index=False)
+        report['equal'] = report['equal'] and report['csv_identical']
+    return report
+
+def synthetic_raw(n_products: int = 150, n_partners: int = 60, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generated tariff and trade extracts in the WITS download layout
+
+    Returns:
+        (tariff_raw, trade_raw) with the columns the loaders read from data/raw
+    """
+    rng = np.random.default_rng(seed)
+    chapters = rng.choice(np.arange(1, 98), size=n_products)
+    hs4 = np.unique(chapters * 100 + rng.integers(1, 99, size=n_products))
+
+    # Several HS6 lines per HS4; int codes lose their leading zero as in the real CSVs
+    lines = np.repeat(hs4, rng.integers(1, 4, size=len(hs4)))
+    hs6 = lines * 100 + rng.integers(10, 99, size=len(lines))
+    duty = np.round(rng.gamma(1.2, 4.0, size=len(hs6)), 3).astype(object)
+    duty[rng.random(len(hs6)) < 0.02] = np.nan
+    tariff_raw = pd.DataFrame({
+        'ProductCode': hs6,
+        'AdValorem Equivalent': duty,
+        'Year': 2023,
+        'Reporter_ISO_N': 840,
+        'ReporterName': 'United States',
+    })
+
+    isos = [f"P{i:02d}" for i in range(n_partners - 2)] + ['CUW', 'WLD']
+    names = [f"Partner {i}" for i in range(n_partners - 2)] + [np.nan, 'World']
+    rows = []
+    for code in hs4:
+        for j in rng.choice(len(isos) - 1, size=rng.integers(1, len(isos) - 1), replace=False):
+            for _ in range(rng.integers(1, 3)):
+                rows.append((code * 100 + rng.integers(10, 99), isos[j], names[j], float(rng.lognormal(8, 2.5))))
+        rows.append((code * 100 + 10, 'WLD', 'World', float(rng.lognormal(12, 2))))
+    trade_raw = pd.DataFrame(rows, columns=['ProductCode', 'PartnerISO3', 'PartnerName', 'TradeValue in 1000 USD'])
+    trade_raw['TradeValue in 1000 USD'] = trade_raw['TradeValue in 1000 USD'].round(3)
+    trade_raw['Year'] = 2024
+    trade_raw['ReporterName'] = 'USA,PR,USVI'
+    trade_raw['ReporterCode'] = 842
+    return tariff_raw, trade_raw
+
+def scale_up(tariff_raw: pd.DataFrame, trade_raw: pd.DataFrame, factor: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Multiply the partner dimension: copy k of partner XYZ becomes XYZk (names keep their NaNs)"""
+    if factor <= 1:
+        return tariff_raw, trade_raw
+    copies = []
+    for k in range(factor):
+        copy = trade_raw.copy()
+        if k:
+            copy['PartnerISO3'] = copy['PartnerISO3'] + str(k)
+            copy['PartnerName'] = copy['PartnerName'].where(copy['PartnerName'].isna(),
+                                                            copy['PartnerName'] + f" {k}")
+        copies.append(copy)
+    return tariff_raw, pd.concat(copies, ignore_index=True)
+
+def load_raw_inputs(tariff_file: str = TARIFF_FILE, trade_file: str = TRADE_FILE) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """The real WITS extracts, or None when they are not downloaded"""
+    if not (os.path.exists(tariff_file) and os.path.exists(trade_file)):
+        return None
+    return pd.read_csv(tariff_file), pd.read_csv(trade_file)
+
+def leading_zero_codes(*code_columns: pd.Series) -> Set[str]:
+    """HS4 codes touched by zero-padding product codes, in their old (int-truncated) and new form"""
+    codes = pd.concat([normalize_hs_code(c) for c in code_columns], ignore_index=True)
+    old = codes.str.lstrip('0').str[:4].str.zfill(4)
+    new = codes.str[:4].str.zfill(4)
+    touched = (codes != "") & (old != new)
+    return set(old[touched]) | set(new[touched])
+
+@contextlib.contextmanager
+def _raw_files(tariff_raw: pd.DataFrame, trade_raw: pd.DataFrame) -> Iterator[Tuple[str, str]]:
+    """The extracts written to a scratch directory, as the loaders read them"""
+    workdir = tempfile.mkdtemp(prefix="engine-harness-")
+    try:
+        tariff_file = os.path.join(workdir, "tariffs.csv")
+        trade_file = os.path.join(workdir, "trade.csv")
+        tariff_raw.to_csv(tariff_file, index=False)
+        trade_raw.to_csv(trade_file, index=False)
+        yield tariff_file, trade_file
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _timed(fn: Callable, make_args: Callable[[], tuple], repeat: int):
+    """Best wall time of `repeat` runs (stage output silenced) and the last output"""
+    best, output = None, None
+    for _ in range(max(repeat, 1)):
+        args = make_args()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            output = fn(*args)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def run_stage(name: str, legacy: Callable, fast: Callable, make_args: Callable[[], tuple],
+              repeat: int = 1, csv: bool = False, rtol: float = RTOL, atol: float = ATOL) -> Dict:
+    """Run one stage with both engines on fresh copies of the same inputs, then diff"""
+    legacy_s, expected = _timed(legacy, make_args, repeat)
+    fast_s, actual = _timed(fast, make_args, repeat)
+    diff = compare_frames(expected, actual, rtol=rtol, atol=atol, csv=csv)
+    return {
+        'stage': name,
+        'equal': diff['equal'],
+        'legacy_s': round(legacy_s, 6),
+        'fast_s': round(fast_s, 6),
+        'speedup': round(legacy_s / fast_s, 2) if fast_s else None,
+        'diff': diff,
+    }
+
+def _pipeline(engine: str) -> Callable:
+    stages = STAGES[engine]
+
+    def run(tariff_file: str, trade_file: str) -> pd.DataFrame:
+        tariffs = load_tariff_data(tariff_file, engine)
+        trades = load_trade_data(trade_file, engine)
+        return stages['computed_fields'](stages['expand'](tariffs, trades))
+    return run
+
+def run_harness(tariff_raw: pd.DataFrame, trade_raw: pd.DataFrame, repeat: int = 1,
+                label: str = "inputs", rtol: float = RTOL, atol: float = ATOL) -> Dict:
+    """
+    Run every stage with both engines and diff the outputs
+
+    Args:
+        tariff_raw, trade_raw: Extracts in the data/raw layout
+        repeat: Runs per engine and stage (best time is reported)
+        label: Name of the input set in the report
+
+    Returns:
+        {'label', 'tariff_rows', 'trade_rows', 'equal', 'stages': [per-stage report]}
+    """
+    print(f"⚖️  Comparing engines on {label}: {len(tariff_raw):,} tariff / {len(trade_raw):,} trade rows")
+    with _raw_files(tariff_raw, trade_raw) as (tariff_file, trade_file):
+        with contextlib.redirect_stdout(io.StringIO()):
+            tariffs = load_tariff_data(tariff_file)
+            trades = load_trade_data(trade_file)
+            expanded = STAGES[LEGACY_ENGINE]['expand'](tariffs, trades)
+
+        legacy, fast = STAGES[LEGACY_ENGINE], STAGES[FAST_ENGINE]
+        tolerances = {'repeat': repeat, 'rtol': rtol, 'atol': atol}
+        stages = [
+            run_stage('normalize_hs4', lambda c: normalize_codes(c, LEGACY_ENGINE),
+                      lambda c: normalize_codes(c, FAST_ENGINE),
+                      lambda: (trade_raw['ProductCode'].copy(),), **tolerances),
+            run_stage('clean_tariff_data', lambda p: clean_tariff_data(p, LEGACY_ENGINE),
+                      lambda p: clean_tariff_data(p, FAST_ENGINE), lambda: (tariff_file,), **tolerances),
+            run_stage('clean_trade_data', lambda p: clean_trade_data(p, LEGACY_ENGINE),
+                      lambda p: clean_trade_data(p, FAST_ENGINE), lambda: (trade_file,), **tolerances),
+            run_stage('load_tariff_data', lambda p: load_tariff_data(p, LEGACY_ENGINE),
+                      lambda p: load_tariff_data(p, FAST_ENGINE), lambda: (tariff_file,), **tolerances),
+            run_stage('load_trade_data', lambda p: load_trade_data(p, LEGACY_ENGINE),
+                      lambda p: load_trade_data(p, FAST_ENGINE), lambda: (trade_file,), **tolerances),
+            run_stage('expand', legacy['expand'], fast['expand'],
+                      lambda: (tariffs.copy(), trades.copy()), **tolerances),
+            run_stage('computed_fields', legacy['computed_fields'], fast['computed_fields'],
+                      lambda: (expanded.copy(),), **tolerances),
+            run_stage('pipeline', _pipeline(LEGACY_ENGINE), _pipeline(FAST_ENGINE),
+                      lambda: (tariff_file, trade_file), csv=True, **tolerances),
+        ]
+
+    for stage in stages:
+        icon = '✅' if stage['equal'] else '❌'
+        print(f"  {icon} {stage['stage']:<18} legacy {stage['legacy_s'] * 1000:9.1f} ms   "
+              f"fast {stage['fast_s'] * 1000:8.1f} ms   ×{stage['speedup']}")
+        for col, mismatch in stage['diff']['mismatches'].items():
+            print(f"      {col}: {mismatch['count']:,} mismatches, e.g. {mismatch['sample'][0]}")
+
+    return {
+        'label': label,
+        'tariff_rows': len(tariff_raw),
+        'trade_rows': len(trade_raw),
+        'equal': all(stage['equal'] for stage in stages),
+        'stages': stages,
+    }
+
+def check_published(tariff_raw: pd.DataFrame, trade_raw: pd.DataFrame,
+                    published_file: Optional[str] = None, rtol: float = RTOL, atol: float = ATOL) -> Dict:
+    """
+    Diff the pipeline output against the published expanded_summary.csv
+
+    Rows whose HS4 code is touched by a RECORDED_CHANGES entry are left out on
+    both sides; all other rows must match.
+
+    Returns:
+        {'equal', 'rows': [published, current], 'recorded_changes', 'excluded_hs4', 'diff'}
+    """
+    published_file = published_file or resolve_path("expanded_summary.csv")
+    dtypes = {'hs4': str, 'category_code': str}
+    published = pd.read_csv(published_file, dtype=dtypes)
+    with _raw_files(tariff_raw, trade_raw) as (tariff_file, trade_file):
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = _pipeline(LEGACY_ENGINE)(tariff_file, trade_file)
+    current = pd.read_csv(io.StringIO(output.to_csv(index=False)), dtype=dtypes)
+
+    excluded = leading_zero_codes(tariff_raw['ProductCode'], trade_raw['ProductCode'])
+    kept = [df[~df['hs4'].isin(excluded)].reset_index(drop=True) for df in (published, current)]
+    diff = compare_frames(*kept, rtol=rtol, atol=atol)
+    return {
+        'equal': diff['equal'],
+        'rows': [len(published), len(current)],
+        'recorded_changes': RECORDED_CHANGES,
+        'excluded_hs4': sorted(excluded & (set(published['hs4']) | set(current['hs4']))),
+        'diff': diff,
+    }
+
+def run_suite(scales: List[int] = (1, 2), n_products: int = 150, n_partners: int = 60,
+              repeat: int = 1, seed: int = 0, include_raw: bool = True) -> Dict:
+    """
+    Harness runs on the real extracts (when present) and on synthetic scale-ups
+
+    Returns:
+        {'equal': all runs equal (and the published check passed), 'runs': [run_harness reports],
+         'published': check_published report or None}
+    """
+    runs = []
+    raw = load_raw_inputs() if include_raw else None
+    published = None
+    if raw is not None:
+        runs.append(run_harness(*raw, repeat=repeat, label="data/raw"))
+        if os.path.exists(resolve_path("expanded_summary.csv")):
+            published = check_published(*raw)
+            icon = '✅' if published['equal'] else '❌'
+            print(f"  {icon} published expanded_summary.csv: {published['rows'][0]:,} → {published['rows'][1]:,} rows, "
+                  f"{len(published['excluded_hs4'])} HS4 codes changed by {', '.join(RECORDED_CHANGES)}")
+    elif include_raw:
+        print("⚠️  data/raw extracts not found, using synthetic inputs only")
+
+    tariff_raw, trade_raw = synthetic_raw(n_products, n_partners, seed)
+    for factor in scales:
+        runs.append(run_harness(*scale_up(tariff_raw, trade_raw, factor), repeat=repeat,
+                                label=f"synthetic ×{factor}"))
+    equal = all(run['equal'] for run in runs) and (published is None or published['equal'])
+    return {'equal': equal, 'runs': runs, 'published': published}
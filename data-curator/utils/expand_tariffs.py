@@ -16,10 +16,26 @@ Solution:
 - Create expanded dataset with partner-level tariff data
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import os
-from typing import Dict, List, Tuple
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Allow running as `python utils/expand_tariffs.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.publish import publish_outputs, current_version, version_dir
+from utils.data_cleaner import normalize_codes, LEGACY_ENGINE, FAST_ENGINE, ENGINES
+from utils.concordance import harmonize, normalize_hs_code
+from utils.changeset import diff_datasets, CHANGESET_FILE
+from utils.shards import write_shards, SHARD_DIR
+from utils.flow_tiles import write_flow_tiles, FLOW_DIR
+from utils.heatmap_matrix import write_heatmap, HEATMAP_DIR
+from utils.hierarchies import write_hierarchies, HIERARCHY_DIR
+from utils.sketches import sketch_document, SKETCH_FILE
+from utils.quality import check_quality, expanded_rules, load_hs4_codes, QUALITY_FILE
 
 def normalize_hs4(product_code: str) -> str:
     """Normalize product code to HS4 format (first 4 digits)"""
@@ -36,17 +52,23 @@ def normalize_hs4(product_code: str) -> str:
     else:
         return ""
 
-def load_tariff_data() -> pd.DataFrame:
+TARIFF_FILE = "data/raw/DataJobID-2947815_2947815_USATariffInfoWorld.csv"
+TRADE_FILE = "data/raw/DataJobID-2947807_2947807_USAGrossImportsAllPartners.csv"
+
+# HS revision of each extract; trade codes are converted to the tariff revision when they differ
+TARIFF_NOMENCLATURE = "HS2022"
+TRADE_NOMENCLATURE = "HS2022"
+
+def load_tariff_data(tariff_file: str = TARIFF_FILE, engine: str = LEGACY_ENGINE) -> pd.DataFrame:
     """Load and clean tariff data"""
     print("📊 Loading tariff data...")
     
-    tariff_file = "data/raw/DataJobID-2947815_2947815_USATariffInfoWorld.csv"
-    df = pd.read_csv(tariff_file)
+    df = pd.read_csv(tariff_file, dtype={'ProductCode': str})
     
     print(f"  ✓ Loaded {len(df)} tariff records")
     
-    # Clean the data
-    df['hs4'] = df['ProductCode'].apply(normalize_hs4)
+    # Clean the data (codes zero-restored exactly as the trade side, so chapters 01-09 join)
+    df['hs4'] = normalize_codes(normalize_hs_code(df['ProductCode']), engine)
     df = df[df['hs4'] != ""]
     
     # Convert numeric columns
@@ -75,17 +97,20 @@ def load_tariff_data() -> pd.DataFrame:
     
     return aggregated
 
-def load_trade_data() -> pd.DataFrame:
-    """Load and clean trade data"""
+def load_trade_data(trade_file: str = TRADE_FILE, engine: str = LEGACY_ENGINE,
+                    nomenclature: str = TRADE_NOMENCLATURE) -> pd.DataFrame:
+    """Load and clean trade data (product codes expressed in TARIFF_NOMENCLATURE)"""
     print("📊 Loading trade data...")
     
-    trade_file = "data/raw/DataJobID-2947807_2947807_USAGrossImportsAllPartners.csv"
-    df = pd.read_csv(trade_file)
+    df = pd.read_csv(trade_file, dtype={'ProductCode': str})
     
     print(f"  ✓ Loaded {len(df)} trade records")
     
-    # Clean the data
-    df['hs4'] = df['ProductCode'].apply(normalize_hs4)
+    # Split values of codes that changed between HS revisions before truncating to HS4
+    df = harmonize(df, 'ProductCode', nomenclature, TARIFF_NOMENCLATURE, value_columns=['TradeValue in 1000 USD'])
+    
+    # Clean the data (harmonize already zero-restores converted codes; unconverted ones need it too)
+    df['hs4'] = normalize_codes(normalize_hs_code(df['ProductCode']), engine)
     df = df[df['hs4'] != ""]
     
     # Convert numeric columns
@@ -211,112 +236,211 @@ def format_trade_value(value: float) -> str:
     else:
         return f'${value:.0f}'
 
+# HS2 chapter -> category description
+HS2_CATEGORIES = {
+    '01': 'Live animals & animal products',
+    '02': 'Meat and edible meat offal',
+    '03': 'Fish and crustaceans',
+    '04': 'Dairy products',
+    '05': 'Products of animal origin',
+    '06': 'Live trees and plants',
+    '07': 'Edible vegetables',
+    '08': 'Edible fruits and nuts',
+    '09': 'Coffee, tea, mate and spices',
+    '10': 'Cereals',
+    '11': 'Products of the milling industry',
+    '12': 'Oil seeds and oleaginous fruits',
+    '13': 'Lac; gums, resins and other vegetable saps',
+    '14': 'Vegetable plaiting materials',
+    '15': 'Animal or vegetable fats and oils',
+    '16': 'Preparations of meat, fish or crustaceans',
+    '17': 'Sugars and sugar confectionery',
+    '18': 'Cocoa and cocoa preparations',
+    '19': 'Preparations of cereals, flour, starch or milk',
+    '20': 'Preparations of vegetables, fruit, nuts',
+    '21': 'Miscellaneous edible preparations',
+    '22': 'Beverages, spirits and vinegar',
+    '23': 'Residues and wastes from the food industries',
+    '24': 'Tobacco and manufactured tobacco substitutes',
+    '25': 'Salt; sulphur; earths and stone',
+    '26': 'Ores, slag and ash',
+    '27': 'Mineral fuels, mineral oils',
+    '28': 'Inorganic chemicals',
+    '29': 'Organic chemicals',
+    '30': 'Pharmaceutical products',
+    '31': 'Fertilisers',
+    '32': 'Tanning or dyeing extracts',
+    '33': 'Essential oils and resinoids',
+    '34': 'Soap, organic surface-active agents',
+    '35': 'Albuminoidal substances',
+    '36': 'Explosives; pyrotechnic products',
+    '37': 'Photographic or cinematographic goods',
+    '38': 'Miscellaneous chemical products',
+    '39': 'Plastics and articles thereof',
+    '40': 'Rubber and articles thereof',
+    '41': 'Raw hides and skins',
+    '42': 'Articles of leather',
+    '43': 'Furskins and artificial fur',
+    '44': 'Wood and articles of wood',
+    '45': 'Cork and articles of cork',
+    '46': 'Manufactures of straw',
+    '47': 'Pulp of wood or of other fibrous cellulosic material',
+    '48': 'Paper and paperboard',
+    '49': 'Printed books, newspapers, pictures',
+    '50': 'Silk',
+    '51': 'Wool, fine or coarse animal hair',
+    '52': 'Cotton',
+    '53': 'Other vegetable textile fibres',
+    '54': 'Man-made filaments',
+    '55': 'Man-made staple fibres',
+    '56': 'Wadding, felt and nonwovens',
+    '57': 'Carpets and other textile floor coverings',
+    '58': 'Special woven fabrics',
+    '59': 'Impregnated, coated, covered or laminated textile fabrics',
+    '60': 'Knitted or crocheted fabrics',
+    '61': 'Articles of apparel and clothing accessories',
+    '62': 'Articles of apparel and clothing accessories',
+    '63': 'Other made up textile articles',
+    '64': 'Footwear, gaiters and the like',
+    '65': 'Headgear and parts thereof',
+    '66': 'Umbrellas, sun umbrellas, walking sticks',
+    '67': 'Prepared feathers and down',
+    '68': 'Articles of stone, plaster, cement, asbestos',
+    '69': 'Ceramic products',
+    '70': 'Glass and glassware',
+    '71': 'Natural or cultured pearls, precious stones',
+    '72': 'Iron and steel',
+    '73': 'Articles of iron or steel',
+    '74': 'Copper and articles thereof',
+    '75': 'Nickel and articles thereof',
+    '76': 'Aluminium and articles thereof',
+    '78': 'Lead and articles thereof',
+    '79': 'Zinc and articles thereof',
+    '80': 'Tin and articles thereof',
+    '81': 'Other base metals',
+    '82': 'Tools, implements, cutlery, spoons and forks',
+    '83': 'Miscellaneous articles of base metal',
+    '84': 'Nuclear reactors, boilers, machinery',
+    '85': 'Electrical machinery and equipment',
+    '86': 'Railway or tramway locomotives',
+    '87': 'Vehicles other than railway or tramway rolling stock',
+    '88': 'Aircraft, spacecraft, and parts thereof',
+    '89': 'Ships, boats and floating structures',
+    '90': 'Optical, photographic, cinematographic, measuring',
+    '91': 'Clocks and watches and parts thereof',
+    '92': 'Musical instruments',
+    '93': 'Arms and ammunition',
+    '94': 'Furniture; bedding, mattresses',
+    '95': 'Toys, games and sports requisites',
+    '96': 'Miscellaneous manufactured articles',
+    '97': 'Works of art, collectors\' pieces and antiques'
+}
+
 def get_hs4_category(hs4: str) -> str:
     """Get HS4 category description from 2-digit prefix"""
     if not hs4 or len(hs4) < 2:
         return 'Unknown'
     
-    prefix = hs4[:2]
-    category_map = {
-        '01': 'Live animals & animal products',
-        '02': 'Meat and edible meat offal',
-        '03': 'Fish and crustaceans',
-        '04': 'Dairy products',
-        '05': 'Products of animal origin',
-        '06': 'Live trees and plants',
-        '07': 'Edible vegetables',
-        '08': 'Edible fruits and nuts',
-        '09': 'Coffee, tea, mate and spices',
-        '10': 'Cereals',
-        '11': 'Products of the milling industry',
-        '12': 'Oil seeds and oleaginous fruits',
-        '13': 'Lac; gums, resins and other vegetable saps',
-        '14': 'Vegetable plaiting materials',
-        '15': 'Animal or vegetable fats and oils',
-        '16': 'Preparations of meat, fish or crustaceans',
-        '17': 'Sugars and sugar confectionery',
-        '18': 'Cocoa and cocoa preparations',
-        '19': 'Preparations of cereals, flour, starch or milk',
-        '20': 'Preparations of vegetables, fruit, nuts',
-        '21': 'Miscellaneous edible preparations',
-        '22': 'Beverages, spirits and vinegar',
-        '23': 'Residues and wastes from the food industries',
-        '24': 'Tobacco and manufactured tobacco substitutes',
-        '25': 'Salt; sulphur; earths and stone',
-        '26': 'Ores, slag and ash',
-        '27': 'Mineral fuels, mineral oils',
-        '28': 'Inorganic chemicals',
-        '29': 'Organic chemicals',
-        '30': 'Pharmaceutical products',
-        '31': 'Fertilisers',
-        '32': 'Tanning or dyeing extracts',
-        '33': 'Essential oils and resinoids',
-        '34': 'Soap, organic surface-active agents',
-        '35': 'Albuminoidal substances',
-        '36': 'Explosives; pyrotechnic products',
-        '37': 'Photographic or cinematographic goods',
-        '38': 'Miscellaneous chemical products',
-        '39': 'Plastics and articles thereof',
-        '40': 'Rubber and articles thereof',
-        '41': 'Raw hides and skins',
-        '42': 'Articles of leather',
-        '43': 'Furskins and artificial fur',
-        '44': 'Wood and articles of wood',
-        '45': 'Cork and articles of cork',
-        '46': 'Manufactures of straw',
-        '47': 'Pulp of wood or of other fibrous cellulosic material',
-        '48': 'Paper and paperboard',
-        '49': 'Printed books, newspapers, pictures',
-        '50': 'Silk',
-        '51': 'Wool, fine or coarse animal hair',
-        '52': 'Cotton',
-        '53': 'Other vegetable textile fibres',
-        '54': 'Man-made filaments',
-        '55': 'Man-made staple fibres',
-        '56': 'Wadding, felt and nonwovens',
-        '57': 'Carpets and other textile floor coverings',
-        '58': 'Special woven fabrics',
-        '59': 'Impregnated, coated, covered or laminated textile fabrics',
-        '60': 'Knitted or crocheted fabrics',
-        '61': 'Articles of apparel and clothing accessories',
-        '62': 'Articles of apparel and clothing accessories',
-        '63': 'Other made up textile articles',
-        '64': 'Footwear, gaiters and the like',
-        '65': 'Headgear and parts thereof',
-        '66': 'Umbrellas, sun umbrellas, walking sticks',
-        '67': 'Prepared feathers and down',
-        '68': 'Articles of stone, plaster, cement, asbestos',
-        '69': 'Ceramic products',
-        '70': 'Glass and glassware',
-        '71': 'Natural or cultured pearls, precious stones',
-        '72': 'Iron and steel',
-        '73': 'Articles of iron or steel',
-        '74': 'Copper and articles thereof',
-        '75': 'Nickel and articles thereof',
-        '76': 'Aluminium and articles thereof',
-        '78': 'Lead and articles thereof',
-        '79': 'Zinc and articles thereof',
-        '80': 'Tin and articles thereof',
-        '81': 'Other base metals',
-        '82': 'Tools, implements, cutlery, spoons and forks',
-        '83': 'Miscellaneous articles of base metal',
-        '84': 'Nuclear reactors, boilers, machinery',
-        '85': 'Electrical machinery and equipment',
-        '86': 'Railway or tramway locomotives',
-        '87': 'Vehicles other than railway or tramway rolling stock',
-        '88': 'Aircraft, spacecraft, and parts thereof',
-        '89': 'Ships, boats and floating structures',
-        '90': 'Optical, photographic, cinematographic, measuring',
-        '91': 'Clocks and watches and parts thereof',
-        '92': 'Musical instruments',
-        '93': 'Arms and ammunition',
-        '94': 'Furniture; bedding, mattresses',
-        '95': 'Toys, games and sports requisites',
-        '96': 'Miscellaneous manufactured articles',
-        '97': 'Works of art, collectors\' pieces and antiques'
-    }
+    return HS2_CATEGORIES.get(hs4[:2], 'Other products')
+
+def expand_tariffs_vectorized(tariff_df: pd.DataFrame, trade_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join-based expand_tariffs_across_partners (the "fast" engine)
+    
+    Reproduces the legacy output row for row: partners are paired by zipping the
+    unique names and unique ISO codes of each HS4 in order of appearance, and trade
+    values are summed per (hs4, partner_name), so a partner without a name gets 0.
+    """
+    print("🔗 Expanding tariffs across partners (vectorized)...")
+    
+    meta = trade_df.groupby('hs4').agg(
+        ReporterName_y=('ReporterName_y', 'first'),
+        ReporterCode=('ReporterCode', 'first'),
+    )
+    print(f"  📊 HS4 codes with partner data: {len(meta)}")
+    
+    names = trade_df[['hs4', 'partner_name']].drop_duplicates()
+    names['_pos'] = names.groupby('hs4').cumcount()
+    isos = trade_df[['hs4', 'partner_iso']].drop_duplicates()
+    isos['_pos'] = isos.groupby('hs4').cumcount()
+    # Inner join on position = zip(), which stops at the shorter list
+    pairs = names.merge(isos, on=['hs4', '_pos'], how='inner')
+    
+    trade = trade_df.groupby(['hs4', 'partner_name'], sort=False)['trade_value_total'].sum()
+    # Unnamed partners never match the grouped sums (NaN keys are dropped), as in the legacy filter
+    pairs = pairs.join(trade, on=['hs4', 'partner_name'])
+    pairs['trade_value_total'] = pairs['trade_value_total'].fillna(0.0)
+    
+    tariffs = tariff_df.reset_index(drop=True)
+    tariffs['_row'] = np.arange(len(tariffs))
+    joined = tariffs.merge(pairs, on='hs4', how='inner').join(meta, on='hs4')
+    joined = joined.sort_values(['_row', '_pos'], kind='stable').reset_index(drop=True)
+    
+    expanded_df = pd.DataFrame({
+        'hs4': joined['hs4'],
+        'simple_average': joined['simple_average'],
+        'year_x': joined['year'],
+        'Reporter_ISO_N': joined['Reporter_ISO_N'],
+        'ReporterName_x': joined['ReporterName_x'],
+        'trade_value_total': joined['trade_value_total'],
+        'year_y': 2024,  # Trade data year
+        'ReporterCode': joined['ReporterCode'],
+        'ReporterName_y': joined['ReporterName_y'],
+        'partner_name': joined['partner_name'],
+        'partner_iso': joined['partner_iso'],
+    })
+    
+    print(f"  ✓ Created {len(expanded_df)} expanded records")
+    print(f"  🏷️  Unique HS4 codes: {expanded_df['hs4'].nunique()}")
+    print(f"  🌍 Unique partners: {expanded_df['partner_name'].nunique()}")
+    print(f"  💵 Total trade value: ${expanded_df['trade_value_total'].sum()/1e12:.2f}T")
+    
+    return expanded_df
+
+def format_trade_values(values: pd.Series) -> pd.Series:
+    """Vectorized format_trade_value over a whole column"""
+    v = values.to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(v) & (v >= 0)
+        conditions = [v >= 1e12, v >= 1e9, v >= 1e6, v >= 1e3]
+    # Unit and printf template are picked column-wise; only the final % runs per value
+    scaled = np.where(valid, np.select(conditions, [v / 1e12, v / 1e9, v / 1e6, v / 1e3], v), 0.0)
+    templates = np.select(conditions, ['$%.1fT', '$%.1fB', '$%.1fM', '$%.1fK'], '$%.0f')
+    return pd.Series([t % x for t, x in zip(templates.tolist(), scaled.tolist())], index=values.index, dtype=object)
+
+def add_computed_fields_vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    """Column-at-a-time add_computed_fields (the "fast" engine)"""
+    print("🧮 Adding computed fields (vectorized)...")
+    
+    df['tariff_revenue_estimate'] = (df['simple_average'] / 100) * df['trade_value_total']
+    
+    df['trade_value_formatted'] = format_trade_values(df['trade_value_total'])
+    # One tariff per HS4: format the distinct rates once and broadcast
+    codes, rates = pd.factorize(df['simple_average'], use_na_sentinel=False)
+    formatted = np.array([f"{x:.2f}%" for x in rates.tolist()], dtype=object)
+    df['tariff_rate_formatted'] = pd.Series(formatted[codes], index=df.index, dtype=object)
+    df['tariff_revenue_formatted'] = format_trade_values(df['tariff_revenue_estimate'])
+    
+    prefix = df['hs4'].str[:2]
+    category = prefix.map(HS2_CATEGORIES).fillna('Other products')
+    df['category'] = category.where(df['hs4'].str.len() >= 2, 'Unknown')
+    df['category_code'] = prefix
+    
+    print(f"  ✓ Added computed fields to {len(df)} records")
     
-    return category_map.get(prefix, 'Other products')
+    return df
+
+# engine -> pipeline stage implementations
+STAGES = {
+    LEGACY_ENGINE: {
+        'expand': expand_tariffs_across_partners,
+        'computed_fields': add_computed_fields,
+    },
+    FAST_ENGINE: {
+        'expand': expand_tariffs_vectorized,
+        'computed_fields': add_computed_fields_vectorized,
+    },
+}
 
 def validate_expansion(expanded_df: pd.DataFrame) -> Dict:
     """Validate the expanded dataset"""
@@ -347,38 +471,113 @@ def validate_expansion(expanded_df: pd.DataFrame) -> Dict:
     
     return validation_results
 
-def main():
-    """Main function to expand tariff data across partners"""
-    print("🚀 Starting Tariff Data Expansion...")
+def build_changeset(expanded_df: pd.DataFrame, root: str = "data/processed") -> Optional[Dict]:
+    """
+    Diff the new expanded dataset against the currently published version
+    
+    Returns:
+        The changeset (its summary counts are all zero when nothing changed), or None
+        when there is no published dataset to diff against or the diff failed
+    """
+    base_version = current_version(root)
+    previous_file = os.path.join(version_dir(base_version, root), "expanded_summary.csv") if base_version else None
+    
+    if previous_file is None or not os.path.exists(previous_file):
+        print("📝 No previously published expanded dataset, skipping changeset")
+        return None
+    
+    previous_df = pd.read_csv(previous_file, dtype={'hs4': str})
+    try:
+        changeset = diff_datasets(previous_df, expanded_df)
+    except ValueError as e:
+        print(f"  ❌ Could not build changeset: {e}")
+        return None
+    
+    changeset['base_version'] = base_version
+    summary = changeset['summary']
+    print(f"📝 Changeset vs {base_version}: {summary['inserts']} inserts, "
+          f"{summary['updates']} updates, {summary['deletes']} deletes, {summary['unchanged']} unchanged")
+    
+    return changeset
+
+def attach_changeset(outputs: Dict, expanded_df: pd.DataFrame, root: str = "data/processed") -> List[str]:
+    """
+    Add the changeset to the outputs of a run when the expanded dataset changed
+    
+    Returns:
+        Files that must not be carried forward from the current version
+    """
+    changeset = build_changeset(expanded_df, root)
+    if changeset is None:
+        # The current version's changeset would describe some other transition
+        return [CHANGESET_FILE]
+    if any(changeset['summary'][kind] for kind in ('inserts', 'updates', 'deletes')):
+        outputs[CHANGESET_FILE] = changeset
+    # Unchanged data: the current version's changeset (if any) still leads to this
+    # dataset, so it is carried forward and an identical rerun keeps the version
+    return []
+
+def main(engine: str = LEGACY_ENGINE):
+    """
+    Main function to expand tariff data across partners
+    
+    Args:
+        engine: "legacy" (row-by-row reference) or "fast" (vectorized); both produce
+            the same expanded_summary.csv, see utils/equivalence.py
+    """
+    if engine not in STAGES:
+        raise ValueError(f"Unknown engine {engine!r} (expected one of {ENGINES})")
+    stages = STAGES[engine]
+    
+    print(f"🚀 Starting Tariff Data Expansion ({engine} engine)...")
     print("=" * 50)
     
     # Load data
-    tariff_df = load_tariff_data()
-    trade_df = load_trade_data()
+    tariff_df = load_tariff_data(engine=engine)
+    trade_df = load_trade_data(engine=engine)
     
     # Expand tariffs across partners
-    expanded_df = expand_tariffs_across_partners(tariff_df, trade_df)
+    expanded_df = stages['expand'](tariff_df, trade_df)
     
     # Add computed fields
-    expanded_df = add_computed_fields(expanded_df)
+    expanded_df = stages['computed_fields'](expanded_df)
     
     # Validate results
     validation_results = validate_expansion(expanded_df)
     
-    # Save expanded dataset
+    # Quality gate: error-severity violations stop the run before anything is published
+    quality_report = check_quality(expanded_df, expanded_rules(load_hs4_codes()), "expanded dataset")
+    
+    # Publish expanded dataset and validation results as one version
     output_file = "data/processed/expanded_summary.csv"
-    expanded_df.to_csv(output_file, index=False)
+    validation_file = "data/processed/expansion_validation.json"
+    outputs = {
+        "expanded_summary.csv": expanded_df,
+        "expansion_validation.json": validation_results,
+        QUALITY_FILE: quality_report,
+    }
     
-    print(f"\n💾 Saved expanded dataset to: {output_file}")
-    print(f"📁 File size: {os.path.getsize(output_file) / 1024 / 1024:.1f} MB")
+    # Mergeable per-partition sketches for constant-memory dashboard stats
+    outputs[SKETCH_FILE] = sketch_document(expanded_df)
     
-    # Save validation results
-    import json
-    validation_file = "data/processed/expansion_validation.json"
-    with open(validation_file, 'w') as f:
-        json.dump(validation_results, f, indent=2, default=str)
+    drop = attach_changeset(outputs, expanded_df)
     
+    version = publish_outputs(outputs, drop=drop)
+    
+    # Per-product / per-partner slices so pages download only what they render
+    write_shards(expanded_df, SHARD_DIR, version=version)
+    write_flow_tiles(expanded_df, FLOW_DIR, version=version)
+    write_heatmap(expanded_df, HEATMAP_DIR, version=version)
+    write_hierarchies(expanded_df, HIERARCHY_DIR)
+    
+    print(f"\n💾 Saved expanded dataset to: {output_file}")
+    print(f"📁 File size: {os.path.getsize(output_file) / 1024 / 1024:.1f} MB")
     print(f"📊 Validation results saved to: {validation_file}")
+    print(f"🏷️  Version: {version}")
+    print(f"🧩 Frontend shards written to: {SHARD_DIR}")
+    print(f"🌐 Globe flow tiles written to: {FLOW_DIR}")
+    print(f"🟥 Heatmap matrices written to: {HEATMAP_DIR}")
+    print(f"🌳 Chart hierarchies written to: {HIERARCHY_DIR}")
     
     print("\n🎉 Tariff data expansion completed successfully!")
     print(f"✅ Expanded from {len(tariff_df)} tariff records to {len(expanded_df)} partner-level records")
@@ -387,4 +586,7 @@ def main():
     return expanded_df
 
 if __name__ == "__main__":
-    expanded_data = main()
+    parser = argparse.ArgumentParser(description="Expand tariffs across trade partners and publish the results")
+    parser.add_argument('--engine', choices=ENGINES, default=LEGACY_ENGINE,
+                        help='Implementation of the expansion stages (outputs are identical)')
+    expanded_data = main(parser.parse_args().engine)
@@ -0,0 +1,229 @@
+# flow_tiles.py
+"""
+Precomputed globe flow tiles for MapboxGlobe.
+
+For every HS4 product and every HS2 chapter the top-N partner flows (by trade
+value), and for all products together every placed partner (so any country
+picked in the globe's filter can be drawn), are joined with partner centroid
+coordinates and written as a flat little-endian float32 buffer, one
+interleaved record per flow, largest first:
+
+    lon, lat, trade_value, tariff, tariff_revenue, partner
+
+`partner` indexes the partner list in the manifest. A tile can be handed to
+the GPU (or wrapped in a Float32Array) as-is, without filtering, sorting or
+joining rows in the browser:
+
+    frontend/public/flows/
+        manifest.json          # layout, origin, partners, tile -> count/bytes/sha256
+        all.bin                # all products, every placed partner
+        hs2/<hs2>.bin          # one chapter
+        hs4/<hs4>.bin          # one product
+
+Aggregated tiles (HS2, all) sum trade and revenue per partner; their tariff is
+the trade-weighted effective rate (revenue / trade), falling back to the
+simple mean where no trade was recorded.
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/flow_tiles.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.conditional_fetch import write_if_changed
+from utils.publish import current_version, resolve_path
+from utils.shards import MANIFEST_FILE, WORLD_ISO, remove_stale, shard_name
+
+FLOW_DIR = "../frontend/public/flows"
+COUNTRIES_FILE = "../frontend/public/world-countries.json"
+REPORTER_ISO = "USA"
+TOP_N = 25
+
+FIELDS = ['lon', 'lat', 'trade_value', 'tariff', 'tariff_revenue', 'partner']
+DTYPE = np.dtype('<f4')
+
+# Legacy WITS partner codes -> ISO3 codes used by the country shapes
+ISO_ALIASES = {
+    'ROM': 'ROU',
+    'SER': 'SRB',
+    'ZAR': 'COD',
+    'MNT': 'MNE',
+    'TMP': 'TLS',
+}
+
+# Partners too small to have a shape in world-countries.json (lon, lat)
+EXTRA_CENTROIDS = {
+    'SGP': (103.8198, 1.3521),
+    'HKG': (114.1694, 22.3193),
+    'MAC': (113.5439, 22.1987),
+    'BHR': (50.5577, 26.0667),
+    'MLT': (14.3754, 35.9375),
+    'MUS': (57.5522, -20.3484),
+    'BRB': (-59.5432, 13.1939),
+}
+
+def _ring_area_centroid(ring: np.ndarray) -> Tuple[float, float, float]:
+    """Signed area and centroid of a closed lon/lat ring (shoelace formula)"""
+    x, y = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, float(x.mean()), float(y.mean())
+    return float(area), float(((x + x1) * cross).sum() / (6 * area)), float(((y + y1) * cross).sum() / (6 * area))
+
+def country_centroids(path: str = COUNTRIES_FILE) -> Dict[str, Tuple[float, float]]:
+    """
+    ISO3 -> (lon, lat) centroid of each country's largest polygon
+
+    Using the largest polygon keeps overseas territories and island chains
+    from pulling the point off the mainland (e.g. France, USA).
+    """
+    with open(path, 'r') as f:
+        countries = json.load(f)
+
+    centroids = dict(EXTRA_CENTROIDS)
+    for feature in countries['features']:
+        iso = feature.get('id')
+        geometry = feature.get('geometry') or {}
+        if not iso or not geometry:
+            continue
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        best = max((_ring_area_centroid(np.asarray(polygon[0], dtype=float)) for polygon in polygons),
+                   key=lambda item: abs(item[0]))
+        centroids[iso] = (round(best[1], 4), round(best[2], 4))
+    return centroids
+
+def _aggregate(flows: pd.DataFrame, key: Optional[str]) -> pd.DataFrame:
+    """Per (key, partner) trade, revenue and tariff"""
+    by = [key, 'partner_iso'] if key else ['partner_iso']
+    grouped = flows.groupby(by, sort=False).agg(
+        trade_value=('trade_value_total', 'sum'),
+        tariff_revenue=('tariff_revenue_estimate', 'sum'),
+        mean_tariff=('simple_average', 'mean'),
+    ).reset_index()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective = grouped['tariff_revenue'] / grouped['trade_value'] * 100
+    grouped['tariff'] = effective.where(grouped['trade_value'] > 0, grouped['mean_tariff'])
+    return grouped
+
+def _top(grouped: pd.DataFrame, key: Optional[str], top_n: int) -> pd.DataFrame:
+    order = [key, 'trade_value', 'partner_iso'] if key else ['trade_value', 'partner_iso']
+    ascending = [True, False, True] if key else [False, True]
+    ranked = grouped.sort_values(order, ascending=ascending, kind='stable')
+    return ranked.groupby(key, sort=False).head(top_n) if key else ranked.head(top_n)
+
+def _encode(tile: pd.DataFrame) -> bytes:
+    return np.ascontiguousarray(tile[FIELDS].to_numpy(dtype=DTYPE)).tobytes()
+
+def build_flow_tiles(df: pd.DataFrame, centroids: Dict[str, Tuple[float, float]],
+                     top_n: int = TOP_N) -> Tuple[Dict[str, bytes], Dict]:
+    """
+    Render all flow tiles
+
+    Args:
+        df: Expanded dataset (hs4 as text)
+        centroids: ISO3 -> (lon, lat)
+        top_n: Flows kept per HS2/HS4 tile (all.bin keeps every placed partner)
+
+    Returns:
+        (relative path -> tile bytes, manifest without file hashes)
+    """
+    flows = df[df['partner_iso'].str.upper() != WORLD_ISO].copy()
+    flows['hs2'] = flows['hs4'].str[:2]
+    located = flows['partner_iso'].map(lambda iso: ISO_ALIASES.get(iso, iso)).map(centroids)
+    unplaced = sorted(flows.loc[located.isna(), 'partner_iso'].unique())
+    flows = flows[located.notna()]
+    located = located[located.notna()]
+    flows['lon'] = [point[0] for point in located]
+    flows['lat'] = [point[1] for point in located]
+
+    partners = flows.groupby('partner_iso', sort=True).agg(
+        name=('partner_name', 'first'), lon=('lon', 'first'), lat=('lat', 'first'))
+    partners['name'] = partners['name'].fillna(pd.Series(partners.index, index=partners.index))
+    partner_index = pd.Series(np.arange(len(partners)), index=partners.index)
+
+    files = {}
+    tiles = {}
+    levels = [(None, 'all'), ('hs2', 'hs2'), ('hs4', 'hs4')]
+    for key, prefix in levels:
+        grouped = _aggregate(flows, key)
+        grouped = grouped.join(partners[['lon', 'lat']], on='partner_iso')
+        grouped['partner'] = grouped['partner_iso'].map(partner_index)
+        totals = grouped.groupby(key, sort=False)['trade_value'].sum() if key else None
+        top = _top(grouped, key, top_n if key else len(grouped))
+
+        groups = top.groupby(key, sort=True) if key else [(None, top)]
+        for code, tile in groups:
+            path = f"{prefix}/{shard_name(code)}.bin" if key else f"{prefix}.bin"
+            files[path] = _encode(tile)
+            total = float(totals[code]) if key else float(grouped['trade_value'].sum())
+            tiles[path] = {
+                'count': len(tile),
+                'trade_value_total': total,
+                'coverage': round(float(tile['trade_value'].sum()) / total, 4) if total else None,
+            }
+
+    origin = centroids.get(REPORTER_ISO)
+    manifest = {
+        'format': {'dtype': 'float32', 'endian': 'little', 'fields': FIELDS, 'stride': len(FIELDS)},
+        'origin': {'iso': REPORTER_ISO, 'lon': origin[0], 'lat': origin[1]} if origin else None,
+        'top_n': top_n,
+        'partners': {'iso': list(partners.index), 'name': list(partners['name'])},
+        'unplaced': unplaced,
+        'tiles': tiles,
+    }
+    return files, manifest
+
+def write_flow_tiles(df: pd.DataFrame, out_dir: str = FLOW_DIR, countries_file: str = COUNTRIES_FILE,
+                     top_n: int = TOP_N, version: Optional[str] = None) -> Dict:
+    """
+    Write the flow tiles and their manifest, touching only files whose content changed
+
+    Args:
+        df: Expanded dataset
+        out_dir: Directory served to the browser
+        countries_file: GeoJSON country shapes with ISO3 feature ids
+        top_n: Flows kept per HS2/HS4 tile (all.bin keeps every placed partner)
+        version: Published dataset version the tiles were built from
+
+    Returns:
+        The manifest
+    """
+    print("🌐 Writing globe flow tiles...")
+    files, manifest = build_flow_tiles(df, country_centroids(countries_file), top_n)
+
+    written = 0
+    for path, data in sorted(files.items()):
+        written += write_if_changed(os.path.join(out_dir, path), data)
+        manifest['tiles'][path].update(bytes=len(data), sha256=hashlib.sha256(data).hexdigest())
+    removed = remove_stale(out_dir, ('hs2', 'hs4'), files)
+
+    manifest['version'] = version
+    write_if_changed(os.path.join(out_dir, MANIFEST_FILE),
+                     json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+    print(f"  ✓ {len(files)} tiles ({written} rewritten, {removed} removed), "
+          f"{sum(len(data) for data in files.values()) / 1024:.0f} KB total")
+    if manifest['unplaced']:
+        print(f"  ⚠️  {len(manifest['unplaced'])} partners without coordinates left out: "
+              f"{', '.join(manifest['unplaced'][:10])}{'...' if len(manifest['unplaced']) > 10 else ''}")
+    return manifest
+
+def read_tile(path: str) -> np.ndarray:
+    """Decode a tile into an (n, len(FIELDS)) float32 array"""
+    return np.fromfile(path, dtype=DTYPE).reshape(-1, len(FIELDS))
+
+def main():
+    """Rebuild the flow tiles from the currently published expanded dataset"""
+    df = pd.read_csv(resolve_path("expanded_summary.csv"), dtype={'hs4': str, 'category_code': str})
+    write_flow_tiles(df, version=current_version())
+
+if __name__ == "__main__":
+    main()
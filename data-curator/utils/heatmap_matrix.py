@@ -0,0 +1,240 @@
+# heatmap_matrix.py
+"""
+Dense HS2 chapter × partner matrices for the heatmap.
+
+The curator materializes one float32 matrix per metric:
+
+- tariff: trade-weighted tariff (revenue / trade), simple mean where no trade
+- trade_value: total trade value in USD
+- tariff_revenue: estimated tariff revenue in USD
+
+Cells without any record are NaN. Rows are HS2 chapters (sorted), columns are
+partners ordered by total trade, largest first. The matrices are stored
+back-to-back, row-major, little-endian in one binary file next to a small
+JSON header with the labels, byte offsets and precomputed color-scale
+quantiles (of the cells, for one chapter, and of the all-chapter partner
+totals), so the heatmap loads with one fetch and no sorting:
+
+    frontend/public/heatmap/
+        matrix.json            # shape, labels, metric offsets, quantiles, sha256
+        matrix.bin
+
+In Python:
+
+    matrix = HeatmapMatrix.load()
+    matrix.slice('tariff', hs2=['84', '90'], partners=['CHN', 'MEX'])
+    matrix.cell('84', 'CAN')
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/heatmap_matrix.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.conditional_fetch import write_if_changed
+from utils.publish import current_version, resolve_path
+from utils.shards import WORLD_ISO
+
+HEATMAP_DIR = "../frontend/public/heatmap"
+HEADER_FILE = "matrix.json"
+DATA_FILE = "matrix.bin"
+
+METRICS = ['tariff', 'trade_value', 'tariff_revenue']
+DTYPE = np.dtype('<f4')
+
+# Color-scale stops (deciles of the non-empty cells)
+QUANTILES = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+class HeatmapMatrix:
+    """HS2 × partner matrices with labelled slicing"""
+
+    def __init__(self, hs2: List[str], partners: List[str], matrices: Dict[str, np.ndarray],
+                 chapter_names: Optional[List[str]] = None, partner_names: Optional[List[str]] = None,
+                 quantiles: Optional[Dict[str, List[float]]] = None):
+        self.hs2 = list(hs2)
+        self.partners = list(partners)
+        self.matrices = matrices
+        self.chapter_names = list(chapter_names) if chapter_names is not None else list(self.hs2)
+        self.partner_names = list(partner_names) if partner_names is not None else list(self.partners)
+        self.quantiles = quantiles if quantiles is not None else self.compute_quantiles()
+        self._row = {code: i for i, code in enumerate(self.hs2)}
+        self._col = {iso: j for j, iso in enumerate(self.partners)}
+
+    @property
+    def shape(self):
+        return (len(self.hs2), len(self.partners))
+
+    @classmethod
+    def from_expanded(cls, df: pd.DataFrame) -> 'HeatmapMatrix':
+        """
+        Aggregate the expanded dataset into chapter × partner matrices
+
+        Args:
+            df: Expanded dataset (hs4 as text); the World aggregate is left out
+        """
+        df = df[df['partner_iso'].str.upper() != WORLD_ISO]
+        hs2 = df['hs4'].str[:2]
+
+        partner_trade = df.groupby('partner_iso')['trade_value_total'].sum()
+        partners = sorted(partner_trade.index, key=lambda iso: (-partner_trade[iso], iso))
+        chapters = sorted(hs2.unique())
+
+        rows = pd.Index(chapters).get_indexer(hs2)
+        cols = pd.Index(partners).get_indexer(df['partner_iso'])
+        flat = rows * len(partners) + cols
+        size = len(chapters) * len(partners)
+
+        count = np.bincount(flat, minlength=size)
+        trade = np.bincount(flat, weights=df['trade_value_total'].to_numpy(dtype=float), minlength=size)
+        revenue = np.bincount(flat, weights=df['tariff_revenue_estimate'].to_numpy(dtype=float), minlength=size)
+        tariff_sum = np.bincount(flat, weights=df['simple_average'].to_numpy(dtype=float), minlength=size)
+
+        empty = count == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tariff = np.where(trade > 0, revenue / trade * 100, tariff_sum / count)
+        matrices = {}
+        for name, values in (('tariff', tariff), ('trade_value', trade), ('tariff_revenue', revenue)):
+            values = np.where(empty, np.nan, values)
+            matrices[name] = values.reshape(len(chapters), len(partners)).astype(DTYPE)
+
+        chapter_names = df.assign(hs2=hs2).groupby('hs2')['category'].first().reindex(chapters) \
+            if 'category' in df.columns else pd.Series(chapters, index=chapters)
+        partner_names = df.groupby('partner_iso')['partner_name'].first().reindex(partners)
+        return cls(chapters, partners, matrices,
+                   chapter_names=chapter_names.fillna(pd.Series(chapters, index=chapters)).tolist(),
+                   partner_names=partner_names.fillna(pd.Series(partners, index=partners)).tolist())
+
+    def compute_quantiles(self) -> Dict[str, List[float]]:
+        """Color-scale stops per metric over the non-empty cells"""
+        quantiles = {}
+        for name, matrix in self.matrices.items():
+            values = matrix[~np.isnan(matrix)]
+            quantiles[name] = [round(float(v), 6) for v in np.quantile(values, QUANTILES)] if values.size else []
+        return quantiles
+
+    def partner_totals(self) -> Dict[str, np.ndarray]:
+        """Per-partner values over all chapters (tariff trade-weighted, simple mean of cells without trade)"""
+        trade = np.nansum(self.matrices['trade_value'], axis=0, dtype=float)
+        revenue = np.nansum(self.matrices['tariff_revenue'], axis=0, dtype=float)
+        tariff = self.matrices['tariff'].astype(float)
+        filled = ~np.isnan(tariff)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_tariff = np.where(filled, tariff, 0).sum(axis=0) / filled.sum(axis=0)
+            weighted = np.where(trade > 0, revenue / trade * 100, mean_tariff)
+        return {'tariff': weighted, 'trade_value': trade, 'tariff_revenue': revenue}
+
+    def partner_quantiles(self) -> Dict[str, List[float]]:
+        """Color-scale stops per metric over the all-chapter partner totals"""
+        quantiles = {}
+        for name, values in self.partner_totals().items():
+            values = values[~np.isnan(values)]
+            quantiles[name] = [round(float(v), 6) for v in np.quantile(values, QUANTILES)] if values.size else []
+        return quantiles
+
+    def _rows(self, hs2: Optional[Iterable[str]]) -> List[int]:
+        if hs2 is None:
+            return list(range(len(self.hs2)))
+        return [self._row[code] for code in ([hs2] if isinstance(hs2, str) else hs2)]
+
+    def _cols(self, partners: Optional[Iterable[str]]) -> List[int]:
+        if partners is None:
+            return list(range(len(self.partners)))
+        return [self._col[iso] for iso in ([partners] if isinstance(partners, str) else partners)]
+
+    def slice(self, metric: str = 'tariff', hs2: Optional[Iterable[str]] = None,
+              partners: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Labelled sub-matrix of one metric
+
+        Args:
+            metric: One of METRICS
+            hs2: Chapter code(s) to keep (all by default)
+            partners: Partner ISO code(s) to keep (all by default)
+
+        Returns:
+            DataFrame indexed by HS2 with one column per partner
+
+        Raises:
+            KeyError: Unknown metric, chapter or partner
+        """
+        rows, cols = self._rows(hs2), self._cols(partners)
+        values = self.matrices[metric][np.ix_(rows, cols)]
+        return pd.DataFrame(values, index=[self.hs2[i] for i in rows], columns=[self.partners[j] for j in cols])
+
+    def cell(self, hs2: str, partner: str) -> Dict[str, Optional[float]]:
+        """All metrics of one chapter/partner cell (None when empty)"""
+        i, j = self._row[hs2], self._col[partner]
+        values = {name: float(matrix[i, j]) for name, matrix in self.matrices.items()}
+        return {name: (None if np.isnan(v) else v) for name, v in values.items()}
+
+    def header(self) -> Dict:
+        """JSON header describing the binary layout"""
+        cells = len(self.hs2) * len(self.partners)
+        return {
+            'shape': list(self.shape),
+            'dtype': 'float32',
+            'endian': 'little',
+            'order': 'row-major',
+            'metrics': {name: {'offset': k * cells * DTYPE.itemsize, 'length': cells}
+                        for k, name in enumerate(METRICS)},
+            'hs2': self.hs2,
+            'chapter_names': self.chapter_names,
+            'partners': self.partners,
+            'partner_names': self.partner_names,
+            'quantile_levels': QUANTILES,
+            'quantiles': self.quantiles,
+            'partner_quantiles': self.partner_quantiles(),
+        }
+
+    def to_bytes(self) -> bytes:
+        return b''.join(np.ascontiguousarray(self.matrices[name], dtype=DTYPE).tobytes() for name in METRICS)
+
+    def save(self, out_dir: str = HEATMAP_DIR, version: Optional[str] = None) -> Dict:
+        """Write matrix.bin and matrix.json (only files whose content changed); returns the header"""
+        data = self.to_bytes()
+        header = self.header()
+        header.update(version=version, bytes=len(data), sha256=hashlib.sha256(data).hexdigest())
+        write_if_changed(os.path.join(out_dir, DATA_FILE), data)
+        write_if_changed(os.path.join(out_dir, HEADER_FILE), json.dumps(header, indent=1).encode('utf-8'))
+        return header
+
+    @classmethod
+    def load(cls, out_dir: str = HEATMAP_DIR, mmap: bool = True) -> 'HeatmapMatrix':
+        """Read saved matrices (memory-mapped by default)"""
+        with open(os.path.join(out_dir, HEADER_FILE), 'r') as f:
+            header = json.load(f)
+        path = os.path.join(out_dir, DATA_FILE)
+        data = np.memmap(path, dtype=DTYPE, mode='r') if mmap else np.fromfile(path, dtype=DTYPE)
+
+        shape = tuple(header['shape'])
+        matrices = {}
+        for name, layout in header['metrics'].items():
+            start = layout['offset'] // DTYPE.itemsize
+            matrices[name] = data[start:start + layout['length']].reshape(shape)
+        return cls(header['hs2'], header['partners'], matrices,
+                   chapter_names=header['chapter_names'], partner_names=header['partner_names'],
+                   quantiles=header['quantiles'])
+
+def write_heatmap(df: pd.DataFrame, out_dir: str = HEATMAP_DIR, version: Optional[str] = None) -> Dict:
+    """Build and save the heatmap matrices of an expanded dataset; returns the header"""
+    print("🟥 Writing heatmap matrices...")
+    matrix = HeatmapMatrix.from_expanded(df)
+    header = matrix.save(out_dir, version=version)
+    filled = int((~np.isnan(matrix.matrices['trade_value'])).sum())
+    print(f"  ✓ {matrix.shape[0]} chapters × {matrix.shape[1]} partners "
+          f"({filled:,} non-empty cells), {header['bytes'] / 1024:.0f} KB")
+    return header
+
+def main():
+    """Rebuild the heatmap matrices from the currently published expanded dataset"""
+    df = pd.read_csv(resolve_path("expanded_summary.csv"), dtype={'hs4': str, 'category_code': str})
+    write_heatmap(df, version=current_version())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# hierarchies.py
+"""
+Ready-to-render hierarchies for the sector charts (treemap, sunburst, Sankey).
+
+The expanded dataset is aggregated once per publish into a chapter (HS2) →
+product (HS4) → partner tree. At every level the children are ranked by trade
+value and only the largest ones are kept; the tail is merged into a single
+"Other" node so totals still add up:
+
+    LEVEL_LIMITS['hs4'] = (8, 0.01)   # at most 8 products per chapter, each
+                                      # with >= 1% of its chapter's trade
+
+Three files are written to frontend/public/hierarchies/:
+
+    tree.json      # nested {from, to, total_value, children: [...]} (the
+                   # /api/sectors shape, with partners under each HS4)
+    nodes.json     # flat treemap/sunburst arrays: ids, keys, labels, parents,
+                   # levels, values, tariff, share_of_total
+    sankey.json    # node labels/levels and link source/target/value/tariff
+
+Tariffs of aggregated nodes are trade-weighted (revenue / trade), falling
+back to the simple mean where no trade was recorded.
+"""
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/hierarchies.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.conditional_fetch import write_if_changed
+from utils.publish import resolve_path
+from utils.shards import WORLD_ISO
+
+HIERARCHY_DIR = "../frontend/public/hierarchies"
+OTHER = "Other"
+
+# level -> (max children kept per parent, min share of the parent's value)
+LEVEL_LIMITS: Dict[str, Tuple[int, float]] = {
+    'hs2': (12, 0.005),
+    'hs4': (8, 0.01),
+    'partner': (5, 0.02),
+}
+
+# The Sankey only shows the first two levels and fewer nodes
+SANKEY_LIMITS: Dict[str, Tuple[int, float]] = {
+    'hs2': (5, 0.0),
+    'hs4': (2, 0.0),
+}
+
+LEVELS = ['hs2', 'hs4', 'partner']
+
+def _node(level: str, key: str, name: str, stats: np.ndarray) -> Dict:
+    value, revenue, tariff_sum, count = (float(v) for v in stats)
+    if value > 0:
+        tariff = revenue / value * 100
+    else:
+        tariff = tariff_sum / count if count else 0.0
+    return {
+        'level': level,
+        'key': key,
+        'name': name,
+        'value': value,
+        'revenue': revenue,
+        'tariff': tariff,
+        'stats': stats,
+        'children': [],
+    }
+
+def _prune(children: List[Dict], level: str, parent_key: str, limits: Dict[str, Tuple[int, float]]) -> List[Dict]:
+    """Keep the largest children, merging the rest into one Other node"""
+    top_n, min_share = limits.get(level, (len(children), 0.0))
+    children.sort(key=lambda node: (-node['value'], node['key']))
+    total = sum(node['value'] for node in children)
+    keep = [node for i, node in enumerate(children)
+            if i < top_n and (not total or node['value'] / total >= min_share)]
+    rest = children[len(keep):]
+    if len(rest) == 1:
+        # Merging a single node into "Other" only hides its name
+        keep, rest = children[:len(keep) + 1], []
+    if rest:
+        stats = np.sum([node['stats'] for node in rest], axis=0)
+        other = _node(level, f"{OTHER}-{parent_key}" if parent_key else OTHER, OTHER, stats)
+        other['merged'] = len(rest)
+        keep.append(other)
+    return keep
+
+def build_tree(df: pd.DataFrame, limits: Optional[Dict[str, Tuple[int, float]]] = None,
+               depth: int = len(LEVELS)) -> Dict:
+    """
+    Aggregate the expanded dataset into a pruned chapter → product → partner tree
+
+    Args:
+        df: Expanded dataset (hs4 as text); the World aggregate is left out
+        limits: Per-level (top_n, min_share) overrides of LEVEL_LIMITS
+        depth: Number of levels to build (2 stops at HS4)
+
+    Returns:
+        Root node; every node has level, key, name, value, revenue, tariff and children
+    """
+    limits = {**LEVEL_LIMITS, **(limits or {})}
+    df = df[df['partner_iso'].str.upper() != WORLD_ISO]
+    leaves = df.assign(hs2=df['hs4'].str[:2], partner=df['partner_iso'], count=1).groupby(
+        ['hs2', 'hs4', 'partner'], sort=True).agg(
+        value=('trade_value_total', 'sum'),
+        revenue=('tariff_revenue_estimate', 'sum'),
+        tariff_sum=('simple_average', 'sum'),
+        count=('count', 'sum'),
+    )
+    names = {
+        'hs2': df.assign(hs2=df['hs4'].str[:2]).groupby('hs2')['category'].first().to_dict()
+        if 'category' in df.columns else {},
+        'hs4': {},
+        'partner': df.groupby('partner_iso')['partner_name'].first().dropna().to_dict(),
+    }
+    stat_columns = ['value', 'revenue', 'tariff_sum', 'count']
+
+    def build(frame: pd.DataFrame, level_index: int, parent_key: str) -> List[Dict]:
+        level = LEVELS[level_index]
+        grouped = frame.groupby(level=level_index, sort=True)
+        children = []
+        for key, group in grouped:
+            stats = group[stat_columns].to_numpy(dtype=float).sum(axis=0)
+            name = names[level].get(key, f"HS4 {key}" if level == 'hs4' else key)
+            node = _node(level, key, name, stats)
+            if level_index + 1 < depth:
+                node['children'] = build(group, level_index + 1, key)
+            children.append(node)
+        return _prune(children, level, parent_key, limits)
+
+    root = _node('root', 'world', "World (Bilateral)", leaves[stat_columns].to_numpy(dtype=float).sum(axis=0))
+    root['children'] = build(leaves, 0, '')
+    return root
+
+def _share(node: Dict, total: float) -> float:
+    return round(node['value'] / total * 100, 4) if total else 0.0
+
+def to_nested(root: Dict, reporter: str = "USA") -> Dict:
+    """Nested document in the /api/sectors shape (hs2 → hs4 → partner children)"""
+    total = root['value']
+    id_fields = {'hs2': 'hs2', 'hs4': 'hs4', 'partner': 'partner_iso'}
+
+    def convert(node: Dict) -> Dict:
+        item = {
+            id_fields[node['level']]: node['key'],
+            'name': node['name'],
+            'value': round(node['value'], 2),
+            'tariff': round(node['tariff'], 4),
+            'share_of_total': _share(node, total),
+            'children': [convert(child) for child in node['children']],
+        }
+        if 'merged' in node:
+            item['merged'] = node['merged']
+        return item
+
+    return {
+        'from': reporter,
+        'to': root['name'],
+        'total_value': round(total, 2),
+        'children': [convert(child) for child in root['children']],
+    }
+
+def to_flat(root: Dict) -> Dict:
+    """Parallel arrays for Plotly treemap/sunburst traces (unique ids, parent ids)"""
+    total = root['value']
+    flat = {'ids': [], 'keys': [], 'labels': [], 'parents': [], 'levels': [], 'values': [], 'tariff': [], 'share_of_total': []}
+
+    def walk(node: Dict, node_id: str, parent_id: str):
+        flat['ids'].append(node_id)
+        flat['keys'].append(node['key'])
+        flat['labels'].append(node['name'])
+        flat['parents'].append(parent_id)
+        flat['levels'].append(node['level'])
+        flat['values'].append(round(node['value'], 2))
+        flat['tariff'].append(round(node['tariff'], 4))
+        flat['share_of_total'].append(_share(node, total))
+        for child in node['children']:
+            walk(child, f"{node_id}/{child['key']}", node_id)
+
+    walk(root, root['key'], '')
+    return flat
+
+def to_sankey(root: Dict, reporter: str = "United States") -> Dict:
+    """Node and link arrays for a Plotly Sankey (reporter → HS2 → HS4)"""
+    sankey = {'labels': [reporter], 'keys': ['reporter'], 'levels': ['reporter'],
+              'source': [], 'target': [], 'value': [], 'tariff': []}
+
+    def walk(node: Dict, index: int):
+        for child in node['children']:
+            sankey['labels'].append(child['name'])
+            sankey['keys'].append(child['key'])
+            sankey['levels'].append(child['level'])
+            child_index = len(sankey['labels']) - 1
+            sankey['source'].append(index)
+            sankey['target'].append(child_index)
+            sankey['value'].append(round(child['value'], 2))
+            sankey['tariff'].append(round(child['tariff'], 4))
+            walk(child, child_index)
+
+    walk(root, 0)
+    return sankey
+
+def _dumps(document: Dict) -> bytes:
+    return json.dumps(document, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def write_hierarchies(df: pd.DataFrame, out_dir: str = HIERARCHY_DIR,
+                      limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                      sankey_limits: Optional[Dict[str, Tuple[int, float]]] = None) -> Dict[str, int]:
+    """
+    Build and write tree.json, nodes.json and sankey.json
+
+    Args:
+        df: Expanded dataset
+        out_dir: Directory served to the browser
+        limits: Per-level (top_n, min_share) overrides for the tree and flat nodes
+        sankey_limits: Per-level overrides for the Sankey
+
+    Returns:
+        File name -> size in bytes
+    """
+    print("🌳 Writing chart hierarchies...")
+    root = build_tree(df, limits)
+    sankey_root = build_tree(df, {**SANKEY_LIMITS, **(sankey_limits or {})}, depth=2)
+
+    files = {
+        'tree.json': _dumps(to_nested(root)),
+        'nodes.json': _dumps(to_flat(root)),
+        'sankey.json': _dumps(to_sankey(sankey_root)),
+    }
+    for filename, data in files.items():
+        write_if_changed(os.path.join(out_dir, filename), data)
+
+    sizes = {filename: len(data) for filename, data in files.items()}
+    print(f"  ✓ {len(json.loads(files['nodes.json'])['ids']):,} tree nodes, "
+          + ", ".join(f"{name} {size / 1024:.1f} KB" for name, size in sizes.items()))
+    return sizes
+
+def main():
+    """Rebuild the chart hierarchies from the currently published expanded dataset"""
+    df = pd.read_csv(resolve_path("expanded_summary.csv"), dtype={'hs4': str, 'category_code': str})
+    write_hierarchies(df)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# partner_groups.py
+"""
+Regional and bloc rollups of the expanded dataset (EU, ASEAN, USMCA, ...).
+
+Group membership is stored once as a sparse partner × group matrix, as
+(partner, group) coordinate pairs compressed into per-partner offsets.
+Groups may overlap (France is in both the EU and the G7). All group
+aggregates come from a single sparse product of the HS4 × partner records
+with that matrix. Each record is repeated once per group of its partner, and
+one bincount per metric sums the copies into the HS4 × group cells:
+
+    membership = default_membership()
+    membership.add_group('NORDICS', ['DNK', 'FIN', 'ISL', 'NOR', 'SWE'], "Nordic countries")
+    rollup = membership.aggregate(expanded_df)
+    rollup['tariff'].loc['2709', 'EU']       # trade-weighted tariff on crude oil from the EU
+    membership.totals(expanded_df)           # one row per group
+
+A new bloc only adds its member pairs: queries still run one bincount
+whatever the number of groups. Tariffs are trade-weighted (revenue / trade),
+falling back to the simple mean where no trade was recorded, as in the
+heatmap. The World aggregate row is never counted in a group.
+"""
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/partner_groups.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.flow_tiles import ISO_ALIASES
+from utils.publish import resolve_path
+from utils.shards import WORLD_ISO
+
+METRICS = ['trade_value', 'tariff_revenue', 'tariff']
+REQUIRED_COLUMNS = ['hs4', 'partner_iso', 'trade_value_total', 'tariff_revenue_estimate', 'simple_average']
+
+# group -> (display name, ISO3 members)
+PARTNER_GROUPS: Dict[str, Tuple[str, List[str]]] = {
+    'EU': ("European Union", [
+        'AUT', 'BEL', 'BGR', 'HRV', 'CYP', 'CZE', 'DNK', 'EST', 'FIN', 'FRA', 'DEU', 'GRC', 'HUN', 'IRL',
+        'ITA', 'LVA', 'LTU', 'LUX', 'MLT', 'NLD', 'POL', 'PRT', 'ROU', 'SVK', 'SVN', 'ESP', 'SWE',
+    ]),
+    'ASEAN': ("ASEAN", ['BRN', 'KHM', 'IDN', 'LAO', 'MYS', 'MMR', 'PHL', 'SGP', 'THA', 'VNM']),
+    'USMCA': ("USMCA", ['CAN', 'MEX', 'USA']),
+    'G7': ("G7", ['CAN', 'FRA', 'DEU', 'ITA', 'JPN', 'GBR', 'USA']),
+}
+
+def _canonical(isos: Iterable[str]) -> np.ndarray:
+    """Upper-case ISO3 codes with legacy WITS codes mapped (ROM -> ROU)"""
+    return np.array([ISO_ALIASES.get(str(iso).upper(), str(iso).upper()) for iso in isos], dtype=object)
+
+class GroupMembership:
+    """Sparse partner × group membership matrix"""
+
+    def __init__(self, groups: Optional[Dict[str, Tuple[str, Iterable[str]]]] = None):
+        self.keys: List[str] = []
+        self.names: Dict[str, str] = {}
+        self._members: List[np.ndarray] = []    # sorted member ISO3 codes, one array per group
+        for key, (name, members) in (groups or {}).items():
+            self.add_group(key, members, name)
+
+    def add_group(self, key: str, members: Iterable[str], name: Optional[str] = None) -> 'GroupMembership':
+        """Register (or replace) a group; only its member pairs are stored"""
+        members = np.unique(_canonical(members))
+        if key in self.names:
+            i = self.keys.index(key)
+            self._members[i] = members
+        else:
+            self.keys.append(key)
+            self._members.append(members)
+        self.names[key] = name or key
+        return self
+
+    def members(self, key: str) -> List[str]:
+        return list(self._members[self.keys.index(key)])
+
+    def edges(self) -> pd.DataFrame:
+        """Coordinate form of the matrix: one (partner, group) row per membership"""
+        if not self.keys:
+            return pd.DataFrame({'partner': [], 'group': []})
+        return pd.DataFrame({'partner': np.concatenate(self._members),
+                             'group': np.repeat(np.arange(len(self.keys)), [len(m) for m in self._members])})
+
+    def matrix(self, partners: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compressed rows of the matrix over a partner axis
+
+        Args:
+            partners: Partner ISO3 codes as they appear in the data (legacy codes allowed)
+
+        Returns:
+            (offsets, groups): partner j belongs to groups[offsets[j]:offsets[j + 1]]
+        """
+        partners = _canonical(partners)
+        edges = self.edges()
+        rows = pd.Index(partners).get_indexer(edges['partner'])
+        keep = rows >= 0
+        rows, groups = rows[keep], edges['group'].to_numpy(dtype=int)[keep]
+        order = np.argsort(rows, kind='stable')
+        rows, groups = rows[order], groups[order]
+        offsets = np.searchsorted(rows, np.arange(len(partners) + 1))
+        return offsets, groups
+
+    def _products(self, df: pd.DataFrame) -> Tuple[pd.Index, Dict[str, np.ndarray]]:
+        """HS4 × group sums of trade, revenue, tariff and record counts (one bincount each)"""
+        df = df[df['partner_iso'].astype(str).str.upper() != WORLD_ISO]
+        hs4_codes, hs4 = np.unique(df['hs4'].astype(str).to_numpy(), return_inverse=True)
+        partner_pos, partners = pd.factorize(df['partner_iso'].astype(str))
+        offsets, groups = self.matrix(partners)
+
+        # Sparse product: every record is repeated once per group of its partner
+        fanout = np.diff(offsets)[partner_pos]
+        records = np.repeat(np.arange(len(df)), fanout)
+        within = np.arange(len(records)) - np.repeat(np.cumsum(fanout) - fanout, fanout)
+        record_groups = groups[offsets[partner_pos][records] + within]
+        cells = hs4[records] * len(self.keys) + record_groups
+        size = len(hs4_codes) * len(self.keys)
+
+        columns = {'trade': 'trade_value_total', 'revenue': 'tariff_revenue_estimate', 'tariff_sum': 'simple_average'}
+        sums = {name: np.bincount(cells, weights=df[col].to_numpy(dtype=float)[records], minlength=size)
+                for name, col in columns.items()}
+        sums['count'] = np.bincount(cells, minlength=size).astype(float)
+        return pd.Index(hs4_codes, name='hs4'), sums
+
+    @staticmethod
+    def _tariff(sums: Dict[str, np.ndarray]) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tariff = np.where(sums['trade'] > 0, sums['revenue'] / sums['trade'] * 100,
+                              sums['tariff_sum'] / sums['count'])
+        return np.where(sums['count'] > 0, tariff, np.nan)
+
+    def aggregate(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        HS4 × group matrices of every metric
+
+        Args:
+            df: Expanded dataset (REQUIRED_COLUMNS)
+
+        Returns:
+            Metric name (METRICS) -> DataFrame indexed by hs4 with one column per group
+            (trade and revenue are 0 and tariff NaN where a group has no record)
+        """
+        hs4_codes, sums = self._products(df)
+        shape = (len(hs4_codes), len(self.keys))
+        values = {'trade_value': sums['trade'], 'tariff_revenue': sums['revenue'], 'tariff': self._tariff(sums)}
+        return {metric: pd.DataFrame(values[metric].reshape(shape), index=hs4_codes, columns=list(self.keys))
+                for metric in METRICS}
+
+    def totals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """One row per group: members, partners present, records, trade, revenue and tariff"""
+        hs4_codes, sums = self._products(df)
+        shape = (len(hs4_codes), len(self.keys))
+        group_sums = {name: values.reshape(shape).sum(axis=0) for name, values in sums.items()}
+        present = set(_canonical(df['partner_iso'].astype(str).unique()))
+        return pd.DataFrame({
+            'group': self.keys,
+            'name': [self.names[key] for key in self.keys],
+            'members': [len(m) for m in self._members],
+            'partners': [len(present.intersection(m)) for m in self._members],
+            'records': group_sums['count'].astype(int),
+            'trade_value': group_sums['trade'],
+            'tariff_revenue': group_sums['revenue'],
+            'tariff': self._tariff(group_sums),
+        })
+
+def default_membership() -> GroupMembership:
+    """Membership matrix of the built-in PARTNER_GROUPS"""
+    return GroupMembership(PARTNER_GROUPS)
+
+def main():
+    """Print the group totals of the currently published expanded dataset"""
+    df = pd.read_csv(resolve_path("expanded_summary.csv"), dtype={'hs4': str, 'category_code': str})
+    totals = default_membership().totals(df)
+    print("🌐 Partner group totals:")
+    for row in totals.itertuples():
+        print(f"  {row.group:<6} {row.partners:>3}/{row.members:<3} partners  "
+              f"${row.trade_value / 1e9:8.1f}B trade  {row.tariff:5.2f}% weighted tariff")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# publish.py
+"""
+Atomic, versioned publishing of processed datasets.
+
+Each pipeline run is written to its own directory under data/processed/versions/
+together with a manifest (sha256, size and row count per file). The run is only
+made visible by atomically replacing the `CURRENT` pointer file, so readers never
+observe a half-written dataset and can cache by version ID.
+
+Layout:
+    data/processed/CURRENT                      -> "20261019T101500Z-3f9a1c"
+    data/processed/versions/<version>/manifest.json
+    data/processed/versions/<version>/expanded_summary.csv
+    data/processed/expanded_summary.csv         (legacy flat copy, replaced atomically)
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+PROCESSED_DIR = "data/processed"
+VERSIONS_DIR = "versions"
+CURRENT_POINTER = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+Output = Union[pd.DataFrame, dict, list]
+
+def _sha256(path: str) -> str:
+    """Hash a file in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_output(path: str, output: Output) -> Optional[int]:
+    """Write one output file; returns its row count (None for JSON documents)"""
+    if isinstance(output, pd.DataFrame):
+        output.to_csv(path, index=False)
+        return len(output)
+
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2, default=str)
+    return None
+
+def _link_or_copy(src: str, dst: str):
+    """Hard-link an unchanged file into a new version (copy if links are unsupported)"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def _atomic_write_text(path: str, text: str):
+    """Write a small text file so readers see either the old or the new content"""
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def current_version(root: str = PROCESSED_DIR) -> Optional[str]:
+    """Version ID the CURRENT pointer refers to, or None if nothing was published yet"""
+    try:
+        with open(os.path.join(root, CURRENT_POINTER), 'r') as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version or None
+
+def version_dir(version: str, root: str = PROCESSED_DIR) -> str:
+    """Directory holding a published version"""
+    return os.path.join(root, VERSIONS_DIR, version)
+
+def load_manifest(version: Optional[str] = None, root: str = PROCESSED_DIR) -> Optional[Dict]:
+    """Manifest of a version (the current one by default)"""
+    version = version or current_version(root)
+    if version is None:
+        return None
+    try:
+        with open(os.path.join(version_dir(version, root), MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+def resolve_path(filename: str, root: str = PROCESSED_DIR, version: Optional[str] = None) -> str:
+    """Path of a file in a version (the current one by default), falling back to the flat processed directory"""
+    version = version or current_version(root)
+    if version is not None:
+        path = os.path.join(version_dir(version, root), filename)
+        if os.path.exists(path):
+            return path
+    return os.path.join(root, filename)
+
+def publish_outputs(outputs: Dict[str, Output],
+                    root: str = PROCESSED_DIR,
+                    carry_forward: bool = True,
+                    legacy_copies: bool = True,
+                    keep_versions: int = 10,
+                    drop: Iterable[str] = ()) -> str:
+    """
+    Publish a pipeline run as a new immutable version
+
+    Args:
+        outputs: Mapping of file name -> DataFrame (written as CSV) or JSON document
+        root: Processed data directory
+        carry_forward: Link files of the current version that this run did not produce
+            (so curate.py and expand_tariffs.py can publish independently)
+        legacy_copies: Also replace the flat data/processed/<file> copies atomically
+        keep_versions: Number of versions to retain (older ones are pruned)
+        drop: Files of the current version that must not be carried forward (stale
+            derived files); their legacy flat copies are removed too
+
+    Returns:
+        The published version ID (the current one if nothing changed)
+    """
+    versions_root = os.path.join(root, VERSIONS_DIR)
+    os.makedirs(versions_root, exist_ok=True)
+
+    parent = current_version(root)
+    parent_manifest = load_manifest(parent, root) if parent else None
+
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:6]}"
+    staging = os.path.join(versions_root, f".staging-{version}")
+    os.makedirs(staging)
+
+    drop = set(drop)
+    files = {}
+    try:
+        for filename, output in outputs.items():
+            path = os.path.join(staging, filename)
+            rows = _write_output(path, output)
+            files[filename] = {'sha256': _sha256(path), 'bytes': os.path.getsize(path), 'rows': rows}
+
+        if carry_forward and parent_manifest:
+            for filename, entry in parent_manifest['files'].items():
+                if filename not in files and filename not in drop:
+                    _link_or_copy(os.path.join(version_dir(parent, root), filename),
+                                  os.path.join(staging, filename))
+                    files[filename] = entry
+
+        # Nothing changed: keep the current version so reader caches stay valid
+        if parent_manifest and parent_manifest['files'] == files:
+            shutil.rmtree(staging)
+            print(f"  ✓ Outputs unchanged, keeping version {parent}")
+            return parent
+
+        manifest = {
+            'version': version,
+            'parent': parent,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'files': files,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(staging, version_dir(version, root))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # The switch: readers following CURRENT see the whole new version or the old one
+    _atomic_write_text(os.path.join(root, CURRENT_POINTER), version + "\n")
+
+    if legacy_copies:
+        for filename in outputs:
+            tmp_path = os.path.join(root, f".{filename}.tmp-{version}")
+            shutil.copyfile(os.path.join(version_dir(version, root), filename), tmp_path)
+            os.replace(tmp_path, os.path.join(root, filename))
+        for filename in drop - set(outputs):
+            if os.path.exists(os.path.join(root, filename)):
+                os.remove(os.path.join(root, filename))
+
+    print(f"📦 Published version {version} ({len(outputs)} new, {len(files) - len(outputs)} carried forward)")
+
+    prune_versions(root, keep=keep_versions)
+    return version
+
+def list_versions(root: str = PROCESSED_DIR) -> List[str]:
+    """Published version IDs, oldest first"""
+    versions_root = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_root):
+        return []
+    return sorted(name for name in os.listdir(versions_root)
+                  if not name.startswith('.') and os.path.isdir(os.path.join(versions_root, name)))
+
+def prune_versions(root: str = PROCESSED_DIR, keep: int = 10) -> List[str]:
+    """Remove the oldest versions beyond `keep`, never the current one; returns removed IDs"""
+    current = current_version(root)
+    versions = [v for v in list_versions(root) if v != current]
+    removable = versions[:max(len(versions) - (keep - 1), 0)] if keep > 0 else versions
+
+    for version in removable:
+        shutil.rmtree(version_dir(version, root), ignore_errors=True)
+    return removable
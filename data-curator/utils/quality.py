@@ -0,0 +1,273 @@
+# quality.py
+"""
+Declarative, vectorized data-quality rules for the processed datasets.
+
+A rule set is a list of constraints, each with a severity:
+
+    rules = [
+        matches('hs4', r'[0-9]{4}'),                      # severity='error' by default
+        in_range('simple_average', 0, 1000),
+        unique(['hs4', 'partner_iso']),
+        references('hs4', hs4_codes, severity='warning'),
+    ]
+    report = check_quality(df, rules, "expanded dataset")
+
+`evaluate()` checks every rule against the frame in one pass. Each rule is a
+numpy/pandas expression producing a violation mask, and columns are
+converted once and shared between rules. The masks are stacked into one
+rows × rules matrix that yields every violation count at once. The report
+holds the count and a few sample rows per rule. `enforce()` raises
+DataQualityError when a rule of a failing severity (errors by default) has
+violations, and the pipelines call it before publishing. A bad run therefore
+never becomes the current version.
+"""
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Allow running as `python utils/quality.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.publish import resolve_path
+
+QUALITY_FILE = "quality_report.json"
+MERGED_QUALITY_FILE = "merged_quality_report.json"
+HS_DICTIONARY_FILE = "hs_dictionary.json"
+
+SEVERITIES = ['error', 'warning', 'info']
+FAIL_ON = ('error',)
+SAMPLE_SIZE = 5
+
+# Plausible bounds for the WITS extracts (tariffs are percentages)
+TARIFF_RANGE = (0, 1000)
+YEAR_RANGE = (1988, 2100)
+
+class DataQualityError(ValueError):
+    """Raised when a dataset violates rules of a failing severity"""
+
+    def __init__(self, message: str, report: Dict):
+        super().__init__(message)
+        self.report = report
+
+class Columns:
+    """Per-evaluation cache so rules sharing a column convert it only once"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._text: Dict[str, pd.Series] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+
+    def text(self, column: str) -> pd.Series:
+        if column not in self._text:
+            self._text[column] = self.df[column].astype('string').str.strip()
+        return self._text[column]
+
+    def numeric(self, column: str) -> np.ndarray:
+        if column not in self._numeric:
+            self._numeric[column] = pd.to_numeric(self.df[column], errors='coerce').to_numpy(dtype=float)
+        return self._numeric[column]
+
+class Rule:
+    """One constraint: a vectorized check returning a boolean violation mask"""
+
+    def __init__(self, name: str, columns: Sequence[str], check: Callable[[Columns], np.ndarray],
+                 severity: str = 'error', description: str = ""):
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown severity {severity!r} (expected one of {SEVERITIES})")
+        self.name = name
+        self.columns = list(columns)
+        self.check = check
+        self.severity = severity
+        self.description = description
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, severity={self.severity!r})"
+
+def not_null(column: str, severity: str = 'error') -> Rule:
+    """Column must not be missing or blank"""
+    def check(cols: Columns) -> np.ndarray:
+        values = cols.text(column)
+        return (values.isna() | (values == "")).to_numpy(dtype=bool)
+    return Rule(f"{column}_not_null", [column], check, severity, f"{column} is present")
+
+def matches(column: str, pattern: str, severity: str = 'error') -> Rule:
+    """Column must fully match a regular expression (missing values violate)"""
+    regex = re.compile(pattern)
+    def check(cols: Columns) -> np.ndarray:
+        return ~cols.text(column).str.fullmatch(regex).fillna(False).to_numpy(dtype=bool)
+    return Rule(f"{column}_format", [column], check, severity, f"{column} matches {pattern}")
+
+def in_range(column: str, low: Optional[float] = None, high: Optional[float] = None,
+             severity: str = 'error') -> Rule:
+    """Column must be numeric and within [low, high] (either bound may be open)"""
+    def check(cols: Columns) -> np.ndarray:
+        values = cols.numeric(column)
+        bad = np.isnan(values)
+        if low is not None:
+            bad |= values < low
+        if high is not None:
+            bad |= values > high
+        return bad
+    bounds = f"[{'-inf' if low is None else low}, {'inf' if high is None else high}]"
+    return Rule(f"{column}_range", [column], check, severity, f"{column} within {bounds}")
+
+def unique(columns: Sequence[str], severity: str = 'error') -> Rule:
+    """Key columns must identify at most one row (every duplicate row violates)"""
+    columns = list(columns)
+    def check(cols: Columns) -> np.ndarray:
+        return cols.df.duplicated(columns, keep=False).to_numpy(dtype=bool)
+    return Rule(f"unique_{'_'.join(columns)}", columns, check, severity, f"({', '.join(columns)}) is unique")
+
+def references(column: str, values: Iterable[str], severity: str = 'error', name: Optional[str] = None) -> Rule:
+    """Column values must exist in a reference set (e.g. the HS dictionary)"""
+    allowed = pd.Index(sorted(set(values)))
+    def check(cols: Columns) -> np.ndarray:
+        return ~cols.text(column).isin(allowed).to_numpy(dtype=bool)
+    return Rule(name or f"{column}_reference", [column], check, severity,
+                f"{column} exists in the reference set ({len(allowed):,} codes)")
+
+def load_hs4_codes(path: Optional[str] = None) -> Optional[List[str]]:
+    """HS4 codes known to the HS dictionary (its 6-digit keys truncated); None if it is missing"""
+    path = path or resolve_path(HS_DICTIONARY_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return sorted({str(code)[:4] for code in json.load(f)})
+
+def expanded_rules(hs4_codes: Optional[Iterable[str]] = None) -> List[Rule]:
+    """Rules for expanded_summary.csv (one row per HS4 × partner)"""
+    rules = [
+        matches('hs4', r'\d{4}'),
+        not_null('partner_iso'),
+        in_range('trade_value_total', 0),
+        in_range('tariff_revenue_estimate', 0),
+        in_range('simple_average', *TARIFF_RANGE),
+        in_range('year_x', *YEAR_RANGE),
+        in_range('year_y', *YEAR_RANGE),
+        unique(['hs4', 'partner_iso']),
+        not_null('partner_name', severity='warning'),
+    ]
+    if hs4_codes is not None:
+        # The dictionary can trail newer HS revisions, so unknown codes only warn
+        rules.append(references('hs4', hs4_codes, severity='warning', name='hs4_in_dictionary'))
+    return rules
+
+def merged_rules(hs4_codes: Optional[Iterable[str]] = None) -> List[Rule]:
+    """Rules for merged_summary.csv (one row per HS4)"""
+    rules = [
+        matches('hs4', r'\d{4}'),
+        in_range('trade_value_total', 0),
+        in_range('simple_average', *TARIFF_RANGE),
+        in_range('year_x', *YEAR_RANGE),
+        in_range('year_y', *YEAR_RANGE),
+        unique(['hs4']),
+    ]
+    if hs4_codes is not None:
+        rules.append(references('hs4', hs4_codes, severity='warning', name='hs4_in_dictionary'))
+    return rules
+
+def _sample(df: pd.DataFrame, mask: np.ndarray, columns: List[str], size: int) -> List[Dict]:
+    rows = np.flatnonzero(mask)[:size]
+    sample = df.iloc[rows][[c for c in columns if c in df.columns]]
+    return [{'row': int(row), **{k: (None if pd.isna(v) else v) for k, v in record.items()}}
+            for row, record in zip(rows, sample.astype(object).to_dict('records'))]
+
+def evaluate(df: pd.DataFrame, rules: List[Rule], sample_size: int = SAMPLE_SIZE) -> Dict:
+    """
+    Check all rules against a dataset
+
+    Args:
+        df: Dataset to check
+        rules: Constraints to evaluate
+        sample_size: Offending rows kept per rule
+
+    Returns:
+        Report with rows, per-severity violation counts and a result per rule
+        (severity, description, violations, sample; missing_columns when it could not run).
+        It holds no timing, so identical data gives a byte-identical published report.
+    """
+    cols = Columns(df)
+    masks = np.zeros((len(df), len(rules)), dtype=bool)
+    missing = {}
+    for i, rule in enumerate(rules):
+        absent = [c for c in rule.columns if c not in df.columns]
+        if absent:
+            # A rule that cannot run must not pass silently
+            missing[i] = absent
+            masks[:, i] = True
+            continue
+        masks[:, i] = rule.check(cols)
+
+    counts = np.count_nonzero(masks, axis=0)
+    results = []
+    for i, rule in enumerate(rules):
+        result = {
+            'rule': rule.name,
+            'severity': rule.severity,
+            'description': rule.description,
+            'violations': int(counts[i]),
+            'sample': _sample(df, masks[:, i], rule.columns, sample_size) if counts[i] and i not in missing else [],
+        }
+        if i in missing:
+            result['missing_columns'] = missing[i]
+        results.append(result)
+
+    by_severity = {severity: sum(r['violations'] for r in results if r['severity'] == severity)
+                   for severity in SEVERITIES}
+    return {
+        'rows': len(df),
+        'rules': len(rules),
+        'violations': by_severity,
+        'failed_rows': int(masks.any(axis=1).sum()),
+        'results': results,
+    }
+
+def enforce(report: Dict, fail_on: Iterable[str] = FAIL_ON):
+    """
+    Raise if any rule of a failing severity has violations
+
+    Raises:
+        DataQualityError: With the offending rules in the message and the full report attached
+    """
+    fail_on = set(fail_on)
+    failing = [r for r in report['results'] if r['severity'] in fail_on and r['violations']]
+    if failing:
+        details = ", ".join(f"{r['rule']} ({r['violations']:,})" for r in failing)
+        raise DataQualityError(f"Data quality check failed: {details}", report)
+
+def check_quality(df: pd.DataFrame, rules: List[Rule], name: str = "dataset",
+                  fail_on: Iterable[str] = FAIL_ON, sample_size: int = SAMPLE_SIZE) -> Dict:
+    """
+    Evaluate, print a summary and enforce the failing severities
+
+    Returns:
+        The report (also attached to the DataQualityError when enforcement fails)
+    """
+    print(f"🧪 Checking {name} quality ({len(rules)} rules)...")
+    start = time.perf_counter()
+    report = evaluate(df, rules, sample_size)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for result in report['results']:
+        if result['violations']:
+            icon = '❌' if result['severity'] in set(fail_on) else '⚠️ '
+            print(f"  {icon} {result['rule']}: {result['violations']:,} {result['severity']}(s)"
+                  + (f" (missing columns: {', '.join(result['missing_columns'])})" if 'missing_columns' in result else ""))
+    print(f"  ✓ {report['rows']:,} rows checked in {elapsed_ms:.1f} ms, "
+          f"{report['failed_rows']:,} with violations")
+    enforce(report, fail_on)
+    return report
+
+def main():
+    """Check the currently published expanded dataset and print the report"""
+    df = pd.read_csv(resolve_path("expanded_summary.csv"), dtype={'hs4': str, 'category_code': str})
+    report = check_quality(df, expanded_rules(load_hs4_codes()), "expanded dataset", fail_on=())
+    print(json.dumps(report['violations'], indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# shards.py
+"""
+Static per-product and per-partner slices of the expanded dataset for the frontend.
+
+Instead of downloading and parsing the whole expanded_summary.csv in the
+browser, pages fetch only the slice they render:
+
+    frontend/public/shards/
+        manifest.json          # file -> bytes, sha256, rows; dataset hash
+        partners.json          # per-partner totals (globe + country filter)
+        products.json          # per-HS4 totals (product lists)
+        hs4/<hs4>.json         # one product across all partners
+        partner/<iso>.json     # one partner across all products
+
+Shards are minified, column-oriented JSON ({"partner_iso": [...], ...}), so
+field names are stored once per file rather than once per row. Files are only
+rewritten when their bytes change and shards of products/partners that
+disappeared are removed, so a static host or CDN keeps serving unchanged files
+from cache.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+# Allow running as `python utils/shards.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.conditional_fetch import write_if_changed
+from utils.publish import current_version, resolve_path
+
+SHARD_DIR = "../frontend/public/shards"
+MANIFEST_FILE = "manifest.json"
+WORLD_ISO = "WLD"
+
+# Columns kept per shard row (the shard key itself is stored once)
+HS4_SHARD_COLUMNS = ['partner_iso', 'trade_value_total', 'simple_average', 'tariff_revenue_estimate']
+PARTNER_SHARD_COLUMNS = ['hs4', 'trade_value_total', 'simple_average', 'tariff_revenue_estimate']
+
+# Decimal places kept per numeric column (USD values are whole dollars)
+PRECISION = {
+    'trade_value_total': 0,
+    'tariff_revenue_estimate': 0,
+    'simple_average': 4,
+    'avg_tariff': 4,
+}
+
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9_-]')
+
+def _dumps(document: Dict) -> bytes:
+    return json.dumps(document, separators=(',', ':'), ensure_ascii=False, allow_nan=False).encode('utf-8')
+
+def _column(series: pd.Series) -> List:
+    """JSON-ready column: rounded numbers (ints when whole), None for missing values"""
+    digits = PRECISION.get(series.name)
+    if digits is None:
+        return [None if pd.isna(v) else v for v in series.tolist()]
+    rounded = series.astype(float).round(digits)
+    if digits == 0:
+        return [None if pd.isna(v) else int(v) for v in rounded.tolist()]
+    return [None if pd.isna(v) else v for v in rounded.tolist()]
+
+def _columnar(df: pd.DataFrame, columns: List[str], **keys) -> Dict:
+    document = dict(keys)
+    document['rows'] = len(df)
+    for col in columns:
+        document[col] = _column(df[col])
+    return document
+
+def shard_name(key: str) -> str:
+    """File-system and URL safe shard file stem"""
+    return _SAFE_NAME.sub('_', str(key))
+
+def partner_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trade total, mean tariff and product count per partner, largest first
+
+    The World aggregate is excluded; ranks start at 1.
+    """
+    partners = df[df['partner_iso'].str.upper() != WORLD_ISO]
+    totals = partners.groupby('partner_iso', sort=False).agg(
+        name=('partner_name', 'first'),
+        trade_value_total=('trade_value_total', 'sum'),
+        avg_tariff=('simple_average', 'mean'),
+        products=('hs4', 'nunique'),
+    ).reset_index()
+    totals['name'] = totals['name'].fillna(totals['partner_iso'])
+    totals = totals.sort_values(['trade_value_total', 'partner_iso'], ascending=[False, True], kind='stable')
+    totals['rank'] = range(1, len(totals) + 1)
+    return totals.reset_index(drop=True)
+
+def product_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Trade total, tariff and partner count per HS4 (World aggregate excluded)"""
+    products = df[df['partner_iso'].str.upper() != WORLD_ISO]
+    return products.groupby('hs4').agg(
+        category=('category', 'first'),
+        trade_value_total=('trade_value_total', 'sum'),
+        tariff_revenue_estimate=('tariff_revenue_estimate', 'sum'),
+        avg_tariff=('simple_average', 'mean'),
+        partners=('partner_iso', 'nunique'),
+    ).reset_index()
+
+def build_shards(df: pd.DataFrame) -> Dict[str, bytes]:
+    """
+    Render every shard of the expanded dataset
+
+    Args:
+        df: Expanded dataset (hs4 as text)
+
+    Returns:
+        Mapping of relative path (e.g. "hs4/8703.json") -> file content
+    """
+    df = df.sort_values(['hs4', 'partner_iso'], kind='stable')
+    files = {}
+
+    partners = partner_totals(df)
+    files['partners.json'] = _dumps(_columnar(
+        partners, ['partner_iso', 'name', 'trade_value_total', 'avg_tariff', 'products', 'rank']))
+    products = product_totals(df)
+    files['products.json'] = _dumps(_columnar(
+        products, ['hs4', 'category', 'trade_value_total', 'tariff_revenue_estimate', 'avg_tariff', 'partners']))
+
+    for hs4, group in df.groupby('hs4', sort=False):
+        files[f"hs4/{shard_name(hs4)}.json"] = _dumps(_columnar(group, HS4_SHARD_COLUMNS, hs4=hs4))
+    for iso, group in df.groupby('partner_iso', sort=False):
+        name = group['partner_name'].dropna()
+        files[f"partner/{shard_name(iso)}.json"] = _dumps(_columnar(
+            group, PARTNER_SHARD_COLUMNS, partner_iso=iso, name=name.iloc[0] if len(name) else iso))
+    return files
+
+def remove_stale(out_dir: str, subdirs: Iterable[str], keep: Iterable[str]) -> int:
+    """Delete files under out_dir/<subdir>/ whose relative path is not in `keep`; returns the count"""
+    keep = set(keep)
+    removed = 0
+    for subdir in subdirs:
+        directory = os.path.join(out_dir, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            if f"{subdir}/{filename}" not in keep:
+                os.remove(os.path.join(directory, filename))
+                removed += 1
+    return removed
+
+def write_shards(df: pd.DataFrame, out_dir: str = SHARD_DIR, version: Optional[str] = None) -> Dict:
+    """
+    Write the shards and their manifest, touching only files whose content changed
+
+    Args:
+        df: Expanded dataset
+        out_dir: Directory served to the browser
+        version: Published dataset version the shards were built from
+
+    Returns:
+        The manifest
+    """
+    print("🧩 Writing frontend shards...")
+    files = build_shards(df)
+
+    entries = {}
+    written = 0
+    for path, data in sorted(files.items()):
+        written += write_if_changed(os.path.join(out_dir, path), data)
+        entries[path] = {'bytes': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+    # Drop shards of products/partners that are no longer in the dataset
+    removed = remove_stale(out_dir, ('hs4', 'partner'), files)
+
+    digest = hashlib.sha256()
+    for path in sorted(entries):
+        digest.update(f"{path}:{entries[path]['sha256']}\n".encode('utf-8'))
+    manifest = {
+        'version': version,
+        'hash': digest.hexdigest()[:16],
+        'rows': len(df),
+        'hs4': sorted(shard_name(hs4) for hs4 in df['hs4'].unique()),
+        'partners': sorted(shard_name(iso) for iso in df['partner_iso'].unique()),
+        'files': entries,
+    }
+    write_if_changed(os.path.join(out_dir, MANIFEST_FILE),
+                     json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+    sizes = [entry['bytes'] for path, entry in entries.items() if '/' in path]
+    print(f"  ✓ {len(files)} files ({written} rewritten, {removed} removed), "
+          f"{sum(entries[p]['bytes'] for p in entries) / 1024:.0f} KB total")
+    print(f"  📦 partners.json: {entries['partners.json']['bytes'] / 1024:.1f} KB, "
+          f"largest shard: {max(sizes, default=0) / 1024:.1f} KB")
+    return manifest
+
+def main():
+    """Rebuild the shards from the currently published expanded dataset"""
+    df = pd.read_csv(resolve_path("expanded_summary.csv"), dtype={'hs4': str, 'category_code': str})
+    write_shards(df, version=current_version())
+
+if __name__ == "__main__":
+    main()
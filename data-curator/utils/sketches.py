@@ -0,0 +1,411 @@
+# sketches.py
+"""
+Mergeable approximate-analytics sketches for partitioned datasets.
+
+Exact medians, top-N rankings and distinct counts need the whole dataset in
+memory. The sketches here are built per partition (e.g. reporter × year, or
+per CSV chunk), are small and fixed-size, and merge cheaply, so dashboard
+stats over any set of partitions come back in constant memory and time:
+
+- KLLSketch: quantiles (tariff rates, trade values), about 1% rank error at k=200
+- SpaceSaving: weighted heavy hitters (top partners/products by trade value)
+  with a per-item overestimation bound
+- HyperLogLog: distinct counts (~1.04 / sqrt(2^p) relative error)
+
+DatasetSketch bundles them for the expanded/merged schema, plus exact row
+counts, sums, minima and maxima. The pipeline publishes them as JSON next to
+the outputs:
+
+    document = sketch_document(expanded_df, by=['Reporter_ISO_N', 'year_y'])
+    publish_outputs({..., SKETCH_FILE: document})
+
+    sketch = load_sketch(document, partitions=['840-2024'])
+    sketch.summary()['tariff']['median']
+"""
+import base64
+import hashlib
+import math
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.shards import WORLD_ISO
+
+SKETCH_FILE = "expanded_sketches.json"
+MERGED_SKETCH_FILE = "merged_sketches.json"
+
+KLL_K = 200
+HEAVY_HITTER_CAPACITY = 64
+HLL_PRECISION = 12
+
+# Default partitioning of the curated datasets (reporter × trade year)
+PARTITION_COLUMNS = ['Reporter_ISO_N', 'year_y']
+
+# sketch name -> source column(s)
+QUANTILE_COLUMNS = {'tariff': 'simple_average', 'trade_value': 'trade_value_total'}
+HEAVY_HITTERS = {'partners': ('partner_iso', 'trade_value_total'), 'products': ('hs4', 'trade_value_total')}
+DISTINCT_COLUMNS = {'partners': ['partner_iso'], 'products': ['hs4'], 'pairs': ['hs4', 'partner_iso']}
+
+SUMMARY_QUANTILES = {'p10': 0.1, 'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p90': 0.9, 'p99': 0.99}
+
+class KLLSketch:
+    """KLL quantile sketch: compactors whose items carry weight 2^level"""
+
+    def __init__(self, k: int = KLL_K):
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._flip = False
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                leftover, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+                # Alternate the kept half so compaction errors cancel out (and results are reproducible)
+                promoted = items[int(self._flip)::2]
+                self._flip = not self._flip
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: Iterable[float]):
+        """Add values (NaN ignored)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), None when empty"""
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        items, cumulative = self._weighted()
+        index = int(np.searchsorted(cumulative, q * cumulative[-1], side='left'))
+        return float(items[min(index, len(items) - 1)])
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of values <= value"""
+        if not self.count:
+            return 0.0
+        items, cumulative = self._weighted()
+        index = int(np.searchsorted(items, value, side='right'))
+        return float(cumulative[index - 1] / cumulative[-1]) if index else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'k': self.k,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'levels': [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'KLLSketch':
+        sketch = cls(data['k'])
+        sketch.count = data['count']
+        sketch.min = data['min'] if data['min'] is not None else math.inf
+        sketch.max = data['max'] if data['max'] is not None else -math.inf
+        sketch.levels = [np.asarray(items, dtype=float) for items in data['levels']] or [np.empty(0)]
+        return sketch
+
+class SpaceSaving:
+    """Weighted Space-Saving heavy hitters; estimates never undercount"""
+
+    def __init__(self, capacity: int = HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.total = 0.0
+        self.counts: Dict[str, float] = {}
+        self.errors: Dict[str, float] = {}
+
+    def _floor(self) -> float:
+        """Largest count an untracked item may have"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0.0
+
+    def update(self, item: str, weight: float = 1.0):
+        self.total += weight
+        if item in self.counts:
+            self.counts[item] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = weight
+            self.errors[item] = 0.0
+        else:
+            evicted = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(evicted)
+            del self.errors[evicted]
+            self.counts[item] = floor + weight
+            self.errors[item] = floor
+
+    def update_many(self, items: Iterable, weights: Optional[Iterable[float]] = None):
+        """Add a batch; it is aggregated exactly first, then fed largest first"""
+        items = pd.Series(list(items) if not isinstance(items, pd.Series) else items.to_numpy(), dtype=object)
+        weights = pd.Series(np.ones(len(items)) if weights is None else np.asarray(weights, dtype=float))
+        totals = weights.groupby(items.astype(str).to_numpy()).sum().sort_values(ascending=False, kind='stable')
+        for item, weight in totals.items():
+            self.update(item, float(weight))
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Combine two summaries (untracked items count as each side's floor)"""
+        floor_a, floor_b = self._floor(), other._floor()
+        keys = set(self.counts) | set(other.counts)
+        counts = {key: self.counts.get(key, floor_a) + other.counts.get(key, floor_b) for key in keys}
+        errors = {key: self.errors.get(key, floor_a) + other.errors.get(key, floor_b) for key in keys}
+        keep = sorted(keys, key=lambda key: (-counts[key], key))[:self.capacity]
+        self.counts = {key: counts[key] for key in keep}
+        self.errors = {key: errors[key] for key in keep}
+        self.total += other.total
+        return self
+
+    def top(self, n: int = 10) -> List[Dict]:
+        """Largest items with their estimate and guaranteed lower bound"""
+        items = sorted(self.counts, key=lambda key: (-self.counts[key], key))[:n]
+        return [{'item': key, 'estimate': self.counts[key], 'lower_bound': self.counts[key] - self.errors[key]}
+                for key in items]
+
+    def to_dict(self) -> Dict:
+        return {'capacity': self.capacity, 'total': self.total,
+                'items': [[key, self.counts[key], self.errors[key]] for key in sorted(self.counts)]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSaving':
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        for key, count, error in data['items']:
+            sketch.counts[key] = count
+            sketch.errors[key] = error
+        return sketch
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 2^p one-byte registers"""
+
+    def __init__(self, p: int = HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @staticmethod
+    def _hash(item) -> int:
+        return int.from_bytes(hashlib.blake2b(str(item).encode('utf-8'), digest_size=8).digest(), 'little')
+
+    def update_many(self, items: Iterable):
+        bits = 64 - self.p
+        mask = (1 << bits) - 1
+        hashes = [self._hash(item) for item in pd.unique(pd.Series(list(items), dtype=object))]
+        if not hashes:
+            return
+        index = np.fromiter((h >> bits for h in hashes), dtype=np.int64, count=len(hashes))
+        rho = np.fromiter((bits - (h & mask).bit_length() + 1 for h in hashes), dtype=np.uint8, count=len(hashes))
+        np.maximum.at(self.registers, index, rho)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(int))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.p} and {other.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def to_dict(self) -> Dict:
+        return {'p': self.p, 'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HyperLogLog':
+        sketch = cls(data['p'])
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+class DatasetSketch:
+    """Quantile, heavy-hitter and distinct-count sketches of one dataset or partition"""
+
+    def __init__(self, k: int = KLL_K, capacity: int = HEAVY_HITTER_CAPACITY, p: int = HLL_PRECISION):
+        self.rows = 0
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.quantiles = {name: KLLSketch(k) for name in QUANTILE_COLUMNS}
+        self.heavy_hitters = {name: SpaceSaving(capacity) for name in HEAVY_HITTERS}
+        self.distinct = {name: HyperLogLog(p) for name in DISTINCT_COLUMNS}
+
+    def update(self, df: pd.DataFrame) -> 'DatasetSketch':
+        """Add a chunk of rows (columns missing from the chunk are skipped)"""
+        self.rows += len(df)
+        for name, column in QUANTILE_COLUMNS.items():
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce').dropna()
+            self.quantiles[name].update(values.to_numpy())
+            stats = self.stats.setdefault(column, {'count': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf})
+            if len(values):
+                stats['count'] += int(len(values))
+                stats['sum'] += float(values.sum())
+                stats['min'] = min(stats['min'], float(values.min()))
+                stats['max'] = max(stats['max'], float(values.max()))
+        for name, (column, weight) in HEAVY_HITTERS.items():
+            if column in df.columns and weight in df.columns:
+                self.heavy_hitters[name].update_many(df[column].astype(str), df[weight].fillna(0))
+        for name, columns in DISTINCT_COLUMNS.items():
+            if all(column in df.columns for column in columns):
+                keys = df[columns[0]].astype(str)
+                for column in columns[1:]:
+                    keys = keys + '|' + df[column].astype(str)
+                self.distinct[name].update_many(keys)
+        return self
+
+    def merge(self, other: 'DatasetSketch') -> 'DatasetSketch':
+        self.rows += other.rows
+        for column, theirs in other.stats.items():
+            mine = self.stats.setdefault(column, {'count': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf})
+            mine['count'] += theirs['count']
+            mine['sum'] += theirs['sum']
+            mine['min'] = min(mine['min'], theirs['min'])
+            mine['max'] = max(mine['max'], theirs['max'])
+        for name, sketch in other.quantiles.items():
+            self.quantiles[name].merge(sketch)
+        for name, sketch in other.heavy_hitters.items():
+            self.heavy_hitters[name].merge(sketch)
+        for name, sketch in other.distinct.items():
+            self.distinct[name].merge(sketch)
+        return self
+
+    def summary(self, top_n: int = 10) -> Dict:
+        """Dashboard stats: exact count/mean/min/max, approximate quantiles, top items, distinct counts"""
+        summary = {'rows': self.rows}
+        for name, column in QUANTILE_COLUMNS.items():
+            stats = self.stats.get(column, {'count': 0})
+            sketch = self.quantiles[name]
+            entry = {
+                'count': stats['count'],
+                'mean': stats['sum'] / stats['count'] if stats['count'] else None,
+                'min': stats['min'] if stats['count'] else None,
+                'max': stats['max'] if stats['count'] else None,
+            }
+            if name == 'trade_value':
+                entry['total'] = stats.get('sum', 0.0)
+            entry.update({label: sketch.quantile(q) for label, q in SUMMARY_QUANTILES.items()})
+            summary[name] = entry
+        summary['top'] = {name: sketch.top(top_n) for name, sketch in self.heavy_hitters.items()}
+        summary['distinct'] = {name: sketch.estimate() for name, sketch in self.distinct.items()}
+        return summary
+
+    def to_dict(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'stats': {column: {key: (None if isinstance(v, float) and math.isinf(v) else v) for key, v in stats.items()}
+                      for column, stats in self.stats.items()},
+            'quantiles': {name: sketch.to_dict() for name, sketch in self.quantiles.items()},
+            'heavy_hitters': {name: sketch.to_dict() for name, sketch in self.heavy_hitters.items()},
+            'distinct': {name: sketch.to_dict() for name, sketch in self.distinct.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DatasetSketch':
+        sketch = cls()
+        sketch.rows = data['rows']
+        sketch.stats = {column: {'count': stats['count'], 'sum': stats['sum'],
+                                 'min': math.inf if stats['min'] is None else stats['min'],
+                                 'max': -math.inf if stats['max'] is None else stats['max']}
+                        for column, stats in data['stats'].items()}
+        sketch.quantiles = {name: KLLSketch.from_dict(d) for name, d in data['quantiles'].items()}
+        sketch.heavy_hitters = {name: SpaceSaving.from_dict(d) for name, d in data['heavy_hitters'].items()}
+        sketch.distinct = {name: HyperLogLog.from_dict(d) for name, d in data['distinct'].items()}
+        return sketch
+
+def _bilateral(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop the World aggregate rows so partner stats cover bilateral flows only"""
+    if 'partner_iso' not in df.columns:
+        return df
+    return df[df['partner_iso'].astype(str).str.upper() != WORLD_ISO]
+
+def partition_key(values) -> str:
+    values = values if isinstance(values, tuple) else (values,)
+    return '-'.join(str(value) for value in values)
+
+def sketch_partitions(df: pd.DataFrame, by: Optional[List[str]] = None) -> Dict[str, DatasetSketch]:
+    """One sketch per partition (a single 'all' partition if the columns are missing)"""
+    df = _bilateral(df)
+    by = [column for column in (PARTITION_COLUMNS if by is None else by) if column in df.columns]
+    if not by:
+        return {'all': DatasetSketch().update(df)}
+    return {partition_key(key): DatasetSketch().update(group)
+            for key, group in df.groupby(by if len(by) > 1 else by[0], sort=True)}
+
+def sketch_document(df: pd.DataFrame, by: Optional[List[str]] = None) -> Dict:
+    """
+    Publishable sketches of a dataset
+
+    Returns:
+        {'partition_by', 'partitions': {key: sketch}, 'summary': summary of all partitions}
+    """
+    partitions = sketch_partitions(df, by)
+    combined = DatasetSketch()
+    for sketch in partitions.values():
+        combined.merge(sketch)
+    return {
+        'partition_by': [column for column in (PARTITION_COLUMNS if by is None else by) if column in df.columns],
+        'partitions': {key: sketch.to_dict() for key, sketch in partitions.items()},
+        'summary': combined.summary(),
+    }
+
+def load_sketch(document: Dict, partitions: Optional[Iterable[str]] = None) -> DatasetSketch:
+    """Merge the stored sketches of some (default: all) partitions"""
+    keys = list(document['partitions']) if partitions is None else list(partitions)
+    combined = DatasetSketch()
+    for key in keys:
+        combined.merge(DatasetSketch.from_dict(document['partitions'][key]))
+    return combined
+
+def iter_csv_sketches(path: str, chunksize: int = 100_000) -> Iterator[DatasetSketch]:
+    """Sketch a CSV chunk by chunk (memory bounded by the chunk size)"""
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype={'hs4': str}):
+        yield DatasetSketch().update(_bilateral(chunk))
+
+def sketch_csv(path: str, chunksize: int = 100_000) -> DatasetSketch:
+    """One merged sketch of a CSV too large to load at once"""
+    combined = DatasetSketch()
+    for sketch in iter_csv_sketches(path, chunksize):
+        combined.merge(sketch)
+    return combined
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Embedded SQL store for the curated outputs.
+
+Bulk-loads the merged, expanded, rollup and HS dictionary tables of the current
+published version into a single SQLite file, so ad hoc analytical queries run
+against indexes instead of full CSV scans:
+
+    sqlite3 data/processed/tariffic.db \
+        "SELECT partner_iso, SUM(tariff_revenue_estimate) FROM expanded_summary
+         WHERE hs4 = '2709' GROUP BY partner_iso"
+
+The database is built in a temporary file inside one transaction (prepared,
+batched inserts; indexes created after the data) and swapped into place
+atomically, so readers never open a half-built file.
+"""
+import itertools
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# Allow running as `python utils/sql_store.py` from the data-curator directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.publish import PROCESSED_DIR, current_version, resolve_path
+from utils.changeset import KEY_COLUMNS
+
+DB_FILE = "tariffic.db"
+BATCH_SIZE = 5000
+
+# Table name -> source file in the processed directory
+TABLES = {
+    'merged_summary': 'merged_summary.csv',
+    'expanded_summary': 'expanded_summary.csv',
+    'category_summary': 'category_summary.csv',
+    'high_tariff_products': 'high_tariff_products.csv',
+    'top_products_by_trade_value': 'top_products_by_trade_value.csv',
+}
+HS_DICTIONARY_FILE = 'hs_dictionary.json'
+
+# Table -> code columns that must stay zero-padded text (column -> width); other columns keep
+# their inferred type (category_summary.hs4 is a product count, not a code)
+CODE_COLUMNS = {
+    'merged_summary': {'hs4': 4},
+    'expanded_summary': {'hs4': 4, 'category_code': 2},
+    'category_summary': {'hs2': 2},
+    'high_tariff_products': {'hs4': 4, 'hs2': 2},
+    'top_products_by_trade_value': {'hs4': 4, 'hs2': 2},
+}
+
+# (table, columns) indexes; created only when the table has all the columns
+INDEXES = [
+    ('merged_summary', ('hs4',)),
+    ('expanded_summary', ('hs4',)),
+    ('expanded_summary', ('partner_iso',)),
+    ('expanded_summary', tuple(KEY_COLUMNS)),
+    ('expanded_summary', ('category_code',)),
+    ('high_tariff_products', ('hs4',)),
+    ('top_products_by_trade_value', ('hs4',)),
+]
+
+def _sql_type(dtype) -> str:
+    """SQLite column affinity for a pandas dtype"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def read_table(path: str, code_columns: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """Read a processed CSV keeping `code_columns` (column -> width) as zero-padded text"""
+    code_columns = code_columns or {}
+    df = pd.read_csv(path, dtype={col: str for col in code_columns})
+    for col, width in code_columns.items():
+        if col in df.columns:
+            df[col] = df[col].str.zfill(width)
+    return df
+
+def _row_batches(df: pd.DataFrame, batch_size: int) -> Iterable[List[Tuple]]:
+    """Rows as tuples (NaN -> NULL) in batches for executemany"""
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _load_frame(conn: sqlite3.Connection, table: str, df: pd.DataFrame, batch_size: int) -> int:
+    """Create a table from a DataFrame's schema and bulk-insert its rows"""
+    columns = ', '.join(f"{_quote(col)} {_sql_type(df[col].dtype)}" for col in df.columns)
+    conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+    conn.execute(f"CREATE TABLE {_quote(table)} ({columns})")
+
+    insert = (f"INSERT INTO {_quote(table)} ({', '.join(_quote(c) for c in df.columns)}) "
+              f"VALUES ({', '.join('?' for _ in df.columns)})")
+    for batch in _row_batches(df, batch_size):
+        conn.executemany(insert, batch)
+    return len(df)
+
+def load_sql_store(root: str = PROCESSED_DIR,
+                   db_path: Optional[str] = None,
+                   batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Build the embedded database from the current processed outputs
+
+    Args:
+        root: Processed data directory (files are read from the CURRENT version when published)
+        db_path: Output database file (default: <root>/tariffic.db)
+        batch_size: Rows per executemany batch
+
+    Returns:
+        Dictionary of table name -> loaded row count
+    """
+    db_path = db_path or os.path.join(root, DB_FILE)
+    tmp_path = f"{db_path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    print(f"🗄️  Building SQL store: {db_path}")
+    counts = {}
+
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        # Private temp file: no journal needed, durability comes from the final rename
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+
+        for table, filename in TABLES.items():
+            path = resolve_path(filename, root)
+            if not os.path.exists(path):
+                print(f"  ⚠️  Skipping {table}: {filename} not found")
+                continue
+            counts[table] = _load_frame(conn, table, read_table(path, CODE_COLUMNS.get(table)), batch_size)
+            print(f"  ✓ {table}: {counts[table]:,} rows")
+
+        dictionary_path = resolve_path(HS_DICTIONARY_FILE, root)
+        if os.path.exists(dictionary_path):
+            with open(dictionary_path, 'r', encoding='utf-8') as f:
+                hs_dict = json.load(f)
+            conn.execute("DROP TABLE IF EXISTS hs_dictionary")
+            conn.execute("CREATE TABLE hs_dictionary (hs_code TEXT PRIMARY KEY, description TEXT)")
+            conn.executemany("INSERT OR REPLACE INTO hs_dictionary VALUES (?, ?)", hs_dict.items())
+            counts['hs_dictionary'] = len(hs_dict)
+            print(f"  ✓ hs_dictionary: {len(hs_dict):,} codes")
+
+        for table, columns in INDEXES:
+            if table not in counts:
+                continue
+            table_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")}
+            if not set(columns) <= table_columns:
+                continue
+            name = f"idx_{table}_{'_'.join(columns)}"
+            conn.execute(f"CREATE INDEX {_quote(name)} ON {_quote(table)} "
+                         f"({', '.join(_quote(c) for c in columns)})")
+
+        conn.execute("CREATE TABLE store_metadata (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO store_metadata VALUES (?, ?)", [
+            ('version', current_version(root) or ''),
+            ('row_counts', json.dumps(counts)),
+        ])
+
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+    except Exception:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    print(f"✅ SQL store ready ({sum(counts.values()):,} rows, {os.path.getsize(db_path) / 1024 / 1024:.1f} MB)")
+
+    return counts
+
+def main():
+    """Load the current processed outputs into the embedded SQL store"""
+    print("🚀 Starting SQL store load...")
+    return load_sql_store()
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,12 @@ const getCategoryName = (hs2: string, categories: Hs4Categories): string => {
 
 export async function GET(req: NextRequest) {
   try {
+    // Prebuilt, pruned hierarchy from data-curator/utils/hierarchies.py
+    const treePath = path.join(process.cwd(), 'public', 'hierarchies', 'tree.json');
+    if (fs.existsSync(treePath)) {
+      return NextResponse.json(JSON.parse(fs.readFileSync(treePath, 'utf8')));
+    }
+
     const filePath = path.join(process.cwd(), 'public', 'expanded_summary.csv');
     const dictionaryPath = path.join(process.cwd(), '..', 'data-curator', 'data', 'processed', 'data_dictionary.json');
     
@@ -1,7 +1,8 @@
 'use client'
 
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import Heatmap from '@/components/Heatmap'
+import { loadHeatmapMatrix } from '@/lib/tradeData'
 import HotspotList from '@/components/HotspotList';
 import { Switch } from '@/components/ui/switch';
 
@@ -11,7 +12,7 @@ interface CountryData {
   avg_tariff: number;
   total_trade_value: number;
   tariff_revenue: number;
-  product_count: number;
+  chapter_count: number;
 }
 
 export default function HeatmapPage() {
@@ -19,6 +20,15 @@ export default function HeatmapPage() {
   const [projection, setProjection] = useState<'globe' | 'mercator'>('globe');
   const [showHotspots, setShowHotspots] = useState(true);
   const [countryData, setCountryData] = useState<CountryData[]>([]);
+  const [chapter, setChapter] = useState<string>('');
+  const [chapters, setChapters] = useState<{ code: string; name: string }[]>([]);
+
+  // Chapter labels come with the heatmap matrices (the same cached fetch)
+  useEffect(() => {
+    loadHeatmapMatrix()
+      .then(matrix => setChapters(matrix.hs2.map((code, i) => ({ code, name: matrix.chapter_names[i] }))))
+      .catch(error => console.error('Error loading heatmap chapters:', error));
+  }, []);
 
   return (
     <div className="relative isolate w-screen h-screen">
@@ -62,6 +72,20 @@ export default function HeatmapPage() {
               </button>
             </div>
 
+            {/* Chapter Selector */}
+            <select
+              value={chapter}
+              onChange={e => setChapter(e.target.value)}
+              className="px-3 py-2 rounded-lg text-sm font-medium bg-white/20 text-white border border-white/20"
+            >
+              <option value="" className="text-black">All chapters</option>
+              {chapters.map(({ code, name }) => (
+                <option key={code} value={code} className="text-black">
+                  {code} · {name}
+                </option>
+              ))}
+            </select>
+
             {/* View Toggle */}
             <div className="flex space-x-2 bg-white/20 p-1 rounded-lg">
               <button
@@ -107,6 +131,7 @@ export default function HeatmapPage() {
             showHotspots={showHotspots}
             onDataLoaded={setCountryData}
             transparentBackground
+            chapter={chapter || undefined}
         />
       </div>
       {showHotspots && countryData.length > 0 && <HotspotList countryData={countryData} metric={metric} />}
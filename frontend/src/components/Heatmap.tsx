@@ -1,9 +1,10 @@
 'use client'
 
-import { useCallback, useEffect, useRef, useState } from 'react'
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 import mapboxgl from 'mapbox-gl'
 import 'mapbox-gl/dist/mapbox-gl.css'
 import HeatmapLegend from './HeatmapLegend';
+import { heatmapPartners, loadHeatmapMatrix, HeatmapMatrix, HeatmapMetric } from '@/lib/tradeData'
 
 interface CountryData {
   country: string;
@@ -11,7 +12,7 @@ interface CountryData {
   avg_tariff: number;
   total_trade_value: number;
   tariff_revenue: number;
-  product_count: number;
+  chapter_count: number;
 }
 
 interface GeoJSONFeature {
@@ -31,41 +32,85 @@ interface HeatmapProps {
   showHotspots?: boolean;
   onDataLoaded?: (data: CountryData[]) => void;
   transparentBackground?: boolean;
+  // HS2 chapter to map; all chapters when omitted
+  chapter?: string;
 }
 
 const INITIAL_CENTER: [number, number] = [0, 15]
 const INITIAL_ZOOM = 1.25
 
+const MATRIX_METRICS: Record<NonNullable<HeatmapProps['metric']>, HeatmapMetric> = {
+  avg_tariff: 'tariff',
+  total_trade_value: 'trade_value',
+  tariff_revenue: 'tariff_revenue',
+}
+
+// Color ramp placed on the precomputed quantiles of the mapped values
+const PALETTE = ['#EFF3FF', '#BDD7E7', '#6BAED6', '#3182BD', '#08519C']
+const STOP_LEVELS = [0, 0.2, 0.4, 0.6, 0.8]
+
+const quantileStops = (matrix: HeatmapMatrix, metric: HeatmapMetric, chapter?: string): [number, string][] => {
+  const quantiles = (chapter ? matrix.quantiles : matrix.partner_quantiles)[metric] || []
+  const stops: [number, string][] = []
+  STOP_LEVELS.forEach((level, i) => {
+    const q = quantiles[matrix.quantile_levels.indexOf(level)]
+    if (q === undefined) return
+    const value = i === 0 ? 0 : metric === 'tariff' ? Math.round(q * 10) / 10 : Math.round(q)
+    // Interpolation stops must be strictly increasing
+    if (stops.length === 0 || value > stops[stops.length - 1][0]) {
+      stops.push([value, PALETTE[i]])
+    }
+  })
+  return stops
+}
+
 export default function Heatmap({
   metric = 'avg_tariff',
   projection = 'globe',
   showHotspots = true,
   onDataLoaded = () => {},
-  transparentBackground = true
+  transparentBackground = true,
+  chapter,
 }: HeatmapProps) {
   const mapContainer = useRef<HTMLDivElement>(null)
   const mapRef = useRef<mapboxgl.Map | null>(null)
   const [loading, setLoading] = useState(false)
   const [selectedCountry, setSelectedCountry] = useState<CountryData | null>(null)
   const [showDrawer, setShowDrawer] = useState(false)
-  const [countryData, setCountryData] = useState<CountryData[]>([])
+  const [matrix, setMatrix] = useState<HeatmapMatrix | null>(null)
   const [geojsonData, setGeojsonData] = useState<any>(null)
   const [colorStops, setColorStops] = useState<[number, string][]>([])
 
-  // Fetch country data
-  const fetchCountryData = useCallback(async () => {
+  // Fetch the precomputed chapter x partner matrices
+  const fetchMatrix = useCallback(async () => {
     try {
       setLoading(true)
-      const res = await fetch('/api/countries')
-      const data = await res.json()
-      setCountryData(data)
-      onDataLoaded(data)
+      setMatrix(await loadHeatmapMatrix())
     } catch (error) {
-      console.error('Error fetching country data:', error)
+      console.error('Error fetching heatmap matrix:', error)
     } finally {
       setLoading(false)
     }
-  }, [onDataLoaded])
+  }, [])
+
+  // Per-country values of the selected chapter (or all chapters)
+  const countryData = useMemo<CountryData[]>(() => {
+    if (!matrix) return []
+    return heatmapPartners(matrix, chapter)
+      .map(partner => ({
+        country: partner.name,
+        iso_a3: partner.iso,
+        avg_tariff: Math.round(partner.tariff * 100) / 100,
+        total_trade_value: Math.round(partner.trade_value),
+        tariff_revenue: Math.round(partner.tariff_revenue),
+        chapter_count: partner.chapters,
+      }))
+      .sort((a, b) => b.total_trade_value - a.total_trade_value)
+  }, [matrix, chapter])
+
+  useEffect(() => {
+    if (matrix) onDataLoaded(countryData)
+  }, [matrix, countryData, onDataLoaded])
 
   // Fetch GeoJSON data
   useEffect(() => {
@@ -180,10 +225,10 @@ export default function Heatmap({
     }
   }, [projection])
 
-  // Fetch country data once on mount
+  // Fetch the matrices once on mount
   useEffect(() => {
-    fetchCountryData()
-  }, [fetchCountryData])
+    fetchMatrix()
+  }, [fetchMatrix])
 
   // Set up event handlers when data is available
   useEffect(() => {
@@ -241,7 +286,7 @@ export default function Heatmap({
 
   // Update map colors when country data or metric changes
   useEffect(() => {
-    if (!mapRef.current || !countryData.length || !geojsonData || !mapRef.current.isStyleLoaded()) {
+    if (!mapRef.current || !matrix || !countryData.length || !geojsonData || !mapRef.current.isStyleLoaded()) {
       return
     }
 
@@ -269,7 +314,7 @@ export default function Heatmap({
             avg_tariff: country.avg_tariff,
             total_trade_value: country.total_trade_value,
             tariff_revenue: country.tariff_revenue,
-            product_count: country.product_count
+            chapter_count: country.chapter_count
           }
         }
       }
@@ -295,45 +340,8 @@ export default function Heatmap({
         }
     }
 
-    // Define color stops based on metric
-    let stops: [number, string][] = []
-    switch (metric) {
-      case 'avg_tariff':
-        stops = [
-          [0, '#EFF3FF'],
-          [2, '#BDD7E7'],
-          [5, '#6BAED6'],
-          [10, '#3182BD'],
-          [20, '#08519C']
-        ]
-        break
-      case 'total_trade_value':
-        stops = [
-          [0, '#EFF3FF'],
-          [1000000000, '#BDD7E7'], // 1B
-          [5000000000, '#6BAED6'], // 5B
-          [10000000000, '#3182BD'], // 10B
-          [50000000000, '#08519C'] // 50B
-        ]
-        break
-      case 'tariff_revenue':
-        stops = [
-          [0, '#EFF3FF'],
-          [100000000, '#BDD7E7'], // 100M
-          [500000000, '#6BAED6'], // 500M
-          [1000000000, '#3182BD'], // 1B
-          [5000000000, '#08519C'] // 5B
-        ]
-        break
-      default:
-        stops = [
-          [0, '#EFF3FF'],
-          [2, '#BDD7E7'],
-          [5, '#6BAED6'],
-          [10, '#3182BD'],
-          [20, '#08519C']
-        ]
-    }
+    // Color stops from the precomputed quantiles of the mapped values
+    const stops = quantileStops(matrix, MATRIX_METRICS[metric], chapter)
     setColorStops(stops);
 
     const paintProperty = [
@@ -347,7 +355,7 @@ export default function Heatmap({
       map.setPaintProperty('countries-fill', 'fill-color', paintProperty)
     }
 
-  }, [countryData, geojsonData, metric, showHotspots])
+  }, [matrix, chapter, countryData, geojsonData, metric, showHotspots])
 
   return (
     <div className="w-full h-full relative">
@@ -390,8 +398,8 @@ export default function Heatmap({
                 <p className="text-white font-medium">${selectedCountry.tariff_revenue.toLocaleString()}</p>
               </div>
               <div>
-                <span className="text-white/70 text-sm">Products:</span>
-                <p className="text-white font-medium">{selectedCountry.product_count}</p>
+                <span className="text-white/70 text-sm">HS2 Chapters Traded:</span>
+                <p className="text-white font-medium">{selectedCountry.chapter_count}</p>
               </div>
             </div>
 
@@ -6,7 +6,7 @@ interface CountryData {
   avg_tariff: number;
   total_trade_value: number;
   tariff_revenue: number;
-  product_count: number;
+  chapter_count: number;
 }
 
 interface HotspotListProps {
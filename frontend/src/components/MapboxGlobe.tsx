@@ -3,7 +3,7 @@
 import { useCallback, useEffect, useRef, useState } from 'react'
 import mapboxgl from 'mapbox-gl'
 import 'mapbox-gl/dist/mapbox-gl.css'
-import { generateTariffGeoJSON, getAllCountries } from '@/lib/tradeData'
+import { generateTariffGeoJSON, getAllCountries, FlowLevel } from '@/lib/tradeData'
 import CountryFilter from './CountryFilter'
 import { Filter } from 'lucide-react'
 
@@ -24,9 +24,14 @@ const INITIAL_ZOOM = 1.25
 export default function MapboxGlobe({
   transparentBackground = true,
   showFilterButton = true,
+  flowLevel = 'all',
+  flowCode,
 }: {
   transparentBackground?: boolean
   showFilterButton?: boolean
+  // Flow tile to draw: all products, one HS2 chapter or one HS4 product
+  flowLevel?: FlowLevel
+  flowCode?: string
 }) {
   const mapContainer = useRef<HTMLDivElement>(null)
   const mapRef = useRef<mapboxgl.Map | null>(null)
@@ -257,7 +262,7 @@ export default function MapboxGlobe({
       setLoading(true);
       setDataLoaded(false);
 
-      const geojsonData = await generateTariffGeoJSON(selectedCountries);
+      const geojsonData = await generateTariffGeoJSON(selectedCountries, flowLevel, flowCode);
 
       if (map.getSource('tariffs-lines')) {
         (map.getSource('tariffs-lines') as mapboxgl.GeoJSONSource).setData(geojsonData.lines);
@@ -297,7 +302,7 @@ export default function MapboxGlobe({
     if (selectedCountries.length > 0) {
       updateMapData();
     }
-  }, [isMapReady, selectedCountries]);
+  }, [isMapReady, selectedCountries, flowLevel, flowCode]);
 
   // Effect for attaching event listeners
   useEffect(() => {
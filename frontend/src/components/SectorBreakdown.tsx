@@ -5,6 +5,7 @@ import dynamic from 'next/dynamic';
 import { Tabs, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import AnalysisSheet from './AnalysisSheet';
 import ChartContainer from './ChartContainer';
+import { loadChartHierarchies, HierarchyNodes, HierarchySankey } from '@/lib/tradeData';
 
 const SankeyChart = dynamic(() => import('./charts/SankeyChart'), { 
   ssr: false,
@@ -31,7 +32,7 @@ interface ProductData {
 
 const SectorBreakdown = () => {
   const [view, setView] = useState<"sankey" | "treemap" | "sunburst">("sankey");
-  const [data, setData] = useState(null);
+  const [data, setData] = useState<{ nodes: HierarchyNodes; sankey: HierarchySankey } | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -44,12 +45,8 @@ const SectorBreakdown = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const res = await fetch("/api/sectors");
-        if (!res.ok) {
-          throw new Error(`Failed to fetch: ${res.status} ${res.statusText}`);
-        }
-        const jsonData = await res.json();
-        setData(jsonData);
+        // Prebuilt node/link arrays, handed to the charts as-is
+        setData(await loadChartHierarchies());
       } catch (err: unknown) {
         setError(err instanceof Error ? err.message : 'An error occurred');
       } finally {
@@ -85,13 +82,14 @@ const SectorBreakdown = () => {
   };
 
   const renderChart = () => {
+    if (!data) return null;
     switch (view) {
       case "sankey":
-        return <SankeyChart data={data} />;
+        return <SankeyChart data={data.sankey} />;
       case "treemap":
-        return <TreemapChart data={data} onProductClick={handleProductClick} />;
+        return <TreemapChart data={data.nodes} onProductClick={handleProductClick} />;
       case "sunburst":
-        return <SunburstChart data={data} onProductClick={handleProductClick} />;
+        return <SunburstChart data={data.nodes} onProductClick={handleProductClick} />;
       default:
         return null;
     }
@@ -2,6 +2,7 @@
 import React from 'react';
 import Plot from 'react-plotly.js';
 import { getHSDescription } from '@/lib/hsDictionary';
+import { HierarchyNodes } from '@/lib/tradeData';
 
 interface ProductData {
   hs4: string;
@@ -12,7 +13,7 @@ interface ProductData {
 }
 
 interface SunburstChartProps {
-  data: any;
+  data: HierarchyNodes;
   onProductClick: (product: ProductData) => void;
 }
 
@@ -33,55 +34,33 @@ const wrapText = (text: string, maxLen: number = 20): string => {
 };
 
 const SunburstChart: React.FC<SunburstChartProps> = ({ data, onProductClick }) => {
-  if (!data || !data.children) {
+  if (!data || !data.ids || data.ids.length === 0) {
     return <div className="text-center p-8">No data available for Sunburst chart.</div>;
   }
 
-  const rootId = 'world';
-  const labels: string[] = [data.to];
-  const parents: string[] = [''];
-  const values: number[] = [data.total_value];
-  const ids: string[] = [rootId];
-  const customdata: any[] = [{
-    tariff: 0,
-    share_of_total: 100
-  }];
-  
-  data.children.forEach((hs2: any) => {
-    const hs2_id = hs2.hs2.toString();
-    const hs2Description = getHSDescription(hs2.hs2, hs2.name);
-    ids.push(hs2_id);
-    labels.push(`<b>${wrapText(hs2Description)}</b>`);
-    parents.push(rootId);
-    values.push(hs2.value);
-    customdata.push({
-      tariff: hs2.tariff,
-      share_of_total: (hs2.value / data.total_value) * 100
-    });
-
-    hs2.children.forEach((hs4: any) => {
-      const hs4_id = hs4.hs4.toString();
-      const hs4Description = getHSDescription(hs4.hs4, hs4.name);
-      ids.push(hs4_id);
-      labels.push(wrapText(hs4Description));
-      parents.push(hs2_id);
-      values.push(hs4.value);
-      customdata.push({
-        tariff: hs4.tariff,
-        share_of_total: (hs4.value / data.total_value) * 100
-      });
-    });
+  // ids, parents, values and tariffs come prebuilt; only labels are dressed up
+  const labels = data.labels.map((label, i) => {
+    const level = data.levels[i];
+    if (level === 'hs2') return `<b>${wrapText(getHSDescription(data.keys[i], label))}</b>`;
+    if (level === 'hs4') return wrapText(getHSDescription(data.keys[i], label));
+    return wrapText(label);
   });
+  const customdata = data.tariff.map((tariff, i) => ({
+    tariff,
+    share_of_total: data.share_of_total[i],
+  }));
 
   const plotData: any = [{
     type: 'sunburst',
-    ids: ids,
+    ids: data.ids,
     labels: labels,
-    parents: parents,
-    values: values,
+    parents: data.parents,
+    values: data.values,
+    // Root, chapters and products; partners show when a product is opened
+    maxdepth: 3,
     customdata: customdata,
     marker: {
-      colors: customdata.map(d => d.tariff),
+      colors: data.tariff,
       colorscale: [
         [0, '#0ea5e9'], // Sky blue for low tariffs
         [0.5, '#3b82f6'], // Blue for medium tariffs
@@ -127,9 +106,9 @@ const SunburstChart: React.FC<SunburstChartProps> = ({ data, onProductClick }) =
       }}
       onClick={(e: any) => {
         const point = e.points[0];
-        const id = point.id;
-        if (id && id.length === 4 && parents[point.pointNumber] !== rootId) {
-          const hs4 = id;
+        const index = point.pointNumber;
+        const hs4 = data.keys[index];
+        if (data.levels[index] === 'hs4' && !hs4.startsWith('Other')) {
           const product = {
             hs4: hs4,
             name: point.label.replace(/<br>/g, ' ').replace(/<b>/g, '').replace(/<\/b>/g, ''),
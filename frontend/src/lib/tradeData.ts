@@ -9,60 +9,8 @@ interface ExpandedSummaryRow {
   hs4: string
 }
 
-interface CountryInfo {
-  latlng: [number, number]
-}
-
-const getCountryCoords = async (
-  isoCode: string,
-): Promise<[number, number] | null> => {
-  if (!isoCode || isoCode.toLowerCase() === 'wld') return null
-  
-  // Check hardcoded coordinates first for faster loading
-  if (COUNTRY_COORDS[isoCode]) {
-    return COUNTRY_COORDS[isoCode]
-  }
-  
-  try {
-    const response = await fetch(
-      `https://restcountries.com/v3.1/alpha/${isoCode}`,
-    )
-    if (!response.ok) {
-      return null
-    }
-    const data: CountryInfo[] = await response.json()
-    if (data && data[0] && data[0].latlng) {
-      const [lat, lon] = data[0].latlng
-      return [lon, lat]
-    }
-    return null
-  } catch (error) {
-    console.error(`Could not fetch coordinates for ${isoCode}`, error)
-    return null
-  }
-}
-
 const USA_COORDS: [number, number] = [-98.5795, 39.8283] // Center of USA
 
-// Hardcoded coordinates for major trading partners to avoid API delays
-const COUNTRY_COORDS: Record<string, [number, number]> = {
-  'CAN': [-106.3468, 56.1304], // Canada
-  'MEX': [-102.5528, 23.6345], // Mexico
-  'CHN': [104.1954, 35.8617], // China
-  'JPN': [138.2529, 36.2048], // Japan
-  'DEU': [10.4515, 51.1657], // Germany
-  'GBR': [-3.4360, 55.3781], // United Kingdom
-  'KOR': [127.7669, 35.9078], // South Korea
-  'FRA': [2.2137, 46.2276], // France
-  'ITA': [12.5674, 41.8719], // Italy
-  'IND': [78.9629, 20.5937], // India
-  'BRA': [-51.9253, -14.2350], // Brazil
-  'NLD': [5.2913, 52.1326], // Netherlands
-  'CHE': [8.2275, 46.8182], // Switzerland
-  'BEL': [4.4699, 50.5039], // Belgium
-  'ESP': [-3.7492, 40.4637], // Spain
-}
-
 // Function to calculate bearing
 const calculateBearing = (
   start: [number, number],
@@ -92,13 +40,28 @@ export interface CountryTradeData {
   rank: number
 }
 
-export const generateTariffGeoJSON = async (selectedCountries?: string[]) => {
-  try {
-    const res = await fetch('/expanded_summary.csv')
-    if (!res.ok) {
-      throw new Error(`Failed to fetch CSV: ${res.status} ${res.statusText}`)
-    }
-    const text = await res.text()
+interface PartnerTotals {
+  partnerName: string
+  totalTradeValue: number
+  avgTariff: number
+}
+
+// Column-oriented per-partner totals written by data-curator/utils/shards.py
+interface PartnersShard {
+  rows: number
+  partner_iso: string[]
+  name: string[]
+  trade_value_total: number[]
+  avg_tariff: number[]
+}
+
+// Aggregate the full expanded CSV (fallback when the shards are not deployed)
+const partnerTotalsFromCSV = async (): Promise<Map<string, PartnerTotals>> => {
+  const res = await fetch('/expanded_summary.csv')
+  if (!res.ok) {
+    throw new Error(`Failed to fetch CSV: ${res.status} ${res.statusText}`)
+  }
+  const text = await res.text()
 
   const allRows = Papa.parse<ExpandedSummaryRow>(text, {
     header: true,
@@ -137,66 +100,305 @@ export const generateTariffGeoJSON = async (selectedCountries?: string[]) => {
   }
 
   // Calculate average tariff for each country
-  tradeByCountry.forEach(value => {
+  const totals = new Map<string, PartnerTotals>()
+  tradeByCountry.forEach((value, iso) => {
     const sum = value.tariffs.reduce((a, b) => a + b, 0)
-    value.avgTariff = sum / value.tariffs.length
+    totals.set(iso, {
+      partnerName: value.partnerName,
+      totalTradeValue: value.totalTradeValue,
+      avgTariff: sum / value.tariffs.length,
+    })
   })
+  return totals
+}
+
+let partnerTotalsPromise: Promise<Map<string, PartnerTotals>> | null = null
+
+// Per-partner totals from the few-KB partners shard, loaded once per page
+const loadPartnerTotals = (): Promise<Map<string, PartnerTotals>> => {
+  if (!partnerTotalsPromise) {
+    partnerTotalsPromise = (async () => {
+      try {
+        const res = await fetch('/shards/partners.json')
+        if (!res.ok) {
+          throw new Error(`Failed to fetch partners shard: ${res.status}`)
+        }
+        const shard: PartnersShard = await res.json()
+        const totals = new Map<string, PartnerTotals>()
+        for (let i = 0; i < shard.rows; i++) {
+          totals.set(shard.partner_iso[i], {
+            partnerName: shard.name[i],
+            totalTradeValue: shard.trade_value_total[i],
+            avgTariff: shard.avg_tariff[i],
+          })
+        }
+        return totals
+      } catch (error) {
+        console.warn('Partners shard unavailable, falling back to CSV', error)
+        return partnerTotalsFromCSV()
+      }
+    })()
+    partnerTotalsPromise.catch(() => {
+      partnerTotalsPromise = null
+    })
+  }
+  return partnerTotalsPromise
+}
+
+// Binary flow tiles written by data-curator/utils/flow_tiles.py
+export type FlowLevel = 'all' | 'hs2' | 'hs4'
+
+interface FlowManifest {
+  format: { dtype: 'float32'; endian: 'little'; fields: string[]; stride: number }
+  origin: { iso: string; lon: number; lat: number } | null
+  top_n: number
+  partners: { iso: string[]; name: string[] }
+  tiles: Record<string, { count: number; bytes: number; sha256: string; trade_value_total: number }>
+}
+
+export interface FlowTile {
+  count: number
+  stride: number
+  fields: string[]
+  // Interleaved lon, lat, trade_value, tariff, tariff_revenue, partner per flow
+  data: Float32Array
+  partners: { iso: string[]; name: string[] }
+  origin: [number, number]
+}
+
+let flowManifestPromise: Promise<FlowManifest> | null = null
+
+const loadFlowManifest = (): Promise<FlowManifest> => {
+  if (!flowManifestPromise) {
+    flowManifestPromise = fetch('/flows/manifest.json').then(res => {
+      if (!res.ok) {
+        throw new Error(`Failed to fetch flow manifest: ${res.status}`)
+      }
+      return res.json()
+    })
+    flowManifestPromise.catch(() => {
+      flowManifestPromise = null
+    })
+  }
+  return flowManifestPromise
+}
+
+// Load the partner flows for all products, or the top ones of an HS2 chapter / HS4 product
+export const loadFlowTile = async (
+  level: FlowLevel = 'all',
+  code?: string,
+): Promise<FlowTile | null> => {
+  const manifest = await loadFlowManifest()
+  const path = level === 'all' ? 'all.bin' : `${level}/${code}.bin`
+  const entry = manifest.tiles[path]
+  if (!entry) return null
+
+  // The sha256 in the URL busts caches whenever the tile content changes
+  const res = await fetch(`/flows/${path}?v=${entry.sha256.slice(0, 12)}`)
+  if (!res.ok) {
+    throw new Error(`Failed to fetch flow tile ${path}: ${res.status}`)
+  }
+  const data = new Float32Array(await res.arrayBuffer())
+  return {
+    count: entry.count,
+    stride: manifest.format.stride,
+    fields: manifest.format.fields,
+    data,
+    partners: manifest.partners,
+    origin: manifest.origin ? [manifest.origin.lon, manifest.origin.lat] : USA_COORDS,
+  }
+}
 
-  // Get all countries sorted by trade value
-  const allCountriesSorted = Array.from(tradeByCountry.entries())
-    .sort(([, a], [, b]) => b.totalTradeValue - a.totalTradeValue)
+// HS2 chapter x partner matrices written by data-curator/utils/heatmap_matrix.py
+export type HeatmapMetric = 'tariff' | 'trade_value' | 'tariff_revenue'
+
+interface HeatmapHeader {
+  shape: [number, number]
+  metrics: Record<HeatmapMetric, { offset: number; length: number }>
+  hs2: string[]
+  chapter_names: string[]
+  partners: string[]
+  partner_names: string[]
+  quantile_levels: number[]
+  // Stops over single cells (one chapter) and over all-chapter partner totals
+  quantiles: Record<HeatmapMetric, number[]>
+  partner_quantiles: Record<HeatmapMetric, number[]>
+  sha256: string
+}
+
+export interface HeatmapMatrix extends HeatmapHeader {
+  // Row-major [hs2][partner] values, NaN for empty cells
+  values: Record<HeatmapMetric, Float32Array>
+}
+
+let heatmapPromise: Promise<HeatmapMatrix> | null = null
+
+// Header plus one binary fetch, shared by every heatmap on the page
+export const loadHeatmapMatrix = (): Promise<HeatmapMatrix> => {
+  if (!heatmapPromise) {
+    heatmapPromise = (async () => {
+      const headerRes = await fetch('/heatmap/matrix.json')
+      if (!headerRes.ok) {
+        throw new Error(`Failed to fetch heatmap header: ${headerRes.status}`)
+      }
+      const header: HeatmapHeader = await headerRes.json()
+
+      const res = await fetch(`/heatmap/matrix.bin?v=${header.sha256.slice(0, 12)}`)
+      if (!res.ok) {
+        throw new Error(`Failed to fetch heatmap matrix: ${res.status}`)
+      }
+      const buffer = await res.arrayBuffer()
+      const values = {} as Record<HeatmapMetric, Float32Array>
+      for (const metric of Object.keys(header.metrics) as HeatmapMetric[]) {
+        const { offset, length } = header.metrics[metric]
+        values[metric] = new Float32Array(buffer, offset, length)
+      }
+      return { ...header, values }
+    })()
+    heatmapPromise.catch(() => {
+      heatmapPromise = null
+    })
+  }
+  return heatmapPromise
+}
+
+export interface HeatmapPartner {
+  iso: string
+  name: string
+  tariff: number
+  trade_value: number
+  tariff_revenue: number
+  chapters: number
+}
 
-  // Filter countries based on selection (show nothing if no countries selected)
-  const countriesToShow = selectedCountries && selectedCountries.length > 0 
-    ? allCountriesSorted.filter(([iso]) => selectedCountries.includes(iso))
-    : [] // Show nothing when no countries are selected
+// One value per partner: a chapter row as-is, or the column totals over all
+// chapters (tariff trade-weighted, simple mean of the cells without trade)
+export const heatmapPartners = (matrix: HeatmapMatrix, chapter?: string): HeatmapPartner[] => {
+  const [rows, cols] = matrix.shape
+  const row = chapter ? matrix.hs2.indexOf(chapter) : -1
+  if (chapter && row < 0) return []
+  const { tariff, trade_value, tariff_revenue } = matrix.values
+
+  const partners: HeatmapPartner[] = []
+  for (let j = 0; j < cols; j++) {
+    let trade = 0
+    let revenue = 0
+    let tariffSum = 0
+    let chapters = 0
+    for (let i = row >= 0 ? row : 0; i < (row >= 0 ? row + 1 : rows); i++) {
+      const cell = i * cols + j
+      if (isNaN(tariff[cell])) continue
+      trade += trade_value[cell]
+      revenue += tariff_revenue[cell]
+      tariffSum += tariff[cell]
+      chapters += 1
+    }
+    if (chapters === 0) continue
+    partners.push({
+      iso: matrix.partners[j],
+      name: matrix.partner_names[j],
+      tariff: trade > 0 ? (revenue / trade) * 100 : tariffSum / chapters,
+      trade_value: trade,
+      tariff_revenue: revenue,
+      chapters,
+    })
+  }
+  return partners
+}
+
+// Ready-to-render sector chart arrays written by data-curator/utils/hierarchies.py
+export interface HierarchyNodes {
+  // Parallel arrays, root first; partners sit below each HS4 product
+  ids: string[]
+  keys: string[]
+  labels: string[]
+  parents: string[]
+  levels: ('root' | 'hs2' | 'hs4' | 'partner')[]
+  values: number[]
+  tariff: number[]
+  share_of_total: number[]
+}
+
+export interface HierarchySankey {
+  // Node 0 is the reporter; links point reporter -> HS2 -> HS4
+  labels: string[]
+  keys: string[]
+  levels: ('reporter' | 'hs2' | 'hs4')[]
+  source: number[]
+  target: number[]
+  value: number[]
+  tariff: number[]
+}
+
+export const loadChartHierarchies = async (): Promise<{ nodes: HierarchyNodes; sankey: HierarchySankey }> => {
+  const [nodesRes, sankeyRes] = await Promise.all([
+    fetch('/hierarchies/nodes.json'),
+    fetch('/hierarchies/sankey.json'),
+  ])
+  if (!nodesRes.ok || !sankeyRes.ok) {
+    throw new Error(`Failed to fetch chart hierarchies: ${nodesRes.status}/${sankeyRes.status}`)
+  }
+  return { nodes: await nodesRes.json(), sankey: await sankeyRes.json() }
+}
 
+// Globe lines and arrows straight from a flow tile: coordinates, values and the
+// origin are already in the buffer, so no per-country lookups or aggregation
+export const generateTariffGeoJSON = async (
+  selectedCountries?: string[],
+  level: FlowLevel = 'all',
+  code?: string,
+) => {
   const lineFeatures = []
   const arrowFeatures = []
 
-  for (const [iso, data] of countriesToShow) {
-    const partnerCoords = await getCountryCoords(iso)
-    if (partnerCoords) {
-      const coordinates: [[number, number], [number, number]] = [
-        USA_COORDS,
-        partnerCoords,
-      ]
-      lineFeatures.push({
-        type: 'Feature' as const,
-        properties: {
-          tariffRate: data.avgTariff,
-          tradeValue: data.totalTradeValue,
-          partner: data.partnerName,
-          reporter: 'United States',
-          product: `HS4 ${iso}`,
-          hs4: iso,
-          year: 2022,
-          tariff_revenue: (data.totalTradeValue * data.avgTariff) / 100,
-        },
-        geometry: {
-          type: 'LineString' as const,
-          coordinates,
-        },
-      })
-      arrowFeatures.push({
-        type: 'Feature' as const,
-        geometry: {
-          type: 'Point' as const,
-          coordinates: partnerCoords,
-        },
-        properties: {
-          bearing: calculateBearing(USA_COORDS, partnerCoords),
-          tariffRate: data.avgTariff,
-          tradeValue: data.totalTradeValue,
-          partner: data.partnerName,
+  try {
+    // Show nothing when no countries are selected
+    const tile = selectedCountries && selectedCountries.length > 0
+      ? await loadFlowTile(level, code)
+      : null
+    const selected = new Set(selectedCountries)
+
+    if (tile) {
+      const { data, stride, partners, origin } = tile
+      for (let i = 0; i < tile.count; i++) {
+        const offset = i * stride
+        const iso = partners.iso[data[offset + 5]]
+        if (!selected.has(iso)) continue
+
+        const partnerCoords: [number, number] = [data[offset], data[offset + 1]]
+        const properties = {
+          tariffRate: data[offset + 3],
+          tradeValue: data[offset + 2],
+          partner: partners.name[data[offset + 5]],
           reporter: 'United States',
-          product: `HS4 ${iso}`,
-          hs4: iso,
+          product: level === 'all' ? `HS4 ${iso}` : `${level.toUpperCase()} ${code}`,
+          hs4: level === 'all' ? iso : code ?? '',
           year: 2022,
-          tariff_revenue: (data.totalTradeValue * data.avgTariff) / 100,
-        },
-      })
+          tariff_revenue: data[offset + 4],
+        }
+        lineFeatures.push({
+          type: 'Feature' as const,
+          properties,
+          geometry: {
+            type: 'LineString' as const,
+            coordinates: [origin, partnerCoords],
+          },
+        })
+        arrowFeatures.push({
+          type: 'Feature' as const,
+          geometry: {
+            type: 'Point' as const,
+            coordinates: partnerCoords,
+          },
+          properties: {
+            ...properties,
+            bearing: calculateBearing(origin, partnerCoords),
+          },
+        })
+      }
     }
+  } catch (error) {
+    console.error('Error generating tariff GeoJSON:', error)
   }
 
   return {
@@ -209,71 +411,12 @@ export const generateTariffGeoJSON = async (selectedCountries?: string[]) => {
       features: arrowFeatures,
     },
   }
-  } catch (error) {
-    console.error('Error generating tariff GeoJSON:', error)
-    return {
-      lines: {
-        type: 'FeatureCollection' as const,
-        features: [],
-      },
-      arrows: {
-        type: 'FeatureCollection' as const,
-        features: [],
-      },
-    }
-  }
 }
 
 // Function to get all countries for the filter
 export const getAllCountries = async (): Promise<CountryTradeData[]> => {
   try {
-    const res = await fetch('/expanded_summary.csv')
-    if (!res.ok) {
-      throw new Error(`Failed to fetch CSV: ${res.status} ${res.statusText}`)
-    }
-    const text = await res.text()
-
-    const allRows = Papa.parse<ExpandedSummaryRow>(text, {
-      header: true,
-      skipEmptyLines: true,
-    }).data
-
-    // Group by partner country and sum trade value
-    const tradeByCountry = new Map<
-      string,
-      {
-        totalTradeValue: number
-        avgTariff: number
-        tariffs: number[]
-        partnerName: string
-      }
-    >()
-
-    for (const row of allRows) {
-      if (row.partner_iso && row.partner_iso.toLowerCase() !== 'wld') {
-        const tradeValue = parseFloat(row.trade_value_total)
-        const tariffRate = parseFloat(row.simple_average)
-        if (!isNaN(tradeValue) && !isNaN(tariffRate)) {
-          if (!tradeByCountry.has(row.partner_iso)) {
-            tradeByCountry.set(row.partner_iso, {
-              totalTradeValue: 0,
-              avgTariff: 0,
-              tariffs: [],
-              partnerName: row.partner_name,
-            })
-          }
-          const countryData = tradeByCountry.get(row.partner_iso)!
-          countryData.totalTradeValue += tradeValue
-          countryData.tariffs.push(tariffRate)
-        }
-      }
-    }
-
-    // Calculate average tariff for each country
-    tradeByCountry.forEach(value => {
-      const sum = value.tariffs.reduce((a, b) => a + b, 0)
-      value.avgTariff = sum / value.tariffs.length
-    })
+    const tradeByCountry = await loadPartnerTotals()
 
     // Return all countries sorted by trade value with rank
     const allCountriesSorted = Array.from(tradeByCountry.entries())